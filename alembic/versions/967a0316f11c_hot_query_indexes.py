@@ -0,0 +1,33 @@
+"""hot query indexes
+
+Revision ID: 967a0316f11c
+Revises: 0faa7dcbdda7
+Create Date: 2026-10-18 03:12:37.782874
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '967a0316f11c'
+down_revision: str | Sequence[str] | None = '0faa7dcbdda7'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Составной индекс заменяет ix_contacts_operator_id (тот же префикс)
+    op.create_index('ix_contacts_operator_id_is_resolved', 'contacts', ['operator_id', 'is_resolved'], unique=False)
+    op.drop_index(op.f('ix_contacts_operator_id'), table_name='contacts')
+    op.create_index('ix_contacts_lead_id_created_at', 'contacts', ['lead_id', 'created_at'], unique=False)
+    op.create_index('ix_source_operator_weights_source_id_operator_id_weight', 'source_operator_weights', ['source_id', 'operator_id', 'weight'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_source_operator_weights_source_id_operator_id_weight', table_name='source_operator_weights')
+    op.drop_index('ix_contacts_lead_id_created_at', table_name='contacts')
+    op.create_index(op.f('ix_contacts_operator_id'), 'contacts', ['operator_id'], unique=False)
+    op.drop_index('ix_contacts_operator_id_is_resolved', table_name='contacts')
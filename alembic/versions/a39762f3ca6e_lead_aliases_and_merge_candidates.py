@@ -0,0 +1,62 @@
+"""lead aliases and merge candidates
+
+Revision ID: a39762f3ca6e
+Revises: 967a0316f11c
+Create Date: 2026-10-18 03:21:48.449413
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'a39762f3ca6e'
+down_revision: str | Sequence[str] | None = '967a0316f11c'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('lead_aliases',
+    sa.Column('identifier', sa.String(length=260), nullable=False),
+    sa.Column('lead_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['lead_id'], ['leads.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('identifier')
+    )
+    op.create_index(op.f('ix_lead_aliases_lead_id'), 'lead_aliases', ['lead_id'], unique=False)
+    op.create_table('lead_merge_candidates',
+    sa.Column('lead_id', sa.Integer(), nullable=False),
+    sa.Column('duplicate_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['duplicate_id'], ['leads.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['lead_id'], ['leads.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('lead_id', 'duplicate_id')
+    )
+    # batch-режим: SQLite не добавляет внешний ключ через ALTER TABLE
+    with op.batch_alter_table('leads') as batch_op:
+        batch_op.add_column(sa.Column('merged_into', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_leads_merged_into'), ['merged_into'], unique=False)
+        batch_op.create_foreign_key('fk_leads_merged_into_leads', 'leads', ['merged_into'], ['id'])
+
+    # Алиасы для существующих лидов: их собственные телефон и email
+    op.execute(
+        "INSERT INTO lead_aliases (identifier, lead_id) "
+        "SELECT 'p:' || phone, id FROM leads WHERE phone IS NOT NULL"
+    )
+    op.execute(
+        "INSERT INTO lead_aliases (identifier, lead_id) "
+        "SELECT 'e:' || email, id FROM leads WHERE email IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('leads') as batch_op:
+        batch_op.drop_constraint('fk_leads_merged_into_leads', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_leads_merged_into'))
+        batch_op.drop_column('merged_into')
+    op.drop_table('lead_merge_candidates')
+    op.drop_index(op.f('ix_lead_aliases_lead_id'), table_name='lead_aliases')
+    op.drop_table('lead_aliases')
@@ -0,0 +1,143 @@
+import asyncio
+import cProfile
+import logging
+import random
+import secrets
+import time
+from pathlib import Path
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import (
+    request_db_commits_total,
+    request_db_seconds,
+    request_db_statements,
+)
+from app.core.profiling import verify_profile_token, write_profile
+from app.core.query_stats import track_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """
+    Учет обращений к БД на HTTP-запрос.
+
+    Число запросов, коммитов и время БД пишется в метрики с меткой
+    шаблона маршрута (например /api/v1/contacts/{contact_id}/resolve).
+    С headers=True (режим debug) те же значения уходят в заголовки
+    ответа X-DB-Statements, X-DB-Commits и X-DB-Time-Ms.
+    """
+
+    def __init__(self, app: ASGIApp, headers: bool = False) -> None:
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_stats(message: Message) -> None:
+                if message["type"] == "http.response.start" and self.headers:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Statements"] = str(stats.statements)
+                    headers["X-DB-Commits"] = str(stats.commits)
+                    headers["X-DB-Time-Ms"] = f"{stats.db_time * 1000:.2f}"
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                route = scope.get("route")
+                label = route.path if route is not None else "unmatched"
+                request_db_statements.observe(stats.statements, label)
+                request_db_seconds.observe(stats.db_time, label)
+                if stats.commits:
+                    request_db_commits_total.inc(label, amount=stats.commits)
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование отдельных запросов через cProfile.
+
+    Запрос профилируется, если в нем есть действительный подписанный
+    заголовок X-Profile-Token (см. crm-lead-router profile-token) или
+    он попал в случайную выборку с долей sample_rate. Профиль (.pstats
+    и текстовая сводка) пишется в directory после отправки ответа,
+    в ответ добавляется заголовок X-Profile-Id.
+
+    Одновременно профилируется один запрос: cProfile работает на весь
+    поток, поэтому в профиль попадают и конкурентные корутины цикла.
+    Middleware подключается только при PROFILING_ENABLED, выключенное
+    профилирование ничего не стоит.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        directory: str,
+        sample_rate: float = 0.0,
+        secret: str = "",
+    ) -> None:
+        self.app = app
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.secret = secret
+        self._active = False
+
+    def _requested(self, scope: Scope) -> bool:
+        """Нужно ли профилировать запрос."""
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        token = Headers(scope=scope).get("x-profile-token")
+        return token is not None and verify_profile_token(self.secret, token)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or self._active
+            or not self._requested(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.time_ns() // 1_000_000}-{secrets.token_hex(3)}"
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+            await send(message)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Уже работает другой профилировщик (например, coverage)
+            await self.app(scope, receive, send)
+            return
+
+        self._active = True
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - started
+            self._active = False
+            route = scope.get("route")
+            try:
+                await asyncio.to_thread(
+                    write_profile,
+                    profile,
+                    self.directory,
+                    profile_id,
+                    scope["method"],
+                    route.path if route is not None else scope["path"],
+                    elapsed,
+                )
+            except OSError:
+                logger.exception("Failed to write request profile")
@@ -0,0 +1,43 @@
+from typing import Any
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.api.responses import json_response, model_list_response
+from app.schemas.pagination import CursorParams
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def paginated(
+    items: list[Any],
+    page: CursorParams,
+    schema: type[BaseModel],
+    key: str = "id",
+) -> Response:
+    """
+    Оформляет страницу списка для ответа.
+
+    Если страница заполнена, в заголовок X-Next-Cursor пишется ключ
+    последней записи. Записи уже проверены сервисом, поэтому страница
+    сразу сериализуется в JSON без повторной проверки response_model.
+    Проекция (fields=) содержит не все поля схемы и отдается как есть.
+
+    Args:
+        items: Записи страницы (экземпляры схемы или словари)
+        page: Параметры пагинации
+        schema: Схема записей
+        key: Поле курсора
+
+    Returns:
+        JSON-ответ страницы
+    """
+    headers = {}
+    if items and len(items) == page.limit:
+        last = items[-1]
+        cursor = last[key] if isinstance(last, dict) else getattr(last, key)
+        headers[NEXT_CURSOR_HEADER] = str(cursor)
+
+    if getattr(page, "fields", None):
+        return json_response(items, headers=headers)
+    return model_list_response(schema, items, headers=headers)
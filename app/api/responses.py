@@ -0,0 +1,103 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from app.cache.entities import entity_cache
+from app.core.serialization import dump_list_json
+
+
+class PydanticJSONResponse(Response):
+    """JSON-ответ из байтов, уже сериализованных pydantic-core."""
+
+    media_type = "application/json"
+
+
+def model_list_response(
+    schema: type[BaseModel],
+    items: list[Any],
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+) -> PydanticJSONResponse:
+    """
+    Отдает список проверенных экземпляров схемы.
+
+    Готовый Response FastAPI не проверяет повторно по response_model
+    (она остается только для документации), а сериализацию выполняет
+    кэшированный TypeAdapter.
+
+    Args:
+        schema: Схема элементов
+        items: Экземпляры схемы (из validate_list)
+        status_code: HTTP-статус
+        headers: Дополнительные заголовки
+
+    Returns:
+        JSON-ответ
+    """
+    return PydanticJSONResponse(
+        dump_list_json(schema, items),
+        status_code=status_code,
+        headers=headers,
+    )
+
+
+def json_response(
+    content: Any, headers: dict[str, str] | None = None
+) -> PydanticJSONResponse:
+    """Отдает произвольные данные (словари, даты) через pydantic-core."""
+    return PydanticJSONResponse(to_json(content), headers=headers)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Сравнивает If-None-Match с ETag (слабое сравнение, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+async def entity_response(
+    request: Request,
+    kind: str,
+    entity_id: int,
+    load: Callable[[], Awaitable[BaseModel]],
+) -> Response:
+    """
+    Отдает сущность через кэш ответов с ETag.
+
+    При попадании в кэш и совпадении If-None-Match ответ 304
+    формируется без обращения к БД и без сериализации; при попадании
+    без совпадения отдается готовое тело. При промахе сущность читается
+    через load (он же отвечает 404) и сохраняется в кэш.
+
+    Args:
+        request: Запрос (заголовок If-None-Match)
+        kind: Тип сущности - ключ кэша и сброса в репозиториях
+        entity_id: ID сущности
+        load: Чтение проверенной схемы ответа из БД
+
+    Returns:
+        Ответ 200 с телом или 304, в обоих случаях с ETag
+    """
+    entry = entity_cache.get(kind, entity_id)
+    if entry is None:
+        version = entity_cache.version(kind, entity_id)
+        model = await load()
+        entry = entity_cache.put(
+            kind,
+            entity_id,
+            type(model).__pydantic_serializer__.to_json(model),
+            version,
+        )
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return PydanticJSONResponse(entry.body, headers=headers)
@@ -1,9 +1,22 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.responses import model_list_response
+from app.core.config import settings
 from app.core.dependencies import get_db
-from app.schemas.contact import ContactCreate, ContactResponse
-from app.services.contact_service import process_new_contact
+from app.schemas.contact import (
+    ContactBatchResult,
+    ContactCreate,
+    ContactResolveRequest,
+    ContactResponse,
+)
+from app.services.contact_service import (
+    process_contacts_batch,
+    process_new_contact,
+    resolve_contacts_bulk,
+    resolve_existing_contact,
+)
+from app.services.routing_engine import routing_engine
 
 router = APIRouter()
 
@@ -16,5 +29,49 @@ async def create_contact(
     Создать новое обращение.
 
     Автоматически находит или создает лида и назначает оператора.
+    Если включен движок маршрутизации, обращение записывается
+    групповым коммитом; ответ приходит после коммита.
     """
+    if routing_engine.running:
+        return await routing_engine.submit(contact)
     return await process_new_contact(db, contact)
+
+
+@router.post("/contacts/batch", response_model=list[ContactBatchResult])
+async def create_contacts_batch(
+    contacts: list[ContactCreate] = Body(
+        ..., min_length=1, max_length=settings.contacts_batch_max_size
+    ),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Создать пакет обращений.
+
+    Результаты (обращение или ошибка) возвращаются в порядке запроса.
+    """
+    results = await process_contacts_batch(db, contacts)
+    return model_list_response(ContactBatchResult, results)
+
+
+@router.post("/contacts/resolve", response_model=list[ContactResponse])
+async def resolve_contacts(
+    request: ContactResolveRequest, db: AsyncSession = Depends(get_db)
+):
+    """
+    Закрыть несколько обращений.
+
+    Возвращает обращения, закрытые этим запросом; отсутствующие и уже
+    закрытые пропускаются.
+    """
+    contacts = await resolve_contacts_bulk(db, request.contact_ids)
+    return model_list_response(ContactResponse, contacts)
+
+
+@router.post(
+    "/contacts/{contact_id}/resolve", response_model=ContactResponse
+)
+async def resolve_contact(
+    contact_id: int, db: AsyncSession = Depends(get_db)
+):
+    """Закрыть обращение и освободить место у оператора."""
+    return await resolve_existing_contact(db, contact_id)
@@ -1,24 +1,59 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_db
+from app.api.pagination import paginated
+from app.api.responses import entity_response
+from app.core.dependencies import get_db, get_read_db
 from app.schemas.contact import ContactResponse
-from app.schemas.lead import LeadResponse, LeadUpdate
+from app.schemas.lead import (
+    LeadIdentityCacheStats,
+    LeadMergeReport,
+    LeadMergeStatus,
+    LeadResponse,
+    LeadUpdate,
+)
+from app.schemas.pagination import PageParams
+from app.services.lead_merge_service import lead_merge_job
 from app.services.lead_service import (
     get_lead,
     get_lead_contacts,
+    get_lead_identity_cache_stats,
     update_existing_lead,
 )
 
 router = APIRouter()
 
 
+@router.get(
+    "/leads/identity-cache", response_model=LeadIdentityCacheStats
+)
+async def get_identity_cache_stats():
+    """Получить метрики кэша идентификаторов лидов."""
+    return get_lead_identity_cache_stats()
+
+
+@router.get("/leads/merge", response_model=LeadMergeStatus)
+async def get_merge_status():
+    """Получить метрики слияния дублей лидов."""
+    return lead_merge_job.status()
+
+
+@router.post("/leads/merge/run", response_model=LeadMergeReport)
+async def run_merge():
+    """Запустить проход слияния дублей лидов."""
+    return await lead_merge_job.run()
+
+
 @router.get("/leads/{lead_id}", response_model=LeadResponse)
 async def get_lead_by_id(
-    lead_id: int, db: AsyncSession = Depends(get_db)
+    lead_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Получить лида по ID."""
-    return await get_lead(db, lead_id)
+    """Получить лида по ID (ETag, If-None-Match - 304)."""
+    return await entity_response(
+        request, "lead", lead_id, lambda: get_lead(db, lead_id)
+    )
 
 
 @router.patch("/leads/{lead_id}", response_model=LeadResponse)
@@ -31,7 +66,10 @@ async def update_lead(
 
 @router.get("/leads/{lead_id}/contacts", response_model=list[ContactResponse])
 async def list_lead_contacts(
-    lead_id: int, db: AsyncSession = Depends(get_db)
+    lead_id: int,
+    page: PageParams = Query(),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Получить все обращения лида."""
-    return await get_lead_contacts(db, lead_id)
+    """Получить страницу обращений лида (курсор - в X-Next-Cursor)."""
+    contacts = await get_lead_contacts(db, lead_id, page)
+    return paginated(contacts, page, ContactResponse)
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_db
+from app.api.pagination import paginated
+from app.api.responses import entity_response
+from app.core.dependencies import get_db, get_read_db
 from app.schemas.operator import (
     OperatorCreate,
     OperatorResponse,
     OperatorUpdate,
 )
+from app.schemas.pagination import PageParams
 from app.services.operator_service import (
     create_new_operator,
     delete_existing_operator,
@@ -19,9 +22,13 @@ router = APIRouter()
 
 
 @router.get("/operators", response_model=list[OperatorResponse])
-async def list_operators(db: AsyncSession = Depends(get_db)):
-    """Получить список всех операторов."""
-    return await get_operators_list(db)
+async def list_operators(
+    page: PageParams = Query(),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Получить страницу операторов (курсор - в заголовке X-Next-Cursor)."""
+    operators = await get_operators_list(db, page)
+    return paginated(operators, page, OperatorResponse)
 
 
 @router.post("/operators", response_model=OperatorResponse, status_code=201)
@@ -34,10 +41,14 @@ async def create_operator(
 
 @router.get("/operators/{operator_id}", response_model=OperatorResponse)
 async def get_operator_by_id(
-    operator_id: int, db: AsyncSession = Depends(get_db)
+    operator_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Получить оператора по ID."""
-    return await get_operator(db, operator_id)
+    """Получить оператора по ID (ETag, If-None-Match - 304)."""
+    return await entity_response(
+        request, "operator", operator_id, lambda: get_operator(db, operator_id)
+    )
 
 
 @router.patch("/operators/{operator_id}", response_model=OperatorResponse)
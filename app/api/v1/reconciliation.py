@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+
+from app.schemas.reconciliation import (
+    ReconciliationReport,
+    ReconciliationStatus,
+)
+from app.services.reconciliation_service import reconciliation_job
+
+router = APIRouter()
+
+
+@router.get("/reconciliation", response_model=ReconciliationStatus)
+async def get_reconciliation_status():
+    """Получить метрики сверки нагрузки операторов."""
+    return reconciliation_job.status()
+
+
+@router.post("/reconciliation/run", response_model=ReconciliationReport)
+async def run_reconciliation(full: bool = False):
+    """Запустить проход сверки нагрузки (по умолчанию инкрементальный)."""
+    return await reconciliation_job.run(full=full)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.dependencies import get_read_db
+from app.schemas.routing import ROUTING_VERSION_PATTERN, RoutingState
+from app.services.routing_state_service import routing_snapshot
+
+router = APIRouter()
+
+
+@router.get("/routing/state", response_model=RoutingState)
+async def get_routing_state(
+    since: str | None = Query(
+        None,
+        pattern=ROUTING_VERSION_PATTERN,
+        description="Версия из предыдущего ответа",
+    ),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Получить операторов, веса, нагрузку и вероятности выбора по всем
+    источникам (since - версия прошлого ответа для диффа).
+
+    Некорректный since - ошибка 422; версия другого процесса или
+    слишком старая дает полный снимок.
+    """
+    return await routing_snapshot.get(db, since)
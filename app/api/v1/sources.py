@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_db
+from app.api.pagination import paginated
+from app.api.responses import entity_response
+from app.core.dependencies import get_db, get_read_db
+from app.schemas.pagination import CursorParams, PageParams
 from app.schemas.source import (
     SourceCreate,
     SourceOperatorWeightCreate,
@@ -23,9 +26,13 @@ router = APIRouter()
 
 
 @router.get("/sources", response_model=list[SourceResponse])
-async def list_sources(db: AsyncSession = Depends(get_db)):
-    """Получить список всех источников."""
-    return await get_sources_list(db)
+async def list_sources(
+    page: PageParams = Query(),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Получить страницу источников (курсор - в заголовке X-Next-Cursor)."""
+    sources = await get_sources_list(db, page)
+    return paginated(sources, page, SourceResponse)
 
 
 @router.post("/sources", response_model=SourceResponse, status_code=201)
@@ -38,10 +45,14 @@ async def create_source(
 
 @router.get("/sources/{source_id}", response_model=SourceResponse)
 async def get_source_by_id(
-    source_id: int, db: AsyncSession = Depends(get_db)
+    source_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Получить источник по ID."""
-    return await get_source(db, source_id)
+    """Получить источник по ID (ETag, If-None-Match - 304)."""
+    return await entity_response(
+        request, "source", source_id, lambda: get_source(db, source_id)
+    )
 
 
 @router.patch("/sources/{source_id}", response_model=SourceResponse)
@@ -81,7 +92,12 @@ async def set_operator_weight(
     response_model=list[SourceOperatorWeightResponse],
 )
 async def get_operator_weights(
-    source_id: int, db: AsyncSession = Depends(get_db)
+    source_id: int,
+    page: CursorParams = Query(),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Получить веса операторов для источника."""
-    return await get_source_operator_weights(db, source_id)
+    """Получить страницу весов операторов (курсор - ID оператора)."""
+    weights = await get_source_operator_weights(db, source_id, page)
+    return paginated(
+        weights, page, SourceOperatorWeightResponse, key="operator_id"
+    )
@@ -0,0 +1,21 @@
+from app.cache.identity import (
+    LeadIdentity,
+    LeadIdentityCache,
+    lead_identity_cache,
+)
+from app.cache.routing import (
+    OperatorState,
+    RoutingTable,
+    SourceRoute,
+    routing_table,
+)
+
+__all__ = [
+    "LeadIdentity",
+    "LeadIdentityCache",
+    "lead_identity_cache",
+    "OperatorState",
+    "RoutingTable",
+    "SourceRoute",
+    "routing_table",
+]
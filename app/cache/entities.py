@@ -0,0 +1,149 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache.staging import after_commit
+from app.core.config import settings
+from app.core.metrics import register_cache
+
+# Ключ записи: (тип сущности, ID)
+EntityKey = tuple[str, int]
+
+
+@dataclass(slots=True, frozen=True)
+class CachedEntity:
+    """
+    Сериализованная сущность.
+
+    Attributes:
+        etag: Сильный ETag - хэш тела ответа
+        body: JSON тела ответа
+        expires_at: Момент устаревания (time.monotonic)
+    """
+
+    etag: str
+    body: bytes
+    expires_at: float
+
+
+class EntityCache:
+    """
+    LRU-кэш ответов GET /{entity}/{id}: готовое JSON-тело и ETag.
+
+    Запись сбрасывается функциями репозиториев, меняющими строку
+    (сразу и еще раз после коммита), и устаревает через ttl_s, чтобы
+    изменения из других процессов были видны не позже этого срока.
+
+    Чтобы ответ, прочитанный из БД до сброса, не попал в кэш после
+    него, у каждого ключа есть счетчик сбросов: put сохраняет запись,
+    только если счетчик не изменился с момента version(). Когда
+    счетчиков становится больше max_size, они очищаются со сменой
+    эпохи - незавершенные чтения тогда просто не попадут в кэш.
+    """
+
+    def __init__(
+        self, max_size: int, ttl_s: float, enabled: bool = True
+    ) -> None:
+        self.enabled = enabled
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[EntityKey, CachedEntity] = OrderedDict()
+        self._invalidations: dict[EntityKey, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, kind: str, entity_id: int) -> CachedEntity | None:
+        """Возвращает действующую запись или None."""
+        if not self.enabled:
+            return None
+        key = (kind, entity_id)
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def version(self, kind: str, entity_id: int) -> tuple[int, int]:
+        """Эпоха и счетчик сбросов ключа (снимается перед чтением из БД)."""
+        return self._epoch, self._invalidations.get((kind, entity_id), 0)
+
+    def put(
+        self,
+        kind: str,
+        entity_id: int,
+        body: bytes,
+        version: tuple[int, int],
+    ) -> CachedEntity:
+        """
+        Сохраняет тело ответа, если ключ не сбрасывался после version().
+
+        Returns:
+            Запись с ETag (даже если в кэш она не попала)
+        """
+        entry = CachedEntity(
+            etag=f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"',
+            body=body,
+            expires_at=time.monotonic() + self.ttl_s,
+        )
+        key = (kind, entity_id)
+        if self.enabled and self.version(kind, entity_id) == version:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, kind: str, entity_id: int) -> None:
+        """Сбрасывает запись сущности."""
+        key = (kind, entity_id)
+        self._entries.pop(key, None)
+        if len(self._invalidations) >= self.max_size:
+            self._invalidations.clear()
+            self._epoch += 1
+        self._invalidations[key] = self._invalidations.get(key, 0) + 1
+
+    def stage_invalidate(
+        self, db: AsyncSession, kind: str, *entity_ids: int
+    ) -> None:
+        """
+        Сбрасывает записи сущностей сейчас и после коммита сессии.
+
+        Второй сброс убирает ответ, прочитанный другим запросом между
+        изменением строки и коммитом.
+        """
+        if not self.enabled:
+            return
+
+        def invalidate() -> None:
+            for entity_id in entity_ids:
+                self.invalidate(kind, entity_id)
+
+        invalidate()
+        after_commit(db, invalidate)
+
+    def clear(self) -> None:
+        """Очищает кэш и счетчики."""
+        self._entries.clear()
+        self._invalidations.clear()
+        self._epoch += 1
+        self.hits = self.misses = 0
+
+
+# Кэш процесса
+entity_cache = EntityCache(
+    max_size=settings.entity_cache_size,
+    ttl_s=settings.entity_cache_ttl_s,
+    enabled=settings.entity_cache_enabled,
+)
+register_cache("entities", lambda: (entity_cache.hits, entity_cache.misses))
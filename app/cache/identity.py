@@ -0,0 +1,215 @@
+import sys
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache.staging import after_commit
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.core.metrics import register_cache
+from app.models.lead import LeadAlias
+
+# Ключи кэша совпадают с ключами таблицы алиасов
+_keys = LeadAlias.keys_for
+
+
+@dataclass(slots=True, eq=False)
+class LeadIdentity:
+    """
+    Закэшированный лид.
+
+    Один объект разделяют ключи телефона и email лида.
+
+    Attributes:
+        lead_id: ID лида
+        name: Последнее известное имя
+    """
+
+    lead_id: int
+    name: str | None
+
+
+class LeadIdentityCache:
+    """
+    LRU-кэш идентификаторов лидов (телефон/email -> ID) с фильтром Блума.
+
+    Ключи совпадают с ключами таблицы lead_aliases, поэтому кэш и БД
+    одинаково определяют "того же" лида.
+
+    Фильтр Блума содержит все известные алиасы (после прогрева
+    при старте). Ответ "точно нет" позволяет пропустить поиск в БД для
+    нового клиента; если лида все же создали в другом процессе, вставка
+    упрется в уникальный индекс и вызывающий код перечитает лида.
+
+    Записи для новых лидов применяются только после коммита сессии,
+    чтобы кэш не ссылался на откаченных лидов.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        bloom_capacity: int,
+        bloom_error_rate: float = 0.01,
+        enabled: bool = True,
+    ) -> None:
+        self.enabled = enabled
+        self.max_size = max_size
+        self._entries: OrderedDict[str, LeadIdentity] = OrderedDict()
+        self._key_bytes = 0
+        self.bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+        # До прогрева отрицательный ответ фильтра ничего не значит
+        self.bloom_ready = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.negative_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, key: str) -> LeadIdentity | None:
+        identity = self._entries.get(key)
+        if identity is not None:
+            self._entries.move_to_end(key)
+        return identity
+
+    def _known(self, key: str) -> bool:
+        """Может ли идентификатор быть в БД."""
+        return not self.bloom_ready or key in self.bloom
+
+    def find(
+        self, phone: str | None = None, email: str | None = None
+    ) -> LeadIdentity | None:
+        """
+        Ищет лида в кэше по телефону и email.
+
+        Если переданы оба идентификатора, запись используется, только
+        когда оба указывают на одного лида: иначе связь идентификаторов
+        (новый алиас или кандидат на слияние) проверяется в БД.
+        """
+        if not self.enabled:
+            return None
+
+        identities = [self._get(key) for key in _keys(phone, email)]
+        identity = identities[0] if identities else None
+        if any(other is not identity for other in identities[1:]):
+            identity = None
+
+        if identity is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return identity
+
+    def may_exist(
+        self, phone: str | None = None, email: str | None = None
+    ) -> bool:
+        """
+        Может ли лид с таким телефоном или email уже существовать.
+
+        False - идентификаторы точно новые, поиск в БД можно пропустить.
+        """
+        if not self.enabled:
+            return True
+
+        if any(self._known(key) for key in _keys(phone, email)):
+            return True
+
+        self.negative_hits += 1
+        return False
+
+    def put(
+        self,
+        lead_id: int,
+        phone: str | None,
+        email: str | None,
+        name: str | None,
+    ) -> None:
+        """Запоминает лида по его телефону и email."""
+        if not self.enabled:
+            return
+
+        identity = LeadIdentity(lead_id, name)
+        for key in _keys(phone, email):
+            self.bloom.add(key)
+            if key not in self._entries:
+                self._key_bytes += sys.getsizeof(key)
+            self._entries[key] = identity
+            self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            key, _ = self._entries.popitem(last=False)
+            self._key_bytes -= sys.getsizeof(key)
+            self.evictions += 1
+
+    def add_known_keys(self, keys: Iterable[str]) -> None:
+        """Добавляет ключи алиасов только в фильтр Блума, без записи LRU."""
+        if self.enabled:
+            for key in keys:
+                self.bloom.add(key)
+
+    def forget(self, phone: str | None, email: str | None) -> None:
+        """Удаляет идентификаторы из кэша (фильтр Блума не меняется)."""
+        self.forget_keys(_keys(phone, email))
+
+    def forget_keys(self, keys: Iterable[str]) -> None:
+        """Удаляет ключи алиасов из кэша."""
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                self._key_bytes -= sys.getsizeof(key)
+
+    def stage(self, db: AsyncSession, change: Callable[[], None]) -> None:
+        """Откладывает изменение кэша до коммита сессии."""
+        if self.enabled:
+            after_commit(db, change)
+
+    def stage_put(
+        self,
+        db: AsyncSession,
+        lead_id: int,
+        phone: str | None,
+        email: str | None,
+        name: str | None,
+    ) -> None:
+        """Запоминает лида после коммита сессии."""
+        self.stage(db, lambda: self.put(lead_id, phone, email, name))
+
+    @property
+    def memory_bytes(self) -> int:
+        """Оценка памяти: словарь, ключи, записи и фильтр Блума."""
+        identity_size = sys.getsizeof(LeadIdentity(0, None))
+        return (
+            sys.getsizeof(self._entries)
+            + self._key_bytes
+            + len(self._entries) * identity_size
+            + self.bloom.size_bytes
+        )
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля попаданий среди поисков."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        """Очищает кэш, фильтр и счетчики."""
+        self._entries.clear()
+        self._key_bytes = 0
+        self.bloom.clear()
+        self.bloom_ready = False
+        self.hits = self.misses = self.evictions = self.negative_hits = 0
+
+
+# Кэш процесса
+lead_identity_cache = LeadIdentityCache(
+    max_size=settings.lead_cache_size,
+    bloom_capacity=settings.lead_bloom_capacity,
+    bloom_error_rate=settings.lead_bloom_error_rate,
+    enabled=settings.lead_cache_enabled,
+)
+register_cache(
+    "lead_identity",
+    lambda: (lead_identity_cache.hits, lead_identity_cache.misses),
+)
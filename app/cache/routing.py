@@ -0,0 +1,375 @@
+import secrets
+import time
+from dataclasses import dataclass, field
+
+from app.core.metrics import register_cache
+from app.core.sampler import WeightedSampler
+
+
+class VersionClock:
+    """
+    Монотонный счетчик версий состояния маршрутизации.
+
+    Версии сравнимы только внутри процесса, поэтому у счетчика есть
+    случайный идентификатор экземпляра.
+    """
+
+    __slots__ = ("instance", "value")
+
+    def __init__(self) -> None:
+        self.instance = secrets.token_hex(4)
+        self.value = 0
+
+    def tick(self) -> int:
+        """Выдает следующую версию."""
+        self.value += 1
+        return self.value
+
+
+# Версии маршрутов и нагрузки операторов для диффов снимка состояния
+versions = VersionClock()
+
+
+@dataclass(slots=True, eq=False)
+class OperatorState:
+    """
+    Состояние оператора в таблице маршрутизации.
+
+    current_load - подсказка для выбора кандидатов. Источником истины
+    остается условный UPDATE при резервировании места.
+
+    Attributes:
+        operator_id: ID оператора
+        max_load: Лимит одновременных обращений
+        current_load: Последняя известная нагрузка
+        slots: Позиции оператора в выборках маршрутов (route, index)
+        version: Версия последнего изменения нагрузки или лимита
+    """
+
+    operator_id: int
+    max_load: int
+    current_load: int
+    slots: list[tuple["SourceRoute", int]] = field(
+        default_factory=list, repr=False
+    )
+    version: int = field(default_factory=versions.tick)
+
+    @property
+    def has_capacity(self) -> bool:
+        """Есть ли у оператора свободное место по последним данным."""
+        return self.current_load < self.max_load
+
+    def set_load(self, current_load: int) -> None:
+        """
+        Обновляет известную нагрузку.
+
+        Если оператор заполнился или освободился, его вес в выборках
+        всех маршрутов меняется за O(log n).
+        """
+        current_load = max(current_load, 0)
+        if current_load == self.current_load:
+            return
+        had_capacity = self.has_capacity
+        self.current_load = current_load
+        self.version = versions.tick()
+        if self.has_capacity != had_capacity:
+            for route, index in self.slots:
+                route.sync_weight(index)
+
+    def mark_full(self) -> None:
+        """Помечает оператора заполненным до следующего обновления."""
+        self.set_load(max(self.current_load, self.max_load))
+
+    def set_max_load(self, max_load: int) -> None:
+        """Обновляет лимит нагрузки."""
+        if max_load != self.max_load:
+            self.max_load = max_load
+            self.version = versions.tick()
+            for route, index in self.slots:
+                route.sync_weight(index)
+
+
+@dataclass(slots=True, eq=False)
+class SourceRoute:
+    """
+    Маршрут источника: активные операторы с весами.
+
+    Выборка хранит эффективные веса: у операторов без свободного места
+    вес нулевой. Если все настроенные веса нулевые, операторы со
+    свободным местом выбираются равновероятно.
+
+    Attributes:
+        source_id: ID источника
+        candidates: Список кортежей (OperatorState, weight)
+        sampler: Взвешенная выборка по индексам candidates
+        version: Версия построения маршрута
+        uniform: Все настроенные веса нулевые
+        loads_read_at: Когда нагрузка кандидатов читалась из БД
+            (time.monotonic)
+    """
+
+    source_id: int
+    candidates: list[tuple[OperatorState, int]]
+    sampler: WeightedSampler = field(init=False, repr=False)
+    version: int = field(init=False, default=0)
+    uniform: bool = field(init=False, default=False)
+    loads_read_at: float = field(init=False, default=0.0)
+
+    def __post_init__(self) -> None:
+        self.version = versions.tick()
+        self.loads_read_at = time.monotonic()
+        self.uniform = not any(weight for _, weight in self.candidates)
+        self.sampler = WeightedSampler(
+            [
+                self.base_weight(weight) if state.has_capacity else 0
+                for state, weight in self.candidates
+            ]
+        )
+        for index, (state, _) in enumerate(self.candidates):
+            state.slots.append((self, index))
+
+    def base_weight(self, weight: int) -> int:
+        """Вес кандидата в выборке при наличии свободного места."""
+        return 1 if self.uniform else weight
+
+    def sync_weight(self, index: int) -> None:
+        """Пересчитывает эффективный вес кандидата."""
+        state, weight = self.candidates[index]
+        self.sampler.update(
+            index, self.base_weight(weight) if state.has_capacity else 0
+        )
+
+    def detach(self) -> None:
+        """Отвязывает маршрут от состояний операторов."""
+        for state, _ in self.candidates:
+            state.slots = [
+                (route, index)
+                for route, index in state.slots
+                if route is not self
+            ]
+
+
+class RoutingTable:
+    """
+    Процессный кэш маршрутов source_id -> операторы с весами.
+
+    Веса меняются редко, поэтому маршрут читается из БД один раз и
+    сбрасывается при изменении весов, операторов или источников.
+    Нагрузка операторов обновляется на месте при ее изменении.
+
+    Каждый сброс увеличивает поколение таблицы: маршрут, прочитанный
+    из БД до сброса, не сохраняется, чтобы не закэшировать устаревшие
+    данные.
+
+    Таблица полна, если после publish() в ней есть маршруты всех
+    источников и с тех пор ничего не сбрасывалось. Удаленные из
+    списка источники запоминаются с версией удаления для диффов
+    снимка состояния; диффы старше horizon невозможны.
+    """
+
+    # Сколько удалений источников помнить для диффов
+    MAX_REMOVED = 1000
+
+    def __init__(self) -> None:
+        self._routes: dict[int, SourceRoute] = {}
+        self._operators: dict[int, OperatorState] = {}
+        self._generation = 0
+        self._complete = False
+        self._listed: set[int] = set()
+        self._removed: dict[int, int] = {}
+        self._horizon = versions.value
+        # Счетчики поиска маршрутов, не сбрасываются при очистке
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        """Текущее поколение таблицы."""
+        return self._generation
+
+    @property
+    def complete(self) -> bool:
+        """Есть ли в таблице маршруты всех источников."""
+        return self._complete
+
+    @property
+    def horizon(self) -> int:
+        """Минимальная версия, от которой возможен дифф."""
+        return self._horizon
+
+    @property
+    def operator_ids(self) -> list[int]:
+        """ID операторов, участвующих в маршрутах."""
+        return list(self._operators)
+
+    def routes(self) -> list[SourceRoute]:
+        """Закэшированные маршруты, упорядоченные по ID источника."""
+        return [self._routes[key] for key in sorted(self._routes)]
+
+    def has_route(self, source_id: int) -> bool:
+        """Есть ли маршрут источника (без учета в hits/misses)."""
+        return source_id in self._routes
+
+    def publish(self, source_ids: set[int], generation: int) -> bool:
+        """
+        Фиксирует полный список источников.
+
+        Маршруты всех source_ids должны быть сохранены с тем же
+        поколением. Источники, пропавшие из списка, считаются
+        удаленными.
+
+        Returns:
+            True, если таблица стала полной
+        """
+        if generation != self._generation:
+            return False
+
+        for source_id in self._listed - source_ids:
+            if len(self._removed) >= self.MAX_REMOVED:
+                self._removed.clear()
+                self._horizon = versions.value
+            self._removed[source_id] = versions.tick()
+            route = self._routes.pop(source_id, None)
+            if route is not None:
+                route.detach()
+        for source_id in source_ids:
+            self._removed.pop(source_id, None)
+        self._listed = set(source_ids)
+        self._complete = True
+        return True
+
+    def removed_since(self, version: int) -> list[int]:
+        """ID источников, удаленных после версии version."""
+        return sorted(
+            source_id
+            for source_id, removed_at in self._removed.items()
+            if removed_at > version
+        )
+
+    def get(self, source_id: int) -> SourceRoute | None:
+        """Возвращает закэшированный маршрут источника."""
+        route = self._routes.get(source_id)
+        if route is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return route
+
+    def store(
+        self,
+        source_id: int,
+        rows: list[tuple[int, int, int, int]],
+        generation: int,
+    ) -> SourceRoute:
+        """
+        Строит маршрут и сохраняет его, если с момента чтения из БД
+        таблица не сбрасывалась.
+
+        Args:
+            source_id: ID источника
+            rows: Кортежи (operator_id, max_load, current_load, weight)
+            generation: Поколение таблицы на момент чтения rows
+
+        Returns:
+            Построенный маршрут
+        """
+        if generation != self._generation:
+            return build_route(source_id, rows)
+
+        candidates = []
+        for operator_id, max_load, current_load, weight in rows:
+            state = self._operators.get(operator_id)
+            if state is None:
+                state = OperatorState(operator_id, max_load, current_load)
+                self._operators[operator_id] = state
+            else:
+                state.set_max_load(max_load)
+                state.set_load(current_load)
+            candidates.append((state, weight))
+
+        previous = self._routes.get(source_id)
+        if previous is not None:
+            previous.detach()
+
+        route = SourceRoute(source_id, candidates)
+        self._routes[source_id] = route
+        return route
+
+    def invalidate_source(self, source_id: int) -> None:
+        """Сбрасывает маршрут источника."""
+        self._generation += 1
+        self._complete = False
+        route = self._routes.pop(source_id, None)
+        if route is not None:
+            route.detach()
+
+    def invalidate_operator(self, operator_id: int) -> None:
+        """
+        Сбрасывает все маршруты, в которых участвует оператор.
+
+        Неактивного оператора нет в маршрутах, поэтому неизвестно, какие
+        источники на него ссылаются: после его изменения (например,
+        активации) сбрасываются все маршруты.
+        """
+        self._generation += 1
+        self._complete = False
+        state = self._operators.pop(operator_id, None)
+        if state is None:
+            for route in self._routes.values():
+                route.detach()
+            self._routes.clear()
+            return
+
+        for route, _ in list(state.slots):
+            if self._routes.get(route.source_id) is route:
+                del self._routes[route.source_id]
+            route.detach()
+
+    def set_load(self, operator_id: int, current_load: int) -> None:
+        """Обновляет известную нагрузку оператора."""
+        state = self._operators.get(operator_id)
+        if state is not None:
+            state.set_load(current_load)
+
+    def adjust_load(self, operator_id: int, delta: int) -> None:
+        """Изменяет известную нагрузку оператора на delta."""
+        state = self._operators.get(operator_id)
+        if state is not None:
+            state.set_load(state.current_load + delta)
+
+    def mark_full(self, operator_id: int) -> None:
+        """Помечает оператора заполненным до следующего обновления."""
+        state = self._operators.get(operator_id)
+        if state is not None:
+            state.mark_full()
+
+    def clear(self) -> None:
+        """Полностью очищает таблицу."""
+        self._generation += 1
+        for route in self._routes.values():
+            route.detach()
+        self._routes.clear()
+        self._operators.clear()
+        self._complete = False
+        self._listed.clear()
+        self._removed.clear()
+        self._horizon = versions.value
+
+
+def build_route(
+    source_id: int, rows: list[tuple[int, int, int, int]]
+) -> SourceRoute:
+    """Строит маршрут без сохранения в таблицу."""
+    return SourceRoute(
+        source_id,
+        [
+            (OperatorState(operator_id, max_load, current_load), weight)
+            for operator_id, max_load, current_load, weight in rows
+        ],
+    )
+
+
+routing_table = RoutingTable()
+register_cache(
+    "routing", lambda: (routing_table.hits, routing_table.misses)
+)
@@ -0,0 +1,29 @@
+from collections.abc import Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Ключ session.info для изменений, которые применяются после коммита
+_STAGED_KEY = "cache_staged"
+
+
+def after_commit(db: AsyncSession, change: Callable[[], None]) -> None:
+    """
+    Откладывает изменение кэша процесса до коммита сессии.
+
+    После отката изменения отбрасываются, поэтому кэш не ссылается
+    на неподтвержденные данные.
+    """
+    db.sync_session.info.setdefault(_STAGED_KEY, []).append(change)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_staged(session: Session) -> None:
+    for change in session.info.pop(_STAGED_KEY, ()):
+        change()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_staged(session: Session) -> None:
+    session.info.pop(_STAGED_KEY, None)
@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.database import async_session_maker, close_database
+from app.core.profiling import sign_profile_token
+from app.services.import_service import ImportStats, import_contacts
+
+
+def _positive_int(value: str) -> int:
+    """Тип аргумента: положительное целое."""
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError("ожидается положительное число")
+    return number
+
+
+def _read_lines(path: str) -> Iterator[str]:
+    """Потоково читает строки файла или stdin ("-")."""
+    if path == "-":
+        yield from sys.stdin
+        return
+
+    with Path(path).open(encoding="utf-8") as file:
+        yield from file
+
+
+def _print_progress(stats: ImportStats) -> None:
+    """Печатает прогресс импорта в stderr."""
+    print(
+        f"строк: {stats.rows}, импортировано: {stats.imported}, "
+        f"ошибок: {stats.errors}, {stats.rate:.0f} строк/с",
+        file=sys.stderr,
+    )
+
+
+async def _import_contacts_command(args: argparse.Namespace) -> int:
+    """Команда import-contacts."""
+    try:
+        stats = await import_contacts(
+            async_session_maker,
+            _read_lines(args.path),
+            chunk_size=args.chunk_size,
+            route=not args.no_routing,
+            on_progress=_print_progress,
+        )
+    finally:
+        await close_database()
+
+    print(
+        f"Готово за {stats.elapsed:.1f} с: импортировано {stats.imported} "
+        f"из {stats.rows}, новых лидов {stats.leads_created}, "
+        f"распределено {stats.routed}, ошибок {stats.errors}",
+        file=sys.stderr,
+    )
+    for sample in stats.error_samples:
+        print(f"  {sample}", file=sys.stderr)
+    return 1 if stats.errors else 0
+
+
+async def _profile_token_command(args: argparse.Namespace) -> int:
+    """Команда profile-token."""
+    if not settings.profiling_secret:
+        print("PROFILING_SECRET не задан", file=sys.stderr)
+        return 1
+
+    print(
+        sign_profile_token(
+            settings.profiling_secret, int(time.time()) + args.ttl
+        )
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Создает парсер аргументов командной строки."""
+    parser = argparse.ArgumentParser(prog="crm-lead-router")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser(
+        "import-contacts",
+        help="Импорт исторических обращений из NDJSON",
+    )
+    import_parser.add_argument(
+        "path", help="Путь к файлу NDJSON или - для stdin"
+    )
+    import_parser.add_argument(
+        "--chunk-size",
+        type=_positive_int,
+        default=5000,
+        help="Строк в одной транзакции (по умолчанию 5000)",
+    )
+    import_parser.add_argument(
+        "--no-routing",
+        action="store_true",
+        help="Не распределять открытые обращения без оператора",
+    )
+    import_parser.set_defaults(handler=_import_contacts_command)
+
+    token_parser = commands.add_parser(
+        "profile-token",
+        help="Токен заголовка X-Profile-Token для профилирования запроса",
+    )
+    token_parser.add_argument(
+        "--ttl",
+        type=_positive_int,
+        default=300,
+        help="Срок действия в секундах (по умолчанию 300)",
+    )
+    token_parser.set_defaults(handler=_profile_token_command)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Точка входа CLI."""
+    args = build_parser().parse_args(argv)
+    return asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Фильтр Блума для строк.
+
+    Отвечает "точно нет" или "возможно есть": ложноположительные ответы
+    случаются с заданной вероятностью, ложноотрицательных нет, пока в
+    фильтр добавлены все значения. Удаление не поддерживается.
+
+    Позиции битов получаются двойным хешированием одного blake2b.
+    """
+
+    __slots__ = ("_bits", "_size", "_hashes", "count")
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        if capacity <= 0:
+            raise ValueError("Емкость должна быть положительной")
+        if not 0 < error_rate < 1:
+            raise ValueError("Вероятность ошибки должна быть в (0, 1)")
+
+        self._size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        self.count = 0
+
+    @property
+    def size_bytes(self) -> int:
+        """Размер битового массива в байтах."""
+        return len(self._bits)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self._hashes):
+            yield (first + i * second) % self._size
+
+    def add(self, value: str) -> None:
+        """Добавляет значение."""
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+    def clear(self) -> None:
+        """Очищает фильтр."""
+        self._bits = bytearray(len(self._bits))
+        self.count = 0
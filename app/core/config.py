@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,6 +10,83 @@ class Settings(BaseSettings):
     debug: bool = False
     database_url: str = "sqlite+aiosqlite:///./crm_lead_router.db"
 
+    # Пул подключений (для SQLite не используется)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # Кэш подготовленных запросов asyncpg (0 - для pgbouncer)
+    db_statement_cache_size: int = 100
+
+    # Профиль SQLite, применяется к каждому новому подключению
+    sqlite_journal_mode: Literal[
+        "WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"
+    ] = "WAL"
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    # Отрицательное значение - размер в КиБ, положительное - в страницах
+    sqlite_cache_size: int = -64000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_temp_store: Literal["DEFAULT", "FILE", "MEMORY"] = "MEMORY"
+    # Отдельный пул только для чтения для GET endpoints
+    sqlite_read_pool_enabled: bool = False
+
+    # Кэшировать маршруты источник -> операторы в памяти процесса
+    routing_cache_enabled: bool = True
+    # Как часто выбор оператора перечитывает нагрузку кандидатов
+    # маршрута (освобождения в других процессах)
+    routing_load_refresh_s: float = 1.0
+    # Как часто GET /routing/state перечитывает нагрузку операторов
+    routing_state_refresh_s: float = 1.0
+
+    # Максимальный размер пакета в POST /contacts/batch
+    contacts_batch_max_size: int = 1000
+
+    # Движок маршрутизации: один писатель и групповой коммит POST /contacts
+    routing_engine_enabled: bool = False
+    routing_engine_flush_ms: int = 2
+    routing_engine_max_batch: int = 200
+
+    # Фоновая сверка current_load с открытыми обращениями
+    reconciliation_enabled: bool = False
+    reconciliation_interval_s: float = 60.0
+    reconciliation_batch_size: int = 500
+    # Каждый N-й проход - полный, остальные инкрементальные
+    reconciliation_full_every: int = 60
+
+    # Кэш идентификаторов лидов (телефон/email -> ID) и фильтр Блума
+    lead_cache_enabled: bool = True
+    lead_cache_size: int = 100_000
+    lead_bloom_capacity: int = 1_000_000
+    lead_bloom_error_rate: float = 0.01
+
+    # Фоновое слияние дублей лидов (алиасы телефон/email)
+    lead_merge_enabled: bool = False
+    lead_merge_interval_s: float = 300.0
+    lead_merge_batch_size: int = 1000
+
+    # Кэш ответов GET /operators|sources|leads/{id} с ETag
+    entity_cache_enabled: bool = True
+    entity_cache_size: int = 10_000
+    entity_cache_ttl_s: float = 30.0
+
+    # Сброс кэшей процессов через журнал в БД (uvicorn --workers N)
+    cache_sync_enabled: bool = False
+    cache_sync_interval_ms: int = 200
+    cache_sync_batch_size: int = 500
+    cache_sync_retention_s: float = 3600.0
+
+    # Профилирование запросов (cProfile): по подписанному заголовку
+    # X-Profile-Token и/или случайной доле запросов
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0
+    profiling_secret: str = ""
+    profiling_dir: str = "profiles"
+
+    # Размер страницы списков (keyset-пагинация по after_id)
+    page_size_default: int = 100
+    page_size_max: int = 1000
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -1,19 +1,155 @@
 from collections.abc import AsyncGenerator
+from time import perf_counter
 
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.metrics import db_pool_checkout_seconds
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    future=True,
-)
 
+def is_sqlite(database_url: str) -> bool:
+    """Проверяет что URL указывает на SQLite."""
+    return make_url(database_url).get_backend_name() == "sqlite"
+
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False) -> None:
+    """
+    Применяет профиль SQLite из настроек к подключению.
+
+    WAL позволяет читателям не блокировать писателя, synchronous=NORMAL
+    в WAL убирает fsync на каждый коммит, busy_timeout заставляет ждать
+    блокировку вместо ошибки "database is locked".
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms}")
+    cursor.execute(f"PRAGMA cache_size = {settings.sqlite_cache_size}")
+    cursor.execute(f"PRAGMA mmap_size = {settings.sqlite_mmap_size}")
+    cursor.execute(f"PRAGMA temp_store = {settings.sqlite_temp_store}")
+    if read_only:
+        cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+
+def is_lock_timeout(exc: DBAPIError) -> bool:
+    """
+    Вызвана ли ошибка ожиданием блокировки.
+
+    SQLite сообщает "database is locked" после busy_timeout,
+    PostgreSQL - SQLSTATE 55P03 (lock_timeout).
+    """
+    if "database is locked" in str(exc.orig):
+        return True
+    sqlstate = getattr(exc.orig, "sqlstate", None) or getattr(
+        exc.orig, "pgcode", None
+    )
+    return sqlstate == "55P03"
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул подключений, замеряющий ожидание свободного подключения.
+
+    Замеряется публичный Pool.connect(), через который engine получает
+    каждое подключение: ожидание в очереди и открытие нового.
+    """
+
+    def connect(self):
+        started = perf_counter()
+        try:
+            return super().connect()
+        finally:
+            db_pool_checkout_seconds.observe(perf_counter() - started)
+
+
+def is_memory_database(database_url: str) -> bool:
+    """Проверяет что URL указывает на SQLite в памяти."""
+    return make_url(database_url).database in (None, "", ":memory:")
+
+
+def pool_options(database_url: str) -> dict:
+    """Настройки пула подключений для серверных БД."""
+    options = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if make_url(database_url).get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": (
+                settings.db_statement_cache_size
+            ),
+        }
+    return options
+
+
+def create_database_engine(
+    database_url: str, read_only: bool = False
+) -> AsyncEngine:
+    """
+    Создает async engine.
+
+    Для SQLite на каждое подключение применяется профиль из настроек,
+    для остальных БД (PostgreSQL/asyncpg) - настройки пула. Ожидание
+    подключения из пула попадает в метрику db_pool_checkout_seconds
+    (кроме SQLite в памяти с единственным подключением).
+
+    Args:
+        database_url: URL базы данных
+        read_only: Запретить запись через подключения этого engine
+    """
+    engine_options = (
+        {} if is_sqlite(database_url) else pool_options(database_url)
+    )
+    if not (is_sqlite(database_url) and is_memory_database(database_url)):
+        engine_options["poolclass"] = TimedQueuePool
+    database_engine = create_async_engine(
+        database_url,
+        echo=settings.debug,
+        future=True,
+        **engine_options,
+    )
+
+    if is_sqlite(database_url):
+
+        @event.listens_for(database_engine.sync_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record) -> None:
+            apply_sqlite_pragmas(dbapi_connection, read_only=read_only)
+
+    return database_engine
+
+
+def create_read_engine(
+    database_url: str, write_engine: AsyncEngine
+) -> AsyncEngine:
+    """
+    Создает engine только для чтения, если включен пул чтения SQLite.
+
+    Иначе, а также для SQLite в памяти (каждое подключение открывает
+    свою пустую базу) возвращает write_engine.
+    """
+    if (
+        settings.sqlite_read_pool_enabled
+        and is_sqlite(database_url)
+        and not is_memory_database(database_url)
+    ):
+        return create_database_engine(database_url, read_only=True)
+    return write_engine
+
+
+engine = create_database_engine(settings.database_url)
 
 async_session_maker = async_sessionmaker(
     engine,
@@ -21,6 +157,15 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Пул только для чтения: читатели не занимают подключения писателя
+read_engine = create_read_engine(settings.database_url, engine)
+
+read_session_maker = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession]:
     """
@@ -30,13 +175,29 @@ async def get_db() -> AsyncGenerator[AsyncSession]:
         yield session
 
 
+async def get_read_db() -> AsyncGenerator[AsyncSession]:
+    """
+    Dependency для сессии только для чтения.
+
+    Если отдельный пул чтения выключен, используется основной.
+    """
+    async with read_session_maker() as session:
+        yield session
+
+
 async def init_database() -> None:
     """
     Инициализация базы данных при старте приложения.
+
+    Открывает первое подключение, чтобы профиль SQLite (в том числе
+    переключение в WAL) применился до начала нагрузки.
     """
-    pass
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
 
 
 async def close_database() -> None:
     """Закрытие соединений с БД при остановке приложения."""
     await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
@@ -1,3 +1,3 @@
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 
-__all__ = ["get_db"]
+__all__ = ["get_db", "get_read_db"]
@@ -0,0 +1,367 @@
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from time import perf_counter
+
+# Границы корзин задержек, секунды
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+# Значения метки -> значение метрики
+Samples = dict[tuple[str, ...], float]
+
+
+def _escape(value: str) -> str:
+    """Экранирует значение метки для текстового формата."""
+    return (
+        value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    """Форматирует набор меток вида {a="1",b="2"}."""
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"'
+        for name, value in zip(names, values, strict=True)
+    )
+    return f"{{{pairs}}}"
+
+
+def _number(value: float) -> str:
+    """Форматирует число без лишней дробной части."""
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Metric:
+    """
+    Базовая метрика с именем, описанием и именами меток.
+
+    Метрики регистрируются в реестре при создании и отдаются
+    в текстовом формате Prometheus (version 0.0.4).
+    """
+
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        registry: "MetricsRegistry | None" = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def samples(self) -> Iterator[str]:
+        """Строки значений метрики."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Метрика целиком: HELP, TYPE и значения."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Монотонный счетчик с метками."""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Samples = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Увеличивает счетчик для набора значений меток."""
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Текущее значение для набора значений меток."""
+        return self._values.get(labels, 0)
+
+    def clear(self) -> None:
+        """Сбрасывает значения (для тестов)."""
+        self._values.clear()
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self._values.items():
+            yield (
+                f"{self.name}{_labels(self.labelnames, labels)} "
+                f"{_number(value)}"
+            )
+
+
+class CallbackMetric(Metric):
+    """
+    Метрика, значения которой вычисляются при чтении.
+
+    Подходит для счетчиков, которые уже ведут другие объекты
+    (например, попадания кэшей): на горячем пути ничего не пишется.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], float | Samples],
+        kind: str = "gauge",
+        labelnames: Iterable[str] = (),
+        registry: "MetricsRegistry | None" = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames, registry)
+        self.kind = kind
+        self._callback = callback
+
+    def samples(self) -> Iterator[str]:
+        values = self._callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in values.items():
+            yield (
+                f"{self.name}{_labels(self.labelnames, labels)} "
+                f"{_number(value)}"
+            )
+
+
+class _HistogramChild:
+    """Гистограмма одного набора значений меток."""
+
+    __slots__ = ("_bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self._bounds = bounds
+        # Последняя корзина - значения больше всех границ (+Inf)
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Учитывает наблюдение: поиск корзины и два сложения."""
+        self.counts[bisect_left(self._bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        """Число наблюдений."""
+        return sum(self.counts)
+
+
+class Histogram(Metric):
+    """
+    Гистограмма с метками.
+
+    Наблюдения хранятся по корзинам без накопления, накопленные
+    значения _bucket считаются только при чтении.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        registry: "MetricsRegistry | None" = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        self._children: dict[tuple[str, ...], _HistogramChild] = {}
+
+    def labels(self, *values: str) -> _HistogramChild:
+        """Гистограмма для набора значений меток (создается один раз)."""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = _HistogramChild(self.buckets)
+        return child
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Учитывает наблюдение для набора значений меток."""
+        self.labels(*labels).observe(value)
+
+    def clear(self) -> None:
+        """Сбрасывает наблюдения (для тестов)."""
+        self._children.clear()
+
+    def samples(self) -> Iterator[str]:
+        bucket_names = (*self.labelnames, "le")
+        bounds = [*(_number(bound) for bound in self.buckets), "+Inf"]
+        for labels, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(bounds, child.counts, strict=True):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket"
+                    f"{_labels(bucket_names, (*labels, bound))} {cumulative}"
+                )
+            suffix = _labels(self.labelnames, labels)
+            yield f"{self.name}_sum{suffix} {_number(child.sum)}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+
+class MetricsRegistry:
+    """Набор метрик процесса."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        """Добавляет метрику; имена не должны повторяться."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus."""
+        return "".join(
+            f"{metric.render()}\n" for metric in self._metrics.values()
+        )
+
+
+class StageTimer:
+    """
+    Замер этапов обработки одного запроса.
+
+    lap() относит время с предыдущей отметки к этапу, finish() пишет
+    по одному наблюдению на этап в гистограмму. Этап, через который
+    прошли несколько раз (повторный резерв места), учитывается суммой.
+    """
+
+    __slots__ = ("_histogram", "_started", "_stages")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+        self._stages: dict[str, float] = {}
+        self._started = perf_counter()
+
+    def lap(self, stage: str) -> None:
+        """Завершает этап stage и начинает следующий."""
+        now = perf_counter()
+        self._stages[stage] = (
+            self._stages.get(stage, 0.0) + now - self._started
+        )
+        self._started = now
+
+    def finish(self) -> None:
+        """Записывает длительности этапов."""
+        for stage, seconds in self._stages.items():
+            self._histogram.labels(stage).observe(seconds)
+        self._stages.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+# Метрики маршрутизации
+routing_stage_seconds = Histogram(
+    "routing_stage_seconds",
+    "Duration of contact routing stages",
+    labelnames=("stage",),
+)
+routing_decisions_total = Counter(
+    "routing_decisions_total",
+    "Contacts assigned to an operator",
+    labelnames=("operator_id",),
+)
+contacts_unassigned_total = Counter(
+    "contacts_unassigned_total",
+    "Contacts left without an operator",
+    labelnames=("source_id",),
+)
+request_db_statements = Histogram(
+    "http_request_db_statements",
+    "SQL statements executed per HTTP request",
+    labelnames=("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+request_db_commits_total = Counter(
+    "http_request_db_commits_total",
+    "Database commits made by HTTP requests",
+    labelnames=("route",),
+)
+request_db_seconds = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements per HTTP request",
+    labelnames=("route",),
+)
+db_pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a database pool connection",
+)
+cache_invalidations_applied_total = Counter(
+    "cache_invalidations_applied_total",
+    "Cache invalidations applied from the database log",
+    labelnames=("kind",),
+)
+
+# Кэши процесса: имя -> функция, возвращающая (попадания, промахи)
+_caches: dict[str, Callable[[], tuple[int, int]]] = {}
+
+
+def register_cache(name: str, stats: Callable[[], tuple[int, int]]) -> None:
+    """Добавляет кэш в метрики попаданий (значения читаются при scrape)."""
+    _caches[name] = stats
+
+
+def _cache_samples(index: int) -> Samples:
+    return {(name,): stats()[index] for name, stats in _caches.items()}
+
+
+def _cache_hit_ratios() -> Samples:
+    ratios = {}
+    for name, stats in _caches.items():
+        hits, misses = stats()
+        ratios[(name,)] = hits / (hits + misses) if hits + misses else 0.0
+    return ratios
+
+
+CallbackMetric(
+    "cache_hits_total",
+    "Cache lookups answered from memory",
+    lambda: _cache_samples(0),
+    kind="counter",
+    labelnames=("cache",),
+)
+CallbackMetric(
+    "cache_misses_total",
+    "Cache lookups that went to the database",
+    lambda: _cache_samples(1),
+    kind="counter",
+    labelnames=("cache",),
+)
+CallbackMetric(
+    "cache_hit_ratio",
+    "Share of cache lookups answered from memory",
+    _cache_hit_ratios,
+    labelnames=("cache",),
+)
+
+
+def count_routing_decisions(
+    source_ids: Iterable[int], operator_ids: Iterable[int | None]
+) -> None:
+    """Учитывает назначения обращений источников на операторов."""
+    for source_id, operator_id in zip(source_ids, operator_ids, strict=True):
+        if operator_id is None:
+            contacts_unassigned_total.inc(str(source_id))
+        else:
+            routing_decisions_total.inc(str(operator_id))
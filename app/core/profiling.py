@@ -0,0 +1,75 @@
+import cProfile
+import hashlib
+import hmac
+import io
+import pstats
+import re
+import time
+from pathlib import Path
+
+
+def sign_profile_token(secret: str, expires_at: int) -> str:
+    """
+    Создает токен профилирования запроса.
+
+    Args:
+        secret: Общий секрет (PROFILING_SECRET)
+        expires_at: Unix-время, после которого токен недействителен
+
+    Returns:
+        Токен вида "<expires_at>.<hmac-sha256>"
+    """
+    digest = hmac.new(
+        secret.encode(), str(expires_at).encode(), hashlib.sha256
+    ).hexdigest()
+    return f"{expires_at}.{digest}"
+
+
+def verify_profile_token(
+    secret: str, token: str, now: float | None = None
+) -> bool:
+    """Проверяет подпись и срок действия токена профилирования."""
+    if not secret:
+        return False
+    expires_at, _, _ = token.partition(".")
+    if not expires_at.isdigit():
+        return False
+    if int(expires_at) < (time.time() if now is None else now):
+        return False
+    return hmac.compare_digest(
+        token, sign_profile_token(secret, int(expires_at))
+    )
+
+
+def write_profile(
+    profile: cProfile.Profile,
+    directory: Path,
+    profile_id: str,
+    method: str,
+    route: str,
+    elapsed: float,
+) -> Path:
+    """
+    Сохраняет профиль запроса.
+
+    Пишет два файла с общим именем: .pstats (для snakeviz,
+    python -m pstats) и .txt с маршрутом, временем и топом функций
+    по накопленному времени.
+
+    Returns:
+        Путь к файлу .pstats
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+    base = directory / (
+        f"{profile_id}_{method}_{slug}_{elapsed * 1000:.0f}ms"
+    )
+
+    profile.dump_stats(base.with_suffix(".pstats"))
+
+    summary = io.StringIO()
+    summary.write(f"{method} {route} {elapsed * 1000:.2f} ms\n\n")
+    stats = pstats.Stats(profile, stream=summary)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(40)
+    base.with_suffix(".txt").write_text(summary.getvalue())
+    return base.with_suffix(".pstats")
@@ -0,0 +1,97 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Ключ info подключения для времени начала текущего запроса
+_STARTED_KEY = "query_stats_started"
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """
+    Обращения к БД в пределах блока track_queries.
+
+    Attributes:
+        statements: Число выполненных SQL-запросов
+        commits: Число коммитов
+        db_time: Время выполнения запросов, секунды
+        log: Тексты запросов (только с record=True)
+        parent: Внешний блок, который тоже учитывает эти запросы
+    """
+
+    statements: int = 0
+    commits: int = 0
+    db_time: float = 0.0
+    log: list[str] | None = field(default=None, repr=False)
+    parent: "QueryStats | None" = field(default=None, repr=False)
+
+    def chain(self) -> Iterator["QueryStats"]:
+        """Этот блок и все внешние."""
+        stats = self
+        while stats is not None:
+            yield stats
+            stats = stats.parent
+
+
+_current: ContextVar[QueryStats | None] = ContextVar(
+    "query_stats", default=None
+)
+
+
+@contextmanager
+def track_queries(record: bool = False) -> Iterator[QueryStats]:
+    """
+    Считает запросы, коммиты и время БД в текущем контексте.
+
+    Учитываются все engine процесса: события подписаны на класс Engine.
+    Запросы фоновых задач (движок маршрутизации, сверка) идут в своем
+    контексте и сюда не попадают. Запросы вложенного блока сразу
+    учитываются и во внешних.
+
+    Args:
+        record: Сохранять тексты запросов в QueryStats.log
+    """
+    stats = QueryStats(log=[] if record else None, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    if _current.get() is not None:
+        conn.info[_STARTED_KEY] = perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    current = _current.get()
+    if current is None:
+        return
+    started = conn.info.pop(_STARTED_KEY, None)
+    elapsed = perf_counter() - started if started is not None else 0.0
+    for stats in current.chain():
+        stats.statements += 1
+        stats.db_time += elapsed
+        if stats.log is not None:
+            stats.log.append(statement)
+
+
+@event.listens_for(Engine, "commit")
+def _commit(conn) -> None:
+    current = _current.get()
+    if current is None:
+        return
+    for stats in current.chain():
+        stats.commits += 1
@@ -0,0 +1,94 @@
+import random
+
+
+class WeightedSampler:
+    """
+    Взвешенная выборка индексов на дереве Фенвика.
+
+    Выбор индекса и изменение веса работают за O(log n), поэтому
+    оператора, достигшего лимита, можно исключить из выборки обнулением
+    веса без перестроения всего списка.
+
+    Веса - неотрицательные целые числа.
+    """
+
+    __slots__ = ("_size", "_tree", "_weights", "_top_bit", "_total")
+
+    def __init__(self, weights: list[int]) -> None:
+        self._size = len(weights)
+        self._weights = list(weights)
+        self._tree = [0] * (self._size + 1)
+        self._top_bit = 1 << self._size.bit_length() if self._size else 0
+        self._total = sum(self._weights)
+
+        # Построение за O(n): каждый узел передает сумму родителю
+        for position, weight in enumerate(self._weights, start=1):
+            self._tree[position] += weight
+            parent = position + (position & -position)
+            if parent <= self._size:
+                self._tree[parent] += self._tree[position]
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def total(self) -> int:
+        """Сумма всех весов."""
+        return self._total
+
+    def weight(self, index: int) -> int:
+        """Текущий вес индекса."""
+        return self._weights[index]
+
+    def update(self, index: int, weight: int) -> None:
+        """Устанавливает новый вес индекса за O(log n)."""
+        if weight < 0:
+            raise ValueError("Вес не может быть отрицательным")
+
+        delta = weight - self._weights[index]
+        if delta == 0:
+            return
+
+        self._weights[index] = weight
+        self._total += delta
+        position = index + 1
+        while position <= self._size:
+            self._tree[position] += delta
+            position += position & -position
+
+    def sample(self, rng: random.Random | None = None) -> int | None:
+        """
+        Выбирает индекс с вероятностью пропорциональной весу за O(log n).
+
+        Returns:
+            Индекс или None если все веса нулевые
+        """
+        if self._total <= 0:
+            return None
+
+        target = (rng or random).randrange(self._total)
+
+        # Спуск по дереву: ищем первую позицию с префиксной суммой
+        # больше target
+        position = 0
+        step = self._top_bit
+        while step:
+            next_position = position + step
+            if (
+                next_position <= self._size
+                and self._tree[next_position] <= target
+            ):
+                position = next_position
+                target -= self._tree[next_position]
+            step >>= 1
+        return position
+
+    def copy(self) -> "WeightedSampler":
+        """Возвращает независимую копию за O(n)."""
+        clone = WeightedSampler.__new__(WeightedSampler)
+        clone._size = self._size
+        clone._weights = list(self._weights)
+        clone._tree = list(self._tree)
+        clone._top_bit = self._top_bit
+        clone._total = self._total
+        return clone
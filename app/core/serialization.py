@@ -0,0 +1,37 @@
+from collections.abc import Iterable
+from functools import cache
+from typing import Any
+
+from pydantic import BaseModel, TypeAdapter
+
+
+@cache
+def list_adapter(schema: type[BaseModel]) -> TypeAdapter[list[Any]]:
+    """
+    Возвращает TypeAdapter списка схемы.
+
+    Построение адаптера компилирует валидатор и сериализатор
+    pydantic-core, поэтому адаптер создается один раз на схему.
+    """
+    return TypeAdapter(list[schema])
+
+
+def validate_list(schema: type[BaseModel], items: Iterable[Any]) -> list:
+    """
+    Проверяет ORM-объекты одним вызовом валидатора списка.
+
+    Args:
+        schema: Схема ответа
+        items: ORM-объекты или словари
+
+    Returns:
+        Список экземпляров схемы
+    """
+    return list_adapter(schema).validate_python(
+        list(items), from_attributes=True
+    )
+
+
+def dump_list_json(schema: type[BaseModel], items: list[Any]) -> bytes:
+    """Сериализует уже проверенные экземпляры схемы в JSON-байты."""
+    return list_adapter(schema).dump_json(items)
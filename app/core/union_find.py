@@ -0,0 +1,38 @@
+class DisjointSet:
+    """
+    Система непересекающихся множеств (union-find) над целыми ID.
+
+    Корнем множества всегда остается наименьший ID, поэтому он же
+    служит каноничным элементом группы.
+    """
+
+    __slots__ = ("_parent",)
+
+    def __init__(self) -> None:
+        self._parent: dict[int, int] = {}
+
+    def find(self, item: int) -> int:
+        """Возвращает корень множества элемента (со сжатием путей)."""
+        parent = self._parent.setdefault(item, item)
+        while parent != item:
+            grandparent = self._parent[parent]
+            self._parent[item] = grandparent
+            item, parent = parent, grandparent
+        return item
+
+    def union(self, first: int, second: int) -> None:
+        """Объединяет множества двух элементов."""
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            root, child = min(first, second), max(first, second)
+            self._parent[child] = root
+
+    def groups(self) -> dict[int, set[int]]:
+        """Возвращает множества: корень -> остальные элементы."""
+        groups: dict[int, set[int]] = {}
+        for item in self._parent:
+            root = self.find(item)
+            members = groups.setdefault(root, set())
+            if item != root:
+                members.add(item)
+        return groups
@@ -1,10 +1,31 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.exc import DBAPIError
 
-from app.api.v1 import contacts, leads, operators, sources
+from app.api.middleware import ProfilingMiddleware, QueryStatsMiddleware
+from app.api.v1 import (
+    contacts,
+    leads,
+    operators,
+    reconciliation,
+    routing,
+    sources,
+)
 from app.core.config import settings
-from app.core.database import close_database, init_database
+from app.core.database import (
+    close_database,
+    init_database,
+    is_lock_timeout,
+    read_session_maker,
+)
+from app.core.metrics import REGISTRY
+from app.services.cache_sync_service import cache_sync_job
+from app.services.lead_merge_service import lead_merge_job
+from app.services.lead_service import warm_up_lead_identity_cache
+from app.services.reconciliation_service import reconciliation_job
+from app.services.routing_engine import routing_engine
 
 
 @asynccontextmanager
@@ -12,8 +33,22 @@ async def lifespan(app: FastAPI):
     """Управление жизненным циклом приложения."""
     # Startup
     await init_database()
+    async with read_session_maker() as db:
+        await warm_up_lead_identity_cache(db)
+    if settings.routing_engine_enabled:
+        routing_engine.start()
+    if settings.reconciliation_enabled:
+        reconciliation_job.start()
+    if settings.lead_merge_enabled:
+        lead_merge_job.start()
+    if settings.cache_sync_enabled:
+        cache_sync_job.start()
     yield
     # Shutdown
+    await cache_sync_job.stop()
+    await lead_merge_job.stop()
+    await reconciliation_job.stop()
+    await routing_engine.stop()
     await close_database()
 
 
@@ -21,12 +56,36 @@ app = FastAPI(
     title=settings.app_name,
     lifespan=lifespan,
 )
+app.add_middleware(QueryStatsMiddleware, headers=settings.debug)
+if settings.profiling_enabled:
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=settings.profiling_dir,
+        sample_rate=settings.profiling_sample_rate,
+        secret=settings.profiling_secret,
+    )
 
 # Подключаем роутеры
 app.include_router(operators.router, prefix="/api/v1", tags=["operators"])
 app.include_router(sources.router, prefix="/api/v1", tags=["sources"])
 app.include_router(leads.router, prefix="/api/v1", tags=["leads"])
 app.include_router(contacts.router, prefix="/api/v1", tags=["contacts"])
+app.include_router(
+    reconciliation.router, prefix="/api/v1", tags=["reconciliation"]
+)
+app.include_router(routing.router, prefix="/api/v1", tags=["routing"])
+
+
+@app.exception_handler(DBAPIError)
+async def database_error_handler(request: Request, exc: DBAPIError):
+    """Отвечает 503 на истекшее ожидание блокировки БД, остальное - 500."""
+    if not is_lock_timeout(exc):
+        raise exc
+    return JSONResponse(
+        {"detail": "Database is busy, retry later"},
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.get("/")
@@ -43,3 +102,12 @@ async def root():
 async def health():
     """Health check endpoint."""
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики процесса в текстовом формате Prometheus."""
+    return PlainTextResponse(
+        REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
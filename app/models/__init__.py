@@ -1,6 +1,7 @@
 from app.models.base import Base
+from app.models.cache_invalidation import CacheInvalidation
 from app.models.contact import Contact
-from app.models.lead import Lead
+from app.models.lead import Lead, LeadAlias, LeadMergeCandidate
 from app.models.operator import Operator
 from app.models.source import Source, SourceOperatorWeight
 
@@ -10,5 +11,8 @@ __all__ = [
     "Source",
     "SourceOperatorWeight",
     "Lead",
+    "LeadAlias",
+    "LeadMergeCandidate",
     "Contact",
+    "CacheInvalidation",
 ]
@@ -11,7 +11,14 @@ class Base(DeclarativeBase):
 
 
 class TimestampMixin:
-    """Миксин для добавления временных меток."""
+    """
+    Миксин для добавления временных меток.
+
+    eager_defaults: серверные значения меток возвращаются тем же
+    INSERT/UPDATE (RETURNING), поэтому refresh после коммита не нужен.
+    """
+
+    __mapper_args__ = {"eager_defaults": True}
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
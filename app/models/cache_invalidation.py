@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class CacheInvalidation(Base):
+    """
+    Запись журнала сброса кэшей.
+
+    Пишется в транзакции изменения источника, веса, оператора или
+    лида; остальные процессы читают журнал по возрастанию ID и
+    сбрасывают у себя только перечисленные записи.
+
+    Attributes:
+        id: Номер записи (возрастает)
+        kind: Что сбросить: source, operator, lead или lead_alias
+        key: ID сущности или ключ алиаса лида
+        created_at: Время записи (для очистки журнала)
+    """
+
+    __tablename__ = "cache_invalidations"
+
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=True
+    )
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    key: Mapped[str] = mapped_column(String(260), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        index=True,
+    )
+
+    def __repr__(self) -> str:
+        return f"<CacheInvalidation({self.id}: {self.kind} {self.key})>"
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, Integer, Text
+from sqlalchemy import ForeignKey, Index, Integer, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin
@@ -33,6 +33,16 @@ class Contact(Base, TimestampMixin):
     """
 
     __tablename__ = "contacts"
+    __table_args__ = (
+        # Обращения оператора с фильтром по статусу и подсчет открытых
+        Index(
+            "ix_contacts_operator_id_is_resolved",
+            "operator_id",
+            "is_resolved",
+        ),
+        # История лида по времени
+        Index("ix_contacts_lead_id_created_at", "lead_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(
         Integer, primary_key=True, autoincrement=True
@@ -53,7 +63,6 @@ class Contact(Base, TimestampMixin):
         Integer,
         ForeignKey("operators.id", ondelete="SET NULL"),
         nullable=True,
-        index=True,
     )
     message: Mapped[str | None] = mapped_column(Text, nullable=True)
     is_resolved: Mapped[bool] = mapped_column(default=False, nullable=False)
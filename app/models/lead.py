@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Integer, String
+from sqlalchemy import ForeignKey, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin
@@ -23,6 +23,7 @@ class Lead(Base, TimestampMixin):
         phone: Телефон клиента (уникальный идентификатор)
         email: Email клиента (опционально)
         name: Имя клиента (опционально)
+        merged_into: ID лида, с которым этот лид объединен как дубль
         contacts: Все обращения этого клиента
     """
 
@@ -38,6 +39,9 @@ class Lead(Base, TimestampMixin):
         String(255), nullable=True, unique=True, index=True
     )
     name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    merged_into: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("leads.id"), nullable=True, index=True
+    )
 
     contacts: Mapped[list[Contact]] = relationship(
         "Contact",
@@ -48,3 +52,80 @@ class Lead(Base, TimestampMixin):
     def __repr__(self) -> str:
         identifier = self.phone or self.email or f"id={self.id}"
         return f"<Lead({identifier})>"
+
+
+class LeadAlias(Base):
+    """
+    Известный идентификатор лида.
+
+    Каждый телефон и email, с которым писал клиент, указывает на
+    каноничного лида. Поиск лида - чтение по первичному ключу.
+    Алиасы создает репозиторий лидов вместе с лидом.
+
+    Attributes:
+        identifier: Ключ идентификатора ("p:<телефон>" или "e:<email>")
+        lead_id: ID каноничного лида
+    """
+
+    __tablename__ = "lead_aliases"
+
+    identifier: Mapped[str] = mapped_column(String(260), primary_key=True)
+    lead_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("leads.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    @staticmethod
+    def phone_key(phone: str) -> str:
+        """Ключ алиаса телефона."""
+        return f"p:{phone}"
+
+    @staticmethod
+    def email_key(email: str) -> str:
+        """Ключ алиаса email."""
+        return f"e:{email}"
+
+    @staticmethod
+    def keys_for(phone: str | None, email: str | None) -> list[str]:
+        """Ключи телефона и email (телефон первым)."""
+        keys = [LeadAlias.phone_key(phone)] if phone else []
+        if email:
+            keys.append(LeadAlias.email_key(email))
+        return keys
+
+    def __repr__(self) -> str:
+        return f"<LeadAlias({self.identifier} -> {self.lead_id})>"
+
+
+class LeadMergeCandidate(Base):
+    """
+    Пара лидов, которые оказались одним клиентом.
+
+    Появляется, когда телефон и email одного обращения принадлежат
+    разным лидам. Фоновое слияние объединяет такие пары.
+
+    Attributes:
+        lead_id: Меньший ID пары
+        duplicate_id: Больший ID пары
+    """
+
+    __tablename__ = "lead_merge_candidates"
+
+    lead_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("leads.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    duplicate_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("leads.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<LeadMergeCandidate(lead_id={self.lead_id}, "
+            f"duplicate_id={self.duplicate_id})>"
+        )
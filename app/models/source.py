@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy import ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin
@@ -62,6 +62,15 @@ class SourceOperatorWeight(Base):
     """
 
     __tablename__ = "source_operator_weights"
+    __table_args__ = (
+        # Покрывающий индекс маршрутов: веса читаются без обращения к строкам
+        Index(
+            "ix_source_operator_weights_source_id_operator_id_weight",
+            "source_id",
+            "operator_id",
+            "weight",
+        ),
+    )
 
     source_id: Mapped[int] = mapped_column(
         Integer,
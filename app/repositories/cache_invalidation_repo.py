@@ -0,0 +1,69 @@
+from datetime import datetime
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.cache_invalidation import CacheInvalidation
+
+
+def log_invalidation(db: AsyncSession, kind: str, *keys: int | str) -> None:
+    """
+    Добавляет в транзакцию сессии записи журнала сброса кэшей.
+
+    Записи фиксируются вместе с изменением и не пишутся, если шина
+    выключена.
+
+    Args:
+        db: Сессия БД
+        kind: Что сбросить: source, operator, lead или lead_alias
+        keys: ID сущностей или ключи алиасов
+    """
+    if not settings.cache_sync_enabled:
+        return
+    db.add_all(CacheInvalidation(kind=kind, key=str(key)) for key in keys)
+
+
+async def get_last_invalidation_id(db: AsyncSession) -> int:
+    """Получает ID последней записи журнала (0, если журнал пуст)."""
+    result = await db.execute(select(func.max(CacheInvalidation.id)))
+    return result.scalar_one() or 0
+
+
+async def get_invalidations_after(
+    db: AsyncSession, after_id: int, limit: int
+) -> list[tuple[int, str, str]]:
+    """
+    Получает записи журнала с ID больше after_id.
+
+    Returns:
+        Список кортежей (id, kind, key) по возрастанию ID
+    """
+    result = await db.execute(
+        select(
+            CacheInvalidation.id,
+            CacheInvalidation.kind,
+            CacheInvalidation.key,
+        )
+        .where(CacheInvalidation.id > after_id)
+        .order_by(CacheInvalidation.id)
+        .limit(limit)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def delete_invalidations_before(
+    db: AsyncSession, cutoff: datetime
+) -> int:
+    """
+    Удаляет записи журнала старше cutoff. Не фиксирует транзакцию.
+
+    Returns:
+        Число удаленных записей
+    """
+    result = await db.execute(
+        delete(CacheInvalidation).where(
+            CacheInvalidation.created_at < cutoff
+        )
+    )
+    return result.rowcount
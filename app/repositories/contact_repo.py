@@ -1,8 +1,9 @@
-from sqlalchemy import select
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from app.models.contact import Contact
+from app.repositories.pagination import fetch_columns, keyset_page
 
 
 async def get_contact_by_id(
@@ -32,15 +33,45 @@ async def get_contact_with_details(
 
 
 async def get_contacts_by_lead(
-    db: AsyncSession, lead_id: int
+    db: AsyncSession,
+    lead_id: int,
+    after_id: int | None = None,
+    limit: int | None = None,
 ) -> list[Contact]:
-    """Получает все обращения лида."""
+    """
+    Получает обращения лида, упорядоченные по ID.
+
+    Args:
+        db: Сессия БД
+        lead_id: ID лида
+        after_id: Вернуть обращения с ID больше указанного
+        limit: Размер страницы (None - все)
+    """
+    stmt = select(Contact).where(Contact.lead_id == lead_id)
     result = await db.execute(
-        select(Contact).where(Contact.lead_id == lead_id)
+        keyset_page(stmt, Contact.id, after_id, limit)
     )
     return list(result.scalars().all())
 
 
+async def get_contact_columns_by_lead(
+    db: AsyncSession,
+    lead_id: int,
+    fields: list[str],
+    after_id: int | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """Получает страницу обращений лида только с указанными колонками."""
+    return await fetch_columns(
+        db,
+        Contact,
+        fields,
+        Contact.lead_id == lead_id,
+        after_id=after_id,
+        limit=limit,
+    )
+
+
 async def get_contacts_by_operator(
     db: AsyncSession, operator_id: int, resolved: bool | None = None
 ) -> list[Contact]:
@@ -64,6 +95,72 @@ async def get_contacts_by_operator(
     return list(result.scalars().all())
 
 
+async def insert_contact(
+    db: AsyncSession,
+    lead_id: int,
+    source_id: int,
+    operator_id: int | None,
+    message: str | None = None,
+) -> Contact:
+    """
+    Добавляет обращение в текущую транзакцию без коммита.
+
+    Используется INSERT ... RETURNING, поэтому серверные значения
+    (id, created_at, updated_at) приходят сразу, без refresh.
+    """
+    result = await db.scalars(
+        insert(Contact)
+        .values(
+            lead_id=lead_id,
+            source_id=source_id,
+            operator_id=operator_id,
+            message=message,
+        )
+        .returning(Contact)
+    )
+    return result.one()
+
+
+async def insert_contacts(
+    db: AsyncSession, contacts_data: list[dict]
+) -> list[Contact]:
+    """
+    Добавляет обращения одним INSERT ... RETURNING без коммита.
+
+    Args:
+        db: Сессия БД
+        contacts_data: Словари с полями lead_id, source_id,
+            operator_id и message
+
+    Returns:
+        Созданные обращения в порядке переданных данных
+    """
+    if not contacts_data:
+        return []
+
+    result = await db.scalars(
+        insert(Contact).returning(Contact, sort_by_parameter_order=True),
+        contacts_data,
+    )
+    return list(result.all())
+
+
+async def insert_contact_rows(
+    db: AsyncSession, rows: list[dict]
+) -> None:
+    """
+    Добавляет обращения пачкой (executemany) без RETURNING и без коммита.
+
+    Самый быстрый путь для массового импорта: модели не создаются.
+
+    Args:
+        db: Сессия БД
+        rows: Словари с одинаковым набором колонок contacts
+    """
+    if rows:
+        await db.execute(insert(Contact.__table__), rows)
+
+
 async def create_contact(
     db: AsyncSession,
     lead_id: int,
@@ -72,27 +169,109 @@ async def create_contact(
     message: str | None = None,
 ) -> Contact:
     """Создает новое обращение."""
-    contact = Contact(
-        lead_id=lead_id,
-        source_id=source_id,
-        operator_id=operator_id,
-        message=message,
+    contact = await insert_contact(
+        db, lead_id, source_id, operator_id, message
     )
-    db.add(contact)
     await db.commit()
-    await db.refresh(contact)
     return contact
 
 
+async def resolve_contacts(
+    db: AsyncSession, contact_ids: list[int]
+) -> list[Contact]:
+    """
+    Помечает открытые обращения как обработанные одним UPDATE.
+
+    Условие is_resolved = false делает операцию однократной: уже
+    закрытое обращение не возвращается и не освобождает нагрузку
+    повторно, даже при параллельных запросах. Коммит за вызывающим
+    кодом.
+
+    Args:
+        db: Сессия БД
+        contact_ids: ID обращений
+
+    Returns:
+        Обращения, закрытые этим вызовом
+    """
+    if not contact_ids:
+        return []
+
+    result = await db.execute(
+        update(Contact)
+        .where(Contact.id.in_(contact_ids), Contact.is_resolved.is_(False))
+        .values(is_resolved=True)
+        .returning(Contact)
+        .execution_options(synchronize_session="fetch")
+    )
+    return list(result.scalars().all())
+
+
 async def resolve_contact(
     db: AsyncSession, contact_id: int
 ) -> Contact | None:
-    """Помечает обращение как обработанное."""
-    contact = await get_contact_by_id(db, contact_id)
-    if not contact:
-        return None
+    """
+    Помечает открытое обращение как обработанное (без коммита).
 
-    contact.is_resolved = True
-    await db.commit()
-    await db.refresh(contact)
-    return contact
+    Returns:
+        Обращение или None, если его нет или оно уже закрыто
+    """
+    contacts = await resolve_contacts(db, [contact_id])
+    return contacts[0] if contacts else None
+
+
+async def get_max_contact_id(db: AsyncSession) -> int | None:
+    """Возвращает наибольший ID обращения."""
+    return await db.scalar(select(func.max(Contact.id)))
+
+
+async def move_lead_contacts(
+    db: AsyncSession, from_lead_id: int, to_lead_id: int, limit: int
+) -> int:
+    """
+    Переносит до limit обращений одного лида к другому без коммита.
+
+    Returns:
+        Число перенесенных обращений
+    """
+    batch = (
+        select(Contact.id)
+        .where(Contact.lead_id == from_lead_id)
+        .order_by(Contact.id)
+        .limit(limit)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(Contact)
+        .where(Contact.id.in_(batch))
+        .values(lead_id=to_lead_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def get_operators_with_new_contacts(
+    db: AsyncSession, after_id: int
+) -> tuple[set[int], int]:
+    """
+    Находит операторов, которым назначены обращения с ID больше указанного.
+
+    Args:
+        db: Сессия БД
+        after_id: Предыдущая отметка (high-water mark)
+
+    Returns:
+        ID операторов и новая отметка
+    """
+    # Без GROUP BY: так SQLite идет по диапазону первичного ключа,
+    # а не по всему индексу operator_id
+    result = await db.execute(
+        select(Contact.id, Contact.operator_id).where(Contact.id > after_id)
+    )
+    operator_ids: set[int] = set()
+    high_water_mark = after_id
+    for contact_id, operator_id in result.all():
+        high_water_mark = max(high_water_mark, contact_id)
+        if operator_id is not None:
+            operator_ids.add(operator_id)
+    return operator_ids, high_water_mark
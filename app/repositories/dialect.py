@@ -0,0 +1,22 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def dialect_insert(db: AsyncSession, entity):
+    """
+    Возвращает INSERT диалекта сессии с поддержкой ON CONFLICT.
+
+    Raises:
+        NotImplementedError: Если диалект не SQLite и не PostgreSQL
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(entity)
+    if dialect == "postgresql":
+        return postgresql.insert(entity)
+    raise NotImplementedError(f"ON CONFLICT не поддержан для {dialect}")
+
+
+def supports_skip_locked(db: AsyncSession) -> bool:
+    """Поддерживает ли БД сессии SELECT ... FOR UPDATE SKIP LOCKED."""
+    return db.get_bind().dialect.name == "postgresql"
@@ -1,7 +1,15 @@
-from sqlalchemy import or_, select
+from collections.abc import AsyncIterator
+from functools import partial
+
+from sqlalchemy import case, delete, func, or_, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.lead import Lead
+from app.cache.entities import entity_cache
+from app.cache.identity import lead_identity_cache
+from app.models.contact import Contact
+from app.models.lead import Lead, LeadAlias, LeadMergeCandidate
+from app.repositories.cache_invalidation_repo import log_invalidation
+from app.repositories.dialect import dialect_insert
 from app.schemas.lead import LeadCreate, LeadUpdate
 
 
@@ -15,7 +23,10 @@ async def find_lead_by_identifier(
     db: AsyncSession, phone: str | None = None, email: str | None = None
 ) -> Lead | None:
     """
-    Ищет лида по телефону или email.
+    Ищет лида по алиасам телефона и email.
+
+    Если телефон и email принадлежат разным лидам, возвращается лид
+    с совпавшим телефоном.
 
     Args:
         db: Сессия БД
@@ -23,27 +34,257 @@ async def find_lead_by_identifier(
         email: Email для поиска
 
     Returns:
-        Найденный лид или None
+        Найденный каноничный лид или None
     """
-    if not phone and not email:
+    keys = LeadAlias.keys_for(phone, email)
+    if not keys:
         return None
 
-    conditions = []
-    if phone:
-        conditions.append(Lead.phone == phone)
-    if email:
-        conditions.append(Lead.email == email)
+    query = (
+        select(Lead)
+        .join(LeadAlias, LeadAlias.lead_id == Lead.id)
+        .where(LeadAlias.identifier.in_(keys))
+        .limit(1)
+    )
+    if len(keys) > 1:
+        query = query.order_by(
+            case((LeadAlias.identifier == keys[0], 0), else_=1)
+        )
 
-    result = await db.execute(select(Lead).where(or_(*conditions)))
-    return result.scalar_one_or_none()
+    result = await db.scalars(query)
+    return result.first()
+
+
+async def find_leads_by_identifiers(
+    db: AsyncSession, phones: set[str], emails: set[str]
+) -> dict[str, Lead]:
+    """
+    Ищет лидов сразу по набору телефонов и email одним запросом.
+
+    Args:
+        db: Сессия БД
+        phones: Телефоны для поиска
+        emails: Email для поиска
+
+    Returns:
+        Ключ алиаса -> каноничный лид для найденных идентификаторов
+    """
+    keys = _alias_keys(phones, emails)
+    if not keys:
+        return {}
+
+    result = await db.execute(
+        select(LeadAlias.identifier, Lead)
+        .join(Lead, Lead.id == LeadAlias.lead_id)
+        .where(LeadAlias.identifier.in_(keys))
+    )
+    return dict(result.all())
+
+
+async def insert_leads(
+    db: AsyncSession, leads_data: list[LeadCreate]
+) -> list[Lead]:
+    """
+    Добавляет лидов одним INSERT ... ON CONFLICT DO NOTHING без коммита.
+
+    Лиды, чей телефон или email уже занят (в том числе конкурентной
+    транзакцией), пропускаются. Идентификаторы созданных лидов
+    становятся их алиасами.
+
+    Returns:
+        Созданные лиды (порядок не гарантирован)
+    """
+    if not leads_data:
+        return []
+
+    result = await db.scalars(
+        dialect_insert(db, Lead).on_conflict_do_nothing().returning(Lead),
+        [lead_data.model_dump() for lead_data in leads_data],
+    )
+    leads = list(result.all())
+    await add_lead_aliases(
+        db,
+        {
+            key: lead.id
+            for lead in leads
+            for key in LeadAlias.keys_for(lead.phone, lead.email)
+        },
+    )
+    return leads
+
+
+async def get_lead_ids_by_aliases(
+    db: AsyncSession, keys: list[str]
+) -> dict[str, int]:
+    """
+    Ищет ID лидов по ключам алиасов чтением первичного ключа.
+
+    Returns:
+        Ключ алиаса -> ID каноничного лида для найденных ключей
+    """
+    if not keys:
+        return {}
+
+    result = await db.execute(
+        select(LeadAlias.identifier, LeadAlias.lead_id).where(
+            LeadAlias.identifier.in_(keys)
+        )
+    )
+    return dict(result.all())
+
+
+async def get_lead_ids_by_identifiers(
+    db: AsyncSession, phones: set[str], emails: set[str]
+) -> dict[str, int]:
+    """
+    Ищет ID лидов по набору телефонов и email без загрузки моделей.
+
+    Returns:
+        Ключ алиаса -> ID каноничного лида для найденных идентификаторов
+    """
+    return await get_lead_ids_by_aliases(db, _alias_keys(phones, emails))
+
+
+async def insert_lead_rows(
+    db: AsyncSession, rows: list[dict]
+) -> list[tuple[int, str | None, str | None]]:
+    """
+    Добавляет лидов пачкой без загрузки моделей и без коммита.
+
+    Лиды с уже занятым телефоном или email пропускаются
+    (ON CONFLICT DO NOTHING). Идентификаторы созданных лидов
+    становятся их алиасами.
+
+    Args:
+        db: Сессия БД
+        rows: Словари с полями phone, email и name
+
+    Returns:
+        Список кортежей (id, phone, email) созданных лидов
+    """
+    if not rows:
+        return []
+
+    table = Lead.__table__
+    result = await db.execute(
+        dialect_insert(db, table)
+        .on_conflict_do_nothing()
+        .returning(table.c.id, table.c.phone, table.c.email),
+        rows,
+    )
+    created = [tuple(row) for row in result.all()]
+    await add_lead_aliases(
+        db,
+        {
+            key: lead_id
+            for lead_id, phone, email in created
+            for key in LeadAlias.keys_for(phone, email)
+        },
+    )
+    return created
+
+
+async def add_lead_aliases(db: AsyncSession, aliases: dict[str, int]) -> None:
+    """
+    Добавляет алиасы лидов без коммита.
+
+    Ключ, уже принадлежащий другому лиду, не перезаписывается:
+    пара лидов становится кандидатом на слияние. Новые ключи попадают
+    в фильтр Блума кэша после коммита.
+
+    Args:
+        db: Сессия БД
+        aliases: Ключ алиаса -> ID лида
+    """
+    if not aliases:
+        return
+
+    result = await db.execute(
+        dialect_insert(db, LeadAlias)
+        .on_conflict_do_nothing()
+        .returning(LeadAlias.identifier),
+        [
+            {"identifier": key, "lead_id": lead_id}
+            for key, lead_id in aliases.items()
+        ],
+    )
+    added = set(result.scalars().all())
+    lead_identity_cache.stage(
+        db, partial(lead_identity_cache.add_known_keys, added)
+    )
+
+    taken = [key for key in aliases if key not in added]
+    if taken:
+        owners = await get_lead_ids_by_aliases(db, taken)
+        await add_merge_candidates(
+            db, {(aliases[key], owner) for key, owner in owners.items()}
+        )
+
+
+async def link_lead_identifiers(
+    db: AsyncSession,
+    links: list[tuple[int, str | None, str | None]],
+    known: dict[str, int],
+) -> None:
+    """
+    Привязывает идентификаторы обращений к выбранным лидам без коммита.
+
+    Свободный идентификатор становится алиасом лида, а идентификатор
+    другого лида дает кандидата на слияние.
+
+    Args:
+        db: Сессия БД
+        links: Кортежи (lead_id, phone, email) обращений
+        known: Уже найденные алиасы: ключ -> ID лида
+    """
+    aliases: dict[str, int] = {}
+    candidates: set[tuple[int, int]] = set()
+    for lead_id, phone, email in links:
+        for key in LeadAlias.keys_for(phone, email):
+            owner = known.get(key, aliases.get(key))
+            if owner is None:
+                aliases[key] = lead_id
+            elif owner != lead_id:
+                candidates.add((owner, lead_id))
+
+    await add_lead_aliases(db, aliases)
+    await add_merge_candidates(db, candidates)
+
+
+async def add_merge_candidates(
+    db: AsyncSession, pairs: set[tuple[int, int]]
+) -> None:
+    """Запоминает пары лидов для слияния без коммита."""
+    rows = [
+        {"lead_id": lead_id, "duplicate_id": duplicate_id}
+        for lead_id, duplicate_id in {
+            (min(pair), max(pair)) for pair in pairs if pair[0] != pair[1]
+        }
+    ]
+    if rows:
+        await db.execute(
+            dialect_insert(db, LeadMergeCandidate).on_conflict_do_nothing(),
+            rows,
+        )
+
+
+def _alias_keys(phones: set[str], emails: set[str]) -> list[str]:
+    """Ключи алиасов для наборов телефонов и email."""
+    return [LeadAlias.phone_key(phone) for phone in phones] + [
+        LeadAlias.email_key(email) for email in emails
+    ]
 
 
 async def create_lead(db: AsyncSession, lead_data: LeadCreate) -> Lead:
     """Создает нового лида."""
     lead = Lead(**lead_data.model_dump())
     db.add(lead)
+    await db.flush()
+    await add_lead_aliases(
+        db,
+        dict.fromkeys(LeadAlias.keys_for(lead.phone, lead.email), lead.id),
+    )
     await db.commit()
-    await db.refresh(lead)
     return lead
 
 
@@ -55,12 +296,30 @@ async def update_lead(
     if not lead:
         return None
 
+    old_phone, old_email = lead.phone, lead.email
     update_data = lead_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(lead, field, value)
 
+    # Старые идентификаторы остаются алиасами лида
+    await db.flush()
+    await add_lead_aliases(
+        db,
+        dict.fromkeys(LeadAlias.keys_for(lead.phone, lead.email), lead.id),
+    )
+    entity_cache.stage_invalidate(db, "lead", lead.id)
+    log_invalidation(db, "lead", lead.id)
+    log_invalidation(
+        db,
+        "lead_alias",
+        *dict.fromkeys(
+            LeadAlias.keys_for(old_phone, old_email)
+            + LeadAlias.keys_for(lead.phone, lead.email)
+        ),
+    )
     await db.commit()
-    await db.refresh(lead)
+    lead_identity_cache.forget(old_phone, old_email)
+    lead_identity_cache.put(lead.id, lead.phone, lead.email, lead.name)
     return lead
 
 
@@ -71,7 +330,18 @@ async def find_or_create_lead(
     name: str | None = None,
 ) -> Lead:
     """
-    Находит существующего лида или создает нового.
+    Находит существующего лида или создает нового без гонок.
+
+    По одному идентификатору лид сначала ищется по алиасам, затем
+    находится или создается одним INSERT ... ON CONFLICT DO UPDATE ...
+    RETURNING: конкурентные обращения с одного нового телефона не
+    падают на уникальности.
+
+    Если переданы и телефон, и email, они могут принадлежать разным
+    лидам. Тогда сначала выполняется поиск по алиасам (приоритет у
+    телефона), а для нового лида - INSERT ... ON CONFLICT DO NOTHING.
+
+    Не фиксирует транзакцию.
 
     Args:
         db: Сессия БД
@@ -80,18 +350,315 @@ async def find_or_create_lead(
         name: Имя
 
     Returns:
-        Найденный или созданный лид
+        Найденный или созданный каноничный лид
     """
-    # Пытаемся найти существующего
+    if phone and email:
+        return await _find_or_create_lead_by_both(db, phone, email, name)
+
+    # Идентификатор может быть алиасом лида, а не его колонкой
     lead = await find_lead_by_identifier(db, phone, email)
-    if lead:
-        # Обновляем имя если оно передано и отличается
+    if lead is not None:
         if name and lead.name != name:
             lead.name = name
-            await db.commit()
-            await db.refresh(lead)
+            entity_cache.stage_invalidate(db, "lead", lead.id)
         return lead
 
-    # Создаем нового
-    lead_data = LeadCreate(phone=phone, email=email, name=name)
-    return await create_lead(db, lead_data)
+    conflict_column = Lead.phone if phone else Lead.email
+    insert_stmt = dialect_insert(db, Lead).values(
+        phone=phone, email=email, name=name
+    )
+    result = await db.scalars(
+        insert_stmt.on_conflict_do_update(
+            index_elements=[conflict_column],
+            set_={"name": func.coalesce(insert_stmt.excluded.name, Lead.name)},
+        )
+        .returning(Lead)
+        .execution_options(populate_existing=True)
+    )
+    lead = result.one()
+    if name:
+        entity_cache.stage_invalidate(db, "lead", lead.id)
+    if lead.merged_into is not None:
+        # Дубль уже объединен: его идентификаторы ведут к каноничному
+        return await get_lead_by_id(db, lead.merged_into)
+
+    await add_lead_aliases(
+        db, dict.fromkeys(LeadAlias.keys_for(phone, email), lead.id)
+    )
+    return lead
+
+
+async def _insert_new_lead(
+    db: AsyncSession,
+    phone: str | None,
+    email: str | None,
+    name: str | None,
+) -> Lead | None:
+    """
+    Создает лида с алиасами, если телефон и email свободны.
+
+    Идентификатор может быть занят не только колонками leads, но и
+    алиасом другого лида. Поэтому лид вставляется вместе с алиасами
+    (ON CONFLICT DO NOTHING по identifier), и если хотя бы один ключ
+    уже занят, вставка лида откатывается удалением.
+
+    Returns:
+        Новый лид или None, если идентификатор уже занят
+    """
+    result = await db.scalars(
+        dialect_insert(db, Lead)
+        .values(phone=phone, email=email, name=name)
+        .on_conflict_do_nothing()
+        .returning(Lead)
+    )
+    lead = result.one_or_none()
+    if lead is None:
+        return None
+
+    keys = LeadAlias.keys_for(phone, email)
+    result = await db.execute(
+        dialect_insert(db, LeadAlias)
+        .on_conflict_do_nothing()
+        .returning(LeadAlias.identifier),
+        [{"identifier": key, "lead_id": lead.id} for key in keys],
+    )
+    if len(result.scalars().all()) < len(keys):
+        await db.execute(delete(LeadAlias).where(LeadAlias.lead_id == lead.id))
+        await db.execute(delete(Lead).where(Lead.id == lead.id))
+        db.expunge(lead)
+        return None
+
+    lead_identity_cache.stage(
+        db, partial(lead_identity_cache.add_known_keys, keys)
+    )
+    return lead
+
+
+async def _find_or_create_lead_by_both(
+    db: AsyncSession, phone: str, email: str, name: str | None
+) -> Lead:
+    """Находит или создает лида по телефону и email."""
+    lead = await find_lead_by_identifier(db, phone, email)
+
+    if lead is None:
+        lead = await _insert_new_lead(db, phone, email, name)
+        if lead is not None:
+            return lead
+
+        # Лида с этим телефоном или email создали конкурентно
+        lead = await find_lead_by_identifier(db, phone, email)
+
+    # Обновляем имя если оно передано и отличается
+    if name and lead.name != name:
+        lead.name = name
+    return lead
+
+
+async def find_or_create_lead_id(
+    db: AsyncSession,
+    phone: str | None = None,
+    email: str | None = None,
+    name: str | None = None,
+) -> int:
+    """
+    Возвращает ID лида через кэш идентификаторов и таблицу алиасов.
+
+    Повторный клиент находится в кэше без запросов к БД (запрос нужен
+    только для смены имени). Иначе лид ищется одним чтением алиасов по
+    первичному ключу; для точно нового клиента (по фильтру Блума) поиск
+    пропускается. Новые идентификаторы найденного лида становятся его
+    алиасами, а телефон и email разных лидов - кандидатом на слияние.
+
+    Кэш обновляется после коммита. Не фиксирует транзакцию.
+
+    Returns:
+        ID найденного или созданного каноничного лида
+    """
+    identity = lead_identity_cache.find(phone, email)
+    if identity is not None:
+        if name and name != identity.name:
+            await db.execute(
+                update(Lead)
+                .where(Lead.id == identity.lead_id)
+                .values(name=name)
+                .execution_options(synchronize_session=False)
+            )
+            entity_cache.stage_invalidate(db, "lead", identity.lead_id)
+            lead_identity_cache.stage(
+                db, lambda: setattr(identity, "name", name)
+            )
+        return identity.lead_id
+
+    keys = LeadAlias.keys_for(phone, email)
+    known: dict[str, int] = {}
+    if lead_identity_cache.may_exist(phone, email):
+        known = await get_lead_ids_by_aliases(db, keys)
+    lead_id = next((known[key] for key in keys if key in known), None)
+
+    created = False
+    if lead_id is None:
+        lead = await _insert_new_lead(db, phone, email, name)
+        if lead is not None:
+            lead_id, created = lead.id, True
+        else:
+            # Лида создали конкурентно или фильтр Блума устарел
+            known = await get_lead_ids_by_aliases(db, keys)
+            lead_id = next(
+                (known[key] for key in keys if key in known), None
+            )
+            if lead_id is None:
+                lead = await find_or_create_lead(db, phone, email, name)
+                known = await get_lead_ids_by_aliases(db, keys)
+                lead_id = lead.id
+
+    if not created:
+        if name:
+            await db.execute(
+                update(Lead)
+                .where(
+                    Lead.id == lead_id,
+                    or_(Lead.name.is_(None), Lead.name != name),
+                )
+                .values(name=name)
+                .execution_options(synchronize_session=False)
+            )
+            entity_cache.stage_invalidate(db, "lead", lead_id)
+        await link_lead_identifiers(db, [(lead_id, phone, email)], known)
+
+    # В кэш попадают только идентификаторы самого лида
+    if phone and known.get(LeadAlias.phone_key(phone), lead_id) != lead_id:
+        phone = None
+    if email and known.get(LeadAlias.email_key(email), lead_id) != lead_id:
+        email = None
+    lead_identity_cache.stage_put(db, lead_id, phone, email, name)
+    return lead_id
+
+
+async def iter_lead_alias_keys(
+    db: AsyncSession, batch_size: int = 10_000
+) -> AsyncIterator[str]:
+    """Потоково перебирает ключи всех алиасов лидов."""
+    result = await db.stream_scalars(
+        select(LeadAlias.identifier).execution_options(yield_per=batch_size)
+    )
+    async for key in result:
+        yield key
+
+
+async def get_merge_candidates(
+    db: AsyncSession, after: tuple[int, int] | None, limit: int
+) -> list[tuple[int, int]]:
+    """
+    Возвращает страницу пар лидов для слияния.
+
+    Args:
+        db: Сессия БД
+        after: Последняя пара предыдущей страницы (курсор)
+        limit: Размер страницы
+
+    Returns:
+        Пары (lead_id, duplicate_id) по возрастанию
+    """
+    columns = (LeadMergeCandidate.lead_id, LeadMergeCandidate.duplicate_id)
+    query = select(*columns).order_by(*columns).limit(limit)
+    if after is not None:
+        query = query.where(tuple_(*columns) > tuple_(*after))
+
+    result = await db.execute(query)
+    return [tuple(row) for row in result.all()]
+
+
+async def get_merged_into(
+    db: AsyncSession, lead_ids: set[int]
+) -> dict[int, int]:
+    """
+    Возвращает каноничных лидов для уже объединенных дублей.
+
+    Returns:
+        ID дубля -> ID лида, с которым он объединен
+    """
+    if not lead_ids:
+        return {}
+
+    result = await db.execute(
+        select(Lead.id, Lead.merged_into).where(
+            Lead.id.in_(lead_ids), Lead.merged_into.is_not(None)
+        )
+    )
+    return dict(result.all())
+
+
+async def get_merged_leads_with_contacts(
+    db: AsyncSession, limit: int
+) -> dict[int, int]:
+    """
+    Находит объединенных дублей, к которым еще привязаны обращения.
+
+    Такие обращения появляются, если обращение записали по устаревшей
+    записи кэша уже после переноса.
+
+    Returns:
+        ID дубля -> ID лида, с которым он объединен
+    """
+    has_contacts = (
+        select(Contact.id).where(Contact.lead_id == Lead.id).exists()
+    )
+    result = await db.execute(
+        select(Lead.id, Lead.merged_into)
+        .where(Lead.merged_into.is_not(None), has_contacts)
+        .limit(limit)
+    )
+    return dict(result.all())
+
+
+async def merge_leads(
+    db: AsyncSession, lead_id: int, duplicate_ids: set[int]
+) -> list[str]:
+    """
+    Объединяет дублей с каноничным лидом без коммита.
+
+    Алиасы дублей переходят к лиду, дубли (и ранее объединенные с
+    ними лиды) помечаются merged_into, пары кандидатов внутри группы
+    удаляются. Обращения переносятся отдельно (move_lead_contacts).
+
+    Args:
+        db: Сессия БД
+        lead_id: ID каноничного лида
+        duplicate_ids: ID дублей
+
+    Returns:
+        Ключи перенесенных алиасов
+    """
+    result = await db.execute(
+        update(LeadAlias)
+        .where(LeadAlias.lead_id.in_(duplicate_ids))
+        .values(lead_id=lead_id)
+        .returning(LeadAlias.identifier)
+    )
+    keys = list(result.scalars().all())
+
+    result = await db.execute(
+        update(Lead)
+        .where(
+            or_(
+                Lead.id.in_(duplicate_ids),
+                Lead.merged_into.in_(duplicate_ids),
+            )
+        )
+        .values(merged_into=lead_id)
+        .returning(Lead.id)
+        .execution_options(synchronize_session=False)
+    )
+    merged = result.scalars().all()
+    entity_cache.stage_invalidate(db, "lead", *merged)
+    log_invalidation(db, "lead", *merged)
+    log_invalidation(db, "lead_alias", *keys)
+
+    group = duplicate_ids | {lead_id}
+    await db.execute(
+        delete(LeadMergeCandidate).where(
+            LeadMergeCandidate.lead_id.in_(group),
+            LeadMergeCandidate.duplicate_id.in_(group),
+        )
+    )
+    return keys
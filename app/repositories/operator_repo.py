@@ -1,8 +1,16 @@
-from sqlalchemy import select, update
+from functools import partial
+
+from sqlalchemy import case, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache.entities import entity_cache
+from app.cache.routing import routing_table
+from app.cache.staging import after_commit
+from app.models.contact import Contact
 from app.models.operator import Operator
 from app.models.source import SourceOperatorWeight
+from app.repositories.cache_invalidation_repo import log_invalidation
+from app.repositories.pagination import fetch_columns, keyset_page
 from app.schemas.operator import OperatorCreate, OperatorUpdate
 
 
@@ -16,12 +24,50 @@ async def get_operator_by_id(
     return result.scalar_one_or_none()
 
 
-async def get_all_operators(db: AsyncSession) -> list[Operator]:
-    """Получает всех операторов."""
-    result = await db.execute(select(Operator))
+async def get_existing_operator_ids(
+    db: AsyncSession, operator_ids: set[int]
+) -> set[int]:
+    """Возвращает те ID из переданных, для которых оператор существует."""
+    if not operator_ids:
+        return set()
+
+    result = await db.scalars(
+        select(Operator.id).where(Operator.id.in_(operator_ids))
+    )
+    return set(result.all())
+
+
+async def get_all_operators(
+    db: AsyncSession,
+    after_id: int | None = None,
+    limit: int | None = None,
+) -> list[Operator]:
+    """
+    Получает операторов, упорядоченных по ID.
+
+    Args:
+        db: Сессия БД
+        after_id: Вернуть операторов с ID больше указанного
+        limit: Размер страницы (None - все)
+    """
+    result = await db.execute(
+        keyset_page(select(Operator), Operator.id, after_id, limit)
+    )
     return list(result.scalars().all())
 
 
+async def get_operator_columns(
+    db: AsyncSession,
+    fields: list[str],
+    after_id: int | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """Получает страницу операторов только с указанными колонками."""
+    return await fetch_columns(
+        db, Operator, fields, after_id=after_id, limit=limit
+    )
+
+
 async def get_active_operators(db: AsyncSession) -> list[Operator]:
     """Получает только активных операторов."""
     result = await db.execute(
@@ -50,6 +96,75 @@ async def get_operators_for_source(
     return list(result.all())
 
 
+async def get_operators_for_sources(
+    db: AsyncSession, source_ids: set[int]
+) -> list[tuple[int, int, int, int, int]]:
+    """
+    Получает активных операторов сразу для нескольких источников.
+
+    Загружаются только нужные для маршрутизации колонки.
+
+    Returns:
+        Список кортежей
+        (source_id, operator_id, max_load, current_load, weight)
+    """
+    if not source_ids:
+        return []
+
+    result = await db.execute(
+        select(
+            SourceOperatorWeight.source_id,
+            Operator.id,
+            Operator.max_load,
+            Operator.current_load,
+            SourceOperatorWeight.weight,
+        )
+        .join(SourceOperatorWeight)
+        .where(
+            SourceOperatorWeight.source_id.in_(source_ids),
+            Operator.is_active,
+        )
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def get_operator_loads(
+    db: AsyncSession, operator_ids: list[int]
+) -> dict[int, int]:
+    """Получает текущую нагрузку операторов."""
+    if not operator_ids:
+        return {}
+
+    result = await db.execute(
+        select(Operator.id, Operator.current_load).where(
+            Operator.id.in_(operator_ids)
+        )
+    )
+    return dict(result.all())
+
+
+async def lock_operator_loads(
+    db: AsyncSession, operator_ids: list[int]
+) -> dict[int, int]:
+    """
+    Блокирует строки активных операторов до конца транзакции
+    и возвращает их нагрузку.
+
+    Строки, заблокированные конкурентными транзакциями, пропускаются
+    (FOR UPDATE SKIP LOCKED): параллельные пакеты не ждут друг друга,
+    а распределяются по разным операторам.
+    """
+    if not operator_ids:
+        return {}
+
+    result = await db.execute(
+        select(Operator.id, Operator.current_load)
+        .where(Operator.id.in_(operator_ids), Operator.is_active)
+        .with_for_update(skip_locked=True)
+    )
+    return dict(result.all())
+
+
 async def create_operator(
     db: AsyncSession, operator_data: OperatorCreate
 ) -> Operator:
@@ -57,7 +172,6 @@ async def create_operator(
     operator = Operator(**operator_data.model_dump())
     db.add(operator)
     await db.commit()
-    await db.refresh(operator)
     return operator
 
 
@@ -73,8 +187,10 @@ async def update_operator(
     for field, value in update_data.items():
         setattr(operator, field, value)
 
+    entity_cache.stage_invalidate(db, "operator", operator_id)
+    log_invalidation(db, "operator", operator_id)
     await db.commit()
-    await db.refresh(operator)
+    routing_table.invalidate_operator(operator_id)
     return operator
 
 
@@ -87,29 +203,253 @@ async def delete_operator(
         return False
 
     await db.delete(operator)
+    entity_cache.stage_invalidate(db, "operator", operator_id)
+    log_invalidation(db, "operator", operator_id)
     await db.commit()
+    routing_table.invalidate_operator(operator_id)
     return True
 
 
+async def reserve_operator_capacity(
+    db: AsyncSession, operator_id: int
+) -> int | None:
+    """
+    Резервирует место у оператора одним условным UPDATE.
+
+    Нагрузка увеличивается только если оператор активен и не достиг
+    лимита, поэтому при конкурентных запросах лимит не превышается.
+    Выполняется в текущей транзакции, коммит за вызывающим кодом;
+    подсказка о нагрузке в таблице маршрутизации обновляется после
+    коммита.
+
+    Returns:
+        Новая нагрузка оператора или None если места нет
+    """
+    result = await db.execute(
+        update(Operator)
+        .where(
+            Operator.id == operator_id,
+            Operator.is_active,
+            Operator.current_load < Operator.max_load,
+        )
+        .values(current_load=Operator.current_load + 1)
+        .returning(Operator.current_load)
+        .execution_options(synchronize_session="fetch")
+    )
+    current_load = result.scalar_one_or_none()
+
+    if current_load is None:
+        after_commit(db, partial(routing_table.mark_full, operator_id))
+    else:
+        after_commit(
+            db, partial(routing_table.set_load, operator_id, current_load)
+        )
+        entity_cache.stage_invalidate(db, "operator", operator_id)
+    return current_load
+
+
+async def reserve_operator_capacity_bulk(
+    db: AsyncSession, load_deltas: dict[int, int]
+) -> set[int]:
+    """
+    Резервирует места у нескольких операторов одним UPDATE.
+
+    Каждому оператору нагрузка увеличивается на свою дельту, но только
+    если после этого он остается в пределах лимита.
+    Выполняется в текущей транзакции, коммит за вызывающим кодом.
+
+    Args:
+        db: Сессия БД
+        load_deltas: Словарь {operator_id: сколько мест занять}
+
+    Returns:
+        ID операторов, у которых резерв удался
+    """
+    if not load_deltas:
+        return set()
+
+    delta = case(load_deltas, value=Operator.id, else_=0)
+    result = await db.execute(
+        update(Operator)
+        .where(
+            Operator.id.in_(load_deltas),
+            Operator.is_active,
+            Operator.current_load + delta <= Operator.max_load,
+        )
+        .values(current_load=Operator.current_load + delta)
+        .returning(Operator.id, Operator.current_load)
+        .execution_options(synchronize_session="fetch")
+    )
+
+    loads = dict(result.all())
+    _stage_loads(db, loads)
+    entity_cache.stage_invalidate(db, "operator", *loads)
+    return set(loads)
+
+
+async def add_operator_loads(
+    db: AsyncSession, load_deltas: dict[int, int]
+) -> None:
+    """
+    Изменяет нагрузку нескольких операторов одним UPDATE без проверки
+    лимита.
+
+    Выполняется в текущей транзакции, коммит за вызывающим кодом.
+
+    Args:
+        db: Сессия БД
+        load_deltas: Словарь {operator_id: изменение нагрузки}
+    """
+    load_deltas = {
+        operator_id: delta
+        for operator_id, delta in load_deltas.items()
+        if delta
+    }
+    if not load_deltas:
+        return
+
+    delta = case(load_deltas, value=Operator.id, else_=0)
+    await db.execute(
+        update(Operator)
+        .where(Operator.id.in_(load_deltas))
+        .values(current_load=Operator.current_load + delta)
+        .execution_options(synchronize_session="fetch")
+    )
+
+    def adjust_loads() -> None:
+        for operator_id, operator_delta in load_deltas.items():
+            routing_table.adjust_load(operator_id, operator_delta)
+
+    after_commit(db, adjust_loads)
+    entity_cache.stage_invalidate(db, "operator", *load_deltas)
+
+
 async def increment_operator_load(
     db: AsyncSession, operator_id: int
 ) -> None:
-    """Увеличивает нагрузку оператора атомарно."""
+    """
+    Увеличивает нагрузку оператора атомарно.
+
+    Выполняется в текущей транзакции, коммит за вызывающим кодом.
+    """
     await db.execute(
         update(Operator)
         .where(Operator.id == operator_id)
         .values(current_load=Operator.current_load + 1)
     )
-    await db.commit()
+    after_commit(db, partial(routing_table.adjust_load, operator_id, 1))
+    entity_cache.stage_invalidate(db, "operator", operator_id)
 
 
 async def decrement_operator_load(
     db: AsyncSession, operator_id: int
 ) -> None:
-    """Уменьшает нагрузку оператора атомарно."""
+    """
+    Уменьшает нагрузку оператора атомарно.
+
+    Выполняется в текущей транзакции, коммит за вызывающим кодом.
+    """
     await db.execute(
         update(Operator)
         .where(Operator.id == operator_id)
         .values(current_load=Operator.current_load - 1)
     )
-    await db.commit()
+    after_commit(db, partial(routing_table.adjust_load, operator_id, -1))
+    entity_cache.stage_invalidate(db, "operator", operator_id)
+
+
+async def get_operator_load_snapshot(
+    db: AsyncSession,
+    after_id: int | None = None,
+    limit: int | None = None,
+    operator_ids: list[int] | None = None,
+) -> list[tuple[int, int, int]]:
+    """
+    Читает записанную и фактическую нагрузку операторов одним запросом.
+
+    Фактическая нагрузка - число открытых обращений оператора,
+    считается коррелированным подзапросом только по индексу
+    contacts(operator_id, is_resolved).
+    Оба значения берутся из одного снимка БД.
+
+    Args:
+        db: Сессия БД
+        after_id: Вернуть операторов с ID больше указанного
+        limit: Размер страницы
+        operator_ids: Ограничить выборку этими операторами
+
+    Returns:
+        Список кортежей (operator_id, current_load, open_contacts)
+    """
+    open_contacts = (
+        select(func.count())
+        .select_from(Contact)
+        .where(
+            Contact.operator_id == Operator.id,
+            Contact.is_resolved.is_(False),
+        )
+        .correlate(Operator)
+        .scalar_subquery()
+    )
+    stmt = select(Operator.id, Operator.current_load, open_contacts)
+    if operator_ids is not None:
+        stmt = stmt.where(Operator.id.in_(operator_ids))
+
+    result = await db.execute(keyset_page(stmt, Operator.id, after_id, limit))
+    return [tuple(row) for row in result.all()]
+
+
+async def repair_operator_loads(
+    db: AsyncSession, repairs: dict[int, tuple[int, int]]
+) -> set[int]:
+    """
+    Исправляет нагрузку операторов одним условным UPDATE.
+
+    Строка меняется, только если нагрузка все еще равна прочитанной:
+    если обращение успели создать или закрыть, исправление пропускается
+    до следующего прохода и не затирает чужое изменение. Коммит за
+    вызывающим кодом.
+
+    Args:
+        db: Сессия БД
+        repairs: Словарь {operator_id: (прочитанная, фактическая)}
+
+    Returns:
+        ID исправленных операторов
+    """
+    if not repairs:
+        return set()
+
+    observed = case(
+        {operator_id: loads[0] for operator_id, loads in repairs.items()},
+        value=Operator.id,
+    )
+    actual = case(
+        {operator_id: loads[1] for operator_id, loads in repairs.items()},
+        value=Operator.id,
+    )
+    result = await db.execute(
+        update(Operator)
+        .where(Operator.id.in_(repairs), Operator.current_load == observed)
+        .values(current_load=actual)
+        .returning(Operator.id)
+        .execution_options(synchronize_session=False)
+    )
+    repaired = set(result.scalars().all())
+    _stage_loads(
+        db, {operator_id: repairs[operator_id][1] for operator_id in repaired}
+    )
+    entity_cache.stage_invalidate(db, "operator", *repaired)
+    return repaired
+
+
+def _stage_loads(db: AsyncSession, loads: dict[int, int]) -> None:
+    """Обновляет подсказки о нагрузке после коммита сессии."""
+    if not loads:
+        return
+
+    def set_loads() -> None:
+        for operator_id, current_load in loads.items():
+            routing_table.set_load(operator_id, current_load)
+
+    after_commit(db, set_loads)
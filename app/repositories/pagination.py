@@ -0,0 +1,62 @@
+from typing import Any
+
+from sqlalchemy import ColumnElement, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def keyset_page(
+    stmt: Select,
+    key: Any,
+    after_id: int | None = None,
+    limit: int | None = None,
+) -> Select:
+    """
+    Добавляет к запросу keyset-пагинацию по индексированной колонке.
+
+    В отличие от OFFSET, стоимость страницы не зависит от ее номера:
+    БД сразу находит позицию по индексу.
+
+    Args:
+        stmt: Исходный запрос
+        key: Колонка упорядочивания (ID)
+        after_id: Вернуть записи с ключом больше указанного
+        limit: Размер страницы (None - без ограничения)
+
+    Returns:
+        Запрос с условием, сортировкой и лимитом
+    """
+    if after_id is not None:
+        stmt = stmt.where(key > after_id)
+    stmt = stmt.order_by(key)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+async def fetch_columns(
+    db: AsyncSession,
+    entity: Any,
+    fields: list[str],
+    *criteria: ColumnElement[bool],
+    after_id: int | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """
+    Загружает страницу только с указанными колонками без создания моделей.
+
+    Args:
+        db: Сессия БД
+        entity: Модель
+        fields: Имена колонок
+        criteria: Дополнительные условия WHERE
+        after_id: Вернуть записи с ID больше указанного
+        limit: Размер страницы
+
+    Returns:
+        Список словарей {колонка: значение}
+    """
+    stmt = select(*(getattr(entity, field) for field in fields)).where(
+        *criteria
+    )
+    result = await db.execute(keyset_page(stmt, entity.id, after_id, limit))
+    return [dict(row._mapping) for row in result.all()]
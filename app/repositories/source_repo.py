@@ -1,7 +1,11 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache.entities import entity_cache
+from app.cache.routing import routing_table
 from app.models.source import Source, SourceOperatorWeight
+from app.repositories.cache_invalidation_repo import log_invalidation
+from app.repositories.pagination import fetch_columns, keyset_page
 from app.schemas.source import SourceCreate, SourceUpdate
 
 
@@ -15,20 +19,66 @@ async def get_source_by_id(
     return result.scalar_one_or_none()
 
 
-async def get_all_sources(db: AsyncSession) -> list[Source]:
-    """Получает все источники."""
-    result = await db.execute(select(Source))
+async def get_existing_source_ids(
+    db: AsyncSession, source_ids: set[int]
+) -> set[int]:
+    """Возвращает те ID из переданных, для которых источник существует."""
+    if not source_ids:
+        return set()
+
+    result = await db.scalars(
+        select(Source.id).where(Source.id.in_(source_ids))
+    )
+    return set(result.all())
+
+
+async def get_all_sources(
+    db: AsyncSession,
+    after_id: int | None = None,
+    limit: int | None = None,
+) -> list[Source]:
+    """
+    Получает источники, упорядоченные по ID.
+
+    Args:
+        db: Сессия БД
+        after_id: Вернуть источники с ID больше указанного
+        limit: Размер страницы (None - все)
+    """
+    result = await db.execute(
+        keyset_page(select(Source), Source.id, after_id, limit)
+    )
     return list(result.scalars().all())
 
 
+async def get_source_columns(
+    db: AsyncSession,
+    fields: list[str],
+    after_id: int | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """Получает страницу источников только с указанными колонками."""
+    return await fetch_columns(
+        db, Source, fields, after_id=after_id, limit=limit
+    )
+
+
+async def get_source_ids(db: AsyncSession) -> set[int]:
+    """Получает ID всех источников."""
+    result = await db.execute(select(Source.id))
+    return set(result.scalars().all())
+
+
 async def create_source(
     db: AsyncSession, source_data: SourceCreate
 ) -> Source:
     """Создает новый источник."""
     source = Source(**source_data.model_dump())
     db.add(source)
+    await db.flush()
+    log_invalidation(db, "source", source.id)
     await db.commit()
-    await db.refresh(source)
+    routing_table.invalidate_source(source.id)
     return source
 
 
@@ -44,8 +94,9 @@ async def update_source(
     for field, value in update_data.items():
         setattr(source, field, value)
 
+    entity_cache.stage_invalidate(db, "source", source_id)
+    log_invalidation(db, "source", source_id)
     await db.commit()
-    await db.refresh(source)
     return source
 
 
@@ -56,7 +107,10 @@ async def delete_source(db: AsyncSession, source_id: int) -> bool:
         return False
 
     await db.delete(source)
+    entity_cache.stage_invalidate(db, "source", source_id)
+    log_invalidation(db, "source", source_id)
     await db.commit()
+    routing_table.invalidate_source(source_id)
     return True
 
 
@@ -75,8 +129,9 @@ async def set_operator_weight(
 
     if existing:
         existing.weight = weight
+        log_invalidation(db, "source", source_id)
         await db.commit()
-        await db.refresh(existing)
+        routing_table.invalidate_source(source_id)
         return existing
 
     # Создаем новую запись
@@ -84,18 +139,31 @@ async def set_operator_weight(
         source_id=source_id, operator_id=operator_id, weight=weight
     )
     db.add(weight_record)
+    log_invalidation(db, "source", source_id)
     await db.commit()
-    await db.refresh(weight_record)
+    routing_table.invalidate_source(source_id)
     return weight_record
 
 
 async def get_operator_weights(
-    db: AsyncSession, source_id: int
+    db: AsyncSession,
+    source_id: int,
+    after_id: int | None = None,
+    limit: int | None = None,
 ) -> list[SourceOperatorWeight]:
-    """Получает все веса операторов для источника."""
+    """
+    Получает веса операторов для источника, упорядоченные по ID оператора.
+
+    Args:
+        db: Сессия БД
+        source_id: ID источника
+        after_id: Вернуть веса операторов с ID больше указанного
+        limit: Размер страницы (None - все)
+    """
+    stmt = select(SourceOperatorWeight).where(
+        SourceOperatorWeight.source_id == source_id
+    )
     result = await db.execute(
-        select(SourceOperatorWeight).where(
-            SourceOperatorWeight.source_id == source_id
-        )
+        keyset_page(stmt, SourceOperatorWeight.operator_id, after_id, limit)
     )
     return list(result.scalars().all())
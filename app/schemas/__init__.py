@@ -1,15 +1,29 @@
 from app.schemas.contact import (
+    ContactBatchResult,
     ContactCreate,
+    ContactResolveRequest,
     ContactResponse,
     ContactWithDetails,
 )
-from app.schemas.lead import LeadCreate, LeadResponse, LeadUpdate
+from app.schemas.lead import (
+    LeadCreate,
+    LeadIdentityCacheStats,
+    LeadMergeReport,
+    LeadMergeStatus,
+    LeadResponse,
+    LeadUpdate,
+)
 from app.schemas.operator import (
     OperatorCreate,
     OperatorResponse,
     OperatorUpdate,
     OperatorWithWeights,
 )
+from app.schemas.pagination import CursorParams, PageParams
+from app.schemas.reconciliation import (
+    ReconciliationReport,
+    ReconciliationStatus,
+)
 from app.schemas.source import (
     SourceCreate,
     SourceOperatorWeightCreate,
@@ -33,7 +47,16 @@ __all__ = [
     "LeadCreate",
     "LeadUpdate",
     "LeadResponse",
+    "LeadIdentityCacheStats",
+    "LeadMergeReport",
+    "LeadMergeStatus",
     "ContactCreate",
     "ContactResponse",
     "ContactWithDetails",
+    "ContactBatchResult",
+    "ContactResolveRequest",
+    "CursorParams",
+    "PageParams",
+    "ReconciliationReport",
+    "ReconciliationStatus",
 ]
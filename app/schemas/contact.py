@@ -1,6 +1,17 @@
+import re
 from datetime import datetime
+from functools import lru_cache
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import (
+    BaseModel,
+    EmailStr,
+    Field,
+    TypeAdapter,
+    ValidationError,
+    field_validator,
+)
+
+from app.core.config import settings
 
 
 class ContactBase(BaseModel):
@@ -28,6 +39,82 @@ class ContactCreate(ContactBase):
     )
 
 
+_email_adapter = TypeAdapter(EmailStr)
+
+# ASCII-адрес, который EmailStr принимает без изменений, кроме регистра
+# домена: dot-atom до @, метки из букв, цифр и одиночных дефисов (без
+# IDNA-меток xn--) и буквенный домен верхнего уровня
+_SIMPLE_EMAIL = re.compile(
+    r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+"
+    r"(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*"
+    r"@((?:[A-Za-z0-9]+(?:-[A-Za-z0-9]+)*\.)+([A-Za-z]{2,63}))"
+)
+# Зарезервированные домены, которые EmailStr отклоняет
+_SPECIAL_USE_TLDS = frozenset(
+    {"arpa", "invalid", "local", "localhost", "onion", "test"}
+)
+
+
+@lru_cache(maxsize=100_000)
+def normalize_email(value: str) -> str:
+    """
+    Проверяет и нормализует email так же, как EmailStr.
+
+    Проверка EmailStr (IDNA-разбор домена) - самая дорогая часть разбора
+    строки импорта. Обычные ASCII-адреса проверяются регулярным
+    выражением, остальные - EmailStr; адреса в истории повторяются,
+    поэтому результат кэшируется.
+
+    Raises:
+        ValueError: Если email некорректен
+    """
+    match = _SIMPLE_EMAIL.fullmatch(value)
+    if (
+        match is not None
+        and len(value) <= 254
+        and value.index("@") <= 64
+        and match[2].lower() not in _SPECIAL_USE_TLDS
+        and all(len(label) <= 63 for label in match[1].split("."))
+    ):
+        local, _, domain = value.rpartition("@")
+        return f"{local}@{domain.lower()}"
+    try:
+        return _email_adapter.validate_python(value)
+    except ValidationError as error:
+        raise ValueError(error.errors()[0]["msg"]) from None
+
+
+class ContactImport(ContactCreate):
+    """
+    Строка импорта истории обращений (NDJSON).
+
+    Проверки полей совпадают с ContactCreate, дополнительно допускаются
+    назначенный оператор, статус и время обращения. Пустые телефон и
+    email считаются отсутствующими.
+    """
+
+    lead_email: str | None = Field(None, description="Email клиента")
+    operator_id: int | None = Field(
+        None, gt=0, description="Уже назначенный оператор"
+    )
+    is_resolved: bool = Field(False, description="Обработано ли обращение")
+    created_at: datetime | None = Field(
+        None, strict=True, description="Время обращения (ISO 8601)"
+    )
+
+    @field_validator("lead_phone", "lead_email", mode="before")
+    @classmethod
+    def empty_as_none(cls, value):
+        """Пустая строка - нет идентификатора."""
+        return None if value == "" else value
+
+    @field_validator("lead_email")
+    @classmethod
+    def valid_email(cls, value: str | None) -> str | None:
+        """Email проверяется как EmailStr, с кэшем повторов."""
+        return None if value is None else normalize_email(value)
+
+
 class ContactResponse(ContactBase):
     """Схема ответа с данными обращения."""
 
@@ -52,3 +139,27 @@ class ContactWithDetails(ContactResponse):
     lead_name: str | None = None
     operator_name: str | None = None
     source_name: str | None = None
+
+
+class ContactResolveRequest(BaseModel):
+    """Схема для закрытия нескольких обращений."""
+
+    contact_ids: list[int] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.contacts_batch_max_size,
+        description="ID обращений",
+    )
+
+
+class ContactBatchResult(BaseModel):
+    """
+    Результат обработки одного обращения из пакета.
+
+    Заполнено либо поле contact, либо error.
+    """
+
+    contact: ContactResponse | None = Field(
+        None, description="Созданное обращение"
+    )
+    error: str | None = Field(None, description="Причина отказа")
@@ -29,7 +29,50 @@ class LeadResponse(LeadBase):
     """Схема ответа с данными лида."""
 
     id: int
+    merged_into: int | None = Field(
+        None, description="ID лида, с которым объединен этот дубль"
+    )
     created_at: datetime
     updated_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class LeadIdentityCacheStats(BaseModel):
+    """Метрики кэша идентификаторов лидов."""
+
+    enabled: bool
+    size: int = Field(description="Число ключей (телефоны и email)")
+    max_size: int
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int
+    negative_hits: int = Field(
+        description="Поисков, пропущенных по фильтру Блума"
+    )
+    bloom_ready: bool = Field(description="Фильтр Блума прогрет")
+    bloom_items: int
+    memory_bytes: int = Field(description="Оценка занимаемой памяти")
+
+
+class LeadMergeReport(BaseModel):
+    """Отчет одного прохода слияния дублей лидов."""
+
+    started_at: datetime
+    duration_ms: float = 0.0
+    candidates: int = Field(0, description="Прочитано пар-кандидатов")
+    groups: int = Field(0, description="Групп одного клиента")
+    merged: int = Field(0, description="Объединено дублей")
+    contacts_moved: int = Field(0, description="Перенесено обращений")
+    failed: int = Field(0, description="Групп с ошибкой слияния")
+
+
+class LeadMergeStatus(BaseModel):
+    """Состояние фонового слияния и накопленные метрики."""
+
+    running: bool
+    runs: int
+    merged_total: int
+    contacts_moved_total: int
+    last_report: LeadMergeReport | None = None
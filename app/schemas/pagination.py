@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+
+
+class CursorParams(BaseModel):
+    """
+    Параметры keyset-пагинации списков.
+
+    Записи упорядочены по ID; следующая страница запрашивается с
+    after_id из заголовка X-Next-Cursor предыдущего ответа.
+    """
+
+    after_id: int | None = Field(
+        None, ge=0, description="Вернуть записи с ID больше указанного"
+    )
+    limit: int = Field(
+        settings.page_size_default,
+        ge=1,
+        le=settings.page_size_max,
+        description="Размер страницы",
+    )
+
+
+class PageParams(CursorParams):
+    """Параметры пагинации с проекцией колонок."""
+
+    fields: str | None = Field(
+        None,
+        description="Поля через запятую; загружаются только они (и id)",
+    )
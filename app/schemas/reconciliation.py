@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class ReconciliationReport(BaseModel):
+    """Отчет одного прохода сверки нагрузки операторов."""
+
+    mode: Literal["full", "incremental"]
+    started_at: datetime
+    duration_ms: float = 0.0
+    checked: int = Field(0, description="Проверено операторов")
+    drifted: int = Field(0, description="Операторов с расхождением")
+    repaired: int = Field(0, description="Исправлено")
+    skipped: int = Field(
+        0, description="Пропущено: нагрузка изменилась во время сверки"
+    )
+    drift: int = Field(
+        0, description="Сумма модулей расхождений current_load"
+    )
+    high_water_mark: int | None = Field(
+        None, description="Наибольший учтенный ID обращения"
+    )
+
+
+class ReconciliationStatus(BaseModel):
+    """Состояние фоновой сверки и накопленные метрики."""
+
+    running: bool
+    runs: int
+    repaired_total: int
+    drift_total: int
+    last_report: ReconciliationReport | None = None
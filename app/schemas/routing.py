@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+
+# Версия снимка: "<экземпляр процесса>.<номер>"
+ROUTING_VERSION_PATTERN = r"^[0-9a-f]{8}\.[0-9]+$"
+
+
+class OperatorRoutingState(BaseModel):
+    """Оператор в маршруте источника."""
+
+    operator_id: int
+    weight: int = Field(description="Вес оператора для источника")
+    current_load: int = Field(description="Текущая нагрузка")
+    max_load: int = Field(description="Максимальная нагрузка")
+    has_capacity: bool = Field(description="Есть ли свободное место")
+    probability: float = Field(
+        description="Вероятность выбора: доля веса среди операторов "
+        "со свободным местом"
+    )
+
+
+class SourceRoutingState(BaseModel):
+    """Маршрут источника: активные операторы с весами."""
+
+    source_id: int
+    operators: list[OperatorRoutingState]
+
+
+class RoutingState(BaseModel):
+    """Снимок состояния маршрутизации или дифф от версии since."""
+
+    version: str = Field(description="Версия снимка для параметра since")
+    full: bool = Field(
+        description="Полный снимок (иначе - только изменения после since)"
+    )
+    sources: list[SourceRoutingState]
+    removed_sources: list[int] = Field(
+        default_factory=list,
+        description="Источники, удаленные после since",
+    )
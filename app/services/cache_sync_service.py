@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache.entities import entity_cache
+from app.cache.identity import lead_identity_cache
+from app.cache.routing import routing_table
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.metrics import cache_invalidations_applied_total
+from app.repositories.cache_invalidation_repo import (
+    delete_invalidations_before,
+    get_invalidations_after,
+    get_last_invalidation_id,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def apply_invalidation(kind: str, key: str) -> None:
+    """Сбрасывает кэши процесса по записи журнала."""
+    if kind == "source":
+        routing_table.invalidate_source(int(key))
+        entity_cache.invalidate("source", int(key))
+    elif kind == "operator":
+        routing_table.invalidate_operator(int(key))
+        entity_cache.invalidate("operator", int(key))
+    elif kind == "lead":
+        entity_cache.invalidate("lead", int(key))
+    elif kind == "lead_alias":
+        lead_identity_cache.forget_keys((key,))
+    else:
+        logger.warning("Unknown cache invalidation kind %r", kind)
+        return
+    cache_invalidations_applied_total.inc(kind)
+
+
+def clear_caches() -> None:
+    """Полностью очищает кэши процесса."""
+    routing_table.clear()
+    entity_cache.clear()
+    lead_identity_cache.clear()
+
+
+class CacheSyncJob:
+    """
+    Сброс кэшей процесса по журналу cache_invalidations.
+
+    Изменение источника, веса, оператора или лида пишет в журнал
+    записи в своей транзакции. Каждый процесс раз в interval_s читает
+    записи после последней прочитанной (поиск по первичному ключу) и
+    сбрасывает у себя только перечисленные маршруты, сущности и алиасы.
+    Пустой опрос - один запрос. Собственные записи процесса тоже
+    применяются: повторный сброс безопасен.
+
+    ID выдаются при вставке, а транзакции фиксируются в другом порядке
+    (PostgreSQL), поэтому опрос перечитывает последние GAP_WINDOW
+    номеров и пропускает уже примененные записи. Если процесс не
+    опрашивал журнал дольше retention_s, его записи могли быть удалены
+    очисткой, и кэши очищаются полностью.
+    """
+
+    # Сколько последних номеров журнала перечитывать в поисках
+    # зафиксированных позже записей
+    GAP_WINDOW = 100
+    # Как часто удалять записи старше retention_s
+    PRUNE_INTERVAL_S = 60.0
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        interval_s: float = 0.2,
+        batch_size: int = 500,
+        retention_s: float = 3600.0,
+    ) -> None:
+        self._session_maker = session_maker
+        self._interval = interval_s
+        self._batch_size = batch_size
+        self._retention = retention_s
+        self._task: asyncio.Task | None = None
+        self._last_id: int | None = None
+        self._applied: set[int] = set()
+        self._polled_at: float | None = None
+        self._pruned_at = float("-inf")
+        self.polls = 0
+        self.applied_total = 0
+
+    @property
+    def running(self) -> bool:
+        """Запущена ли фоновая задача."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Запускает периодический опрос журнала."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run_periodically())
+
+    async def stop(self) -> None:
+        """Останавливает периодический опрос журнала."""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run(self) -> int:
+        """
+        Выполняет один опрос журнала.
+
+        Первый опрос только запоминает последнюю запись: до запуска
+        процесса кэши были пусты.
+
+        Returns:
+            Число примененных записей
+        """
+        now = time.monotonic()
+        if (
+            self._polled_at is not None
+            and now - self._polled_at > self._retention
+        ):
+            logger.warning("Cache invalidation log lagged, clearing caches")
+            clear_caches()
+
+        applied = 0
+        async with self._session_maker() as db:
+            if self._last_id is None:
+                self._last_id = await get_last_invalidation_id(db)
+            else:
+                applied = await self._apply_new(db)
+
+            if now - self._pruned_at >= self.PRUNE_INTERVAL_S:
+                cutoff = datetime.now(UTC) - timedelta(
+                    seconds=self._retention
+                )
+                await delete_invalidations_before(db, cutoff)
+                await db.commit()
+                self._pruned_at = now
+
+        self._polled_at = now
+        self.polls += 1
+        self.applied_total += applied
+        return applied
+
+    async def _apply_new(self, db: AsyncSession) -> int:
+        """Применяет записи после последней прочитанной."""
+        applied = 0
+        while True:
+            rows = await get_invalidations_after(
+                db, self._last_id - self.GAP_WINDOW, self._batch_size
+            )
+            for invalidation_id, kind, key in rows:
+                if invalidation_id in self._applied:
+                    continue
+                self._applied.add(invalidation_id)
+                apply_invalidation(kind, key)
+                applied += 1
+            if len(rows) < self._batch_size or rows[-1][0] <= self._last_id:
+                break
+            self._last_id = rows[-1][0]
+        if rows:
+            self._last_id = max(self._last_id, rows[-1][0])
+
+        horizon = self._last_id - self.GAP_WINDOW
+        self._applied = {
+            invalidation_id
+            for invalidation_id in self._applied
+            if invalidation_id > horizon
+        }
+        return applied
+
+    async def _run_periodically(self) -> None:
+        """Запускает опросы с интервалом."""
+        while True:
+            try:
+                await self.run()
+            except Exception:
+                logger.exception("Cache invalidation poll failed")
+            await asyncio.sleep(self._interval)
+
+
+# Экземпляр приложения, запускается в lifespan при включенной настройке
+cache_sync_job = CacheSyncJob(
+    async_session_maker,
+    interval_s=settings.cache_sync_interval_ms / 1000,
+    batch_size=settings.cache_sync_batch_size,
+    retention_s=settings.cache_sync_retention_s,
+)
@@ -1,67 +1,405 @@
+from collections import Counter
+
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.repositories.contact_repo import create_contact
-from app.repositories.lead_repo import find_or_create_lead
-from app.repositories.operator_repo import increment_operator_load
-from app.repositories.source_repo import get_source_by_id
-from app.schemas.contact import ContactCreate, ContactResponse
+from app.cache.identity import lead_identity_cache
+from app.core.metrics import (
+    StageTimer,
+    count_routing_decisions,
+    routing_stage_seconds,
+)
+from app.core.serialization import validate_list
+from app.models.lead import Lead, LeadAlias
+from app.repositories.contact_repo import (
+    get_contact_by_id,
+    insert_contact,
+    insert_contacts,
+    resolve_contact,
+    resolve_contacts,
+)
+from app.repositories.dialect import supports_skip_locked
+from app.repositories.lead_repo import (
+    find_leads_by_identifiers,
+    find_or_create_lead_id,
+    insert_leads,
+    link_lead_identifiers,
+)
+from app.repositories.operator_repo import (
+    add_operator_loads,
+    lock_operator_loads,
+    reserve_operator_capacity_bulk,
+)
+from app.repositories.source_repo import (
+    get_existing_source_ids,
+    get_source_by_id,
+)
+from app.schemas.contact import (
+    ContactBatchResult,
+    ContactCreate,
+    ContactResponse,
+)
+from app.schemas.lead import LeadCreate
 from app.services.distribution_service import (
     distribute_contact_to_operator,
+    get_source_routes,
+    plan_batch_distribution,
 )
 
 
 async def process_new_contact(
-    db: AsyncSession, contact_data: ContactCreate
+    db: AsyncSession, contact_data: ContactCreate, commit: bool = True
 ) -> ContactResponse:
     """
     Обрабатывает новое обращение клиента.
 
+    Все шаги выполняются в одной транзакции с единственным коммитом
+    в конце, без refresh после него. С commit=False транзакция
+    остается открытой: так движок маршрутизации фиксирует несколько
+    обращений одним коммитом.
+
     Алгоритм:
     1. Проверить что источник существует
     2. Найти или создать лида
     3. Выбрать оператора для назначения
     4. Создать обращение
-    5. Увеличить нагрузку оператора
+    5. Зафиксировать транзакцию
+
+    Место у оператора резервируется атомарно на шаге выбора,
+    отдельного увеличения нагрузки не требуется.
+
+    Длительность шагов пишется в гистограмму routing_stage_seconds
+    (этапы source_lookup, lead_upsert, operator_selection, load_update,
+    contact_insert, commit).
     """
+    # Guard clause: проверяем идентификатор лида (без обращения к БД)
+    if not contact_data.lead_phone and not contact_data.lead_email:
+        raise HTTPException(
+            status_code=400,
+            detail="Either lead_phone or lead_email must be provided",
+        )
+
+    timer = StageTimer(routing_stage_seconds)
+
     # Guard clause: проверяем источник
     source = await get_source_by_id(db, contact_data.source_id)
     if not source:
         raise HTTPException(
             status_code=404, detail="Source not found"
         )
+    timer.lap("source_lookup")
 
-    # Guard clause: проверяем идентификатор лида
-    if not contact_data.lead_phone and not contact_data.lead_email:
-        raise HTTPException(
-            status_code=400,
-            detail="Either lead_phone or lead_email must be provided",
-        )
-
-    # Находим или создаем лида
-    lead = await find_or_create_lead(
+    # Находим или создаем лида (повторные клиенты - из кэша)
+    lead_id = await find_or_create_lead_id(
         db,
         phone=contact_data.lead_phone,
         email=contact_data.lead_email,
         name=contact_data.lead_name,
     )
+    timer.lap("lead_upsert")
 
-    # Выбираем оператора
+    # Выбираем оператора и резервируем у него место
     operator_id = await distribute_contact_to_operator(
-        db, lead.id, source.id
+        db, lead_id, source.id, timer
     )
+    timer.lap("operator_selection")
 
     # Создаем обращение
-    contact = await create_contact(
+    contact = await insert_contact(
         db,
-        lead_id=lead.id,
+        lead_id=lead_id,
         source_id=source.id,
         operator_id=operator_id,
         message=contact_data.message,
     )
+    timer.lap("contact_insert")
+
+    if commit:
+        await db.commit()
+        timer.lap("commit")
+    timer.finish()
+    count_routing_decisions((source.id,), (operator_id,))
+    return ContactResponse.model_validate(contact)
+
+
+async def process_contacts_batch(
+    db: AsyncSession, contacts_data: list[ContactCreate]
+) -> list[ContactBatchResult]:
+    """
+    Обрабатывает пакет обращений в одной транзакции.
+
+    Алгоритм:
+    1. Проверить источники одним запросом и идентификаторы лидов
+    2. Найти лидов одним запросом, недостающих создать одним INSERT
+    3. Распределить обращения по одному снимку маршрутов источников
+    4. Зарезервировать места одним UPDATE на весь пакет
+    5. Создать обращения одним INSERT и зафиксировать транзакцию
+
+    Returns:
+        Результат для каждого обращения в исходном порядке
+    """
+    errors: list[str | None] = [None] * len(contacts_data)
+
+    # 1. Проверяем источники и идентификаторы
+    existing_sources = await get_existing_source_ids(
+        db, {contact.source_id for contact in contacts_data}
+    )
+    for index, contact in enumerate(contacts_data):
+        if not contact.lead_phone and not contact.lead_email:
+            errors[index] = "Either lead_phone or lead_email must be provided"
+        elif contact.source_id not in existing_sources:
+            errors[index] = "Source not found"
+
+    accepted = [
+        contact
+        for contact, error in zip(contacts_data, errors, strict=True)
+        if error is None
+    ]
+    if not accepted:
+        return [ContactBatchResult(error=error) for error in errors]
+
+    # 2. Находим или создаем лидов
+    lead_ids = await _resolve_batch_leads(db, accepted)
 
-    # Увеличиваем нагрузку оператора если он назначен
-    if operator_id:
-        await increment_operator_load(db, operator_id)
+    # 3. Распределяем по снимку маршрутов
+    source_ids = [contact.source_id for contact in accepted]
+    routes = await get_source_routes(db, set(source_ids))
 
+    # На PostgreSQL блокируем строки операторов пакета, пропуская
+    # занятые конкурентными транзакциями (SKIP LOCKED)
+    locked_loads = None
+    if supports_skip_locked(db):
+        locked_loads = await lock_operator_loads(
+            db,
+            list(
+                {
+                    state.operator_id
+                    for route in routes.values()
+                    for state, _ in route.candidates
+                }
+            ),
+        )
+    plan = plan_batch_distribution(routes, source_ids, locked_loads)
+
+    # 4. Резервируем места. Если оператор заполнился конкурентно
+    # или был пропущен из-за блокировки, обращения проходят обычный
+    # путь с резервом по одному
+    claimed = await reserve_operator_capacity_bulk(
+        db, Counter(operator_id for operator_id in plan if operator_id)
+    )
+    skipped_sources = (
+        set()
+        if locked_loads is None
+        else {
+            source_id
+            for source_id, route in routes.items()
+            if any(
+                state.operator_id not in locked_loads
+                for state, _ in route.candidates
+            )
+        }
+    )
+    for position, operator_id in enumerate(plan):
+        retry = (
+            operator_id not in claimed
+            if operator_id is not None
+            else source_ids[position] in skipped_sources
+        )
+        if retry:
+            plan[position] = await distribute_contact_to_operator(
+                db, lead_ids[position], source_ids[position]
+            )
+
+    # 5. Создаем обращения
+    contacts = await insert_contacts(
+        db,
+        [
+            {
+                "lead_id": lead_id,
+                "source_id": contact.source_id,
+                "operator_id": operator_id,
+                "message": contact.message,
+            }
+            for contact, lead_id, operator_id in zip(
+                accepted, lead_ids, plan, strict=True
+            )
+        ],
+    )
+    await db.commit()
+    count_routing_decisions(source_ids, plan)
+
+    created = iter(validate_list(ContactResponse, contacts))
+    return [
+        ContactBatchResult(error=error)
+        if error
+        else ContactBatchResult(contact=next(created))
+        for error in errors
+    ]
+
+
+async def _resolve_batch_leads(
+    db: AsyncSession, contacts_data: list[ContactCreate]
+) -> list[int]:
+    """
+    Находит или создает лидов для пакета обращений.
+
+    Повторяющиеся в пакете идентификаторы дают одного лида. Новые
+    идентификаторы найденных лидов становятся их алиасами.
+    Не фиксирует транзакцию.
+
+    Returns:
+        ID лида для каждого обращения в том же порядке
+    """
+    by_key = await find_leads_by_identifiers(
+        db,
+        phones={c.lead_phone for c in contacts_data if c.lead_phone},
+        emails={c.lead_email for c in contacts_data if c.lead_email},
+    )
+
+    # Новые лиды копим по индексу, чтобы создать одним INSERT
+    new_leads: list[LeadCreate] = []
+    new_by_key: dict[str, int] = {}
+    refs: list[Lead | int] = []
+
+    for contact in contacts_data:
+        phone, email = contact.lead_phone, contact.lead_email
+        keys = LeadAlias.keys_for(phone, email)
+
+        lead = next((by_key[key] for key in keys if key in by_key), None)
+        if lead:
+            # Обновляем имя если оно передано и отличается
+            if contact.lead_name and lead.name != contact.lead_name:
+                lead.name = contact.lead_name
+            refs.append(lead)
+            continue
+
+        index = next(
+            (new_by_key[key] for key in keys if key in new_by_key), None
+        )
+        if index is None:
+            index = len(new_leads)
+            new_leads.append(LeadCreate(phone=phone, email=email))
+        new_lead = new_leads[index]
+        if phone and not new_lead.phone:
+            new_lead.phone = phone
+        if email and not new_lead.email:
+            new_lead.email = email
+        if contact.lead_name:
+            new_lead.name = contact.lead_name
+        for key in LeadAlias.keys_for(new_lead.phone, new_lead.email):
+            new_by_key.setdefault(key, index)
+        refs.append(index)
+
+    # Лиды, созданные конкурентно, не вернутся из INSERT - дочитываем
+    created: dict[int, Lead] = {}
+    for lead in await insert_leads(db, new_leads):
+        created[_match_new_lead(lead, new_by_key)] = lead
+    if len(created) < len(new_leads):
+        missing = {
+            index: new_lead
+            for index, new_lead in enumerate(new_leads)
+            if index not in created
+        }
+        found = await find_leads_by_identifiers(
+            db,
+            phones={lead.phone for lead in missing.values() if lead.phone},
+            emails={lead.email for lead in missing.values() if lead.email},
+        )
+        by_key.update(found)
+        for index, new_lead in missing.items():
+            keys = LeadAlias.keys_for(new_lead.phone, new_lead.email)
+            created[index] = next(found[key] for key in keys if key in found)
+
+    leads = [ref if isinstance(ref, Lead) else created[ref] for ref in refs]
+    known = {key: lead.id for key, lead in by_key.items()}
+    for lead in created.values():
+        for key in LeadAlias.keys_for(lead.phone, lead.email):
+            known.setdefault(key, lead.id)
+    await link_lead_identifiers(
+        db,
+        [
+            (lead.id, contact.lead_phone, contact.lead_email)
+            for lead, contact in zip(leads, contacts_data, strict=True)
+        ],
+        known,
+    )
+
+    for lead in {lead.id: lead for lead in leads}.values():
+        # Собственный идентификатор лида может вести к другому лиду,
+        # пока их не объединили
+        phone, email = lead.phone, lead.email
+        if phone and known.get(LeadAlias.phone_key(phone), lead.id) != lead.id:
+            phone = None
+        if email and known.get(LeadAlias.email_key(email), lead.id) != lead.id:
+            email = None
+        lead_identity_cache.stage_put(db, lead.id, phone, email, lead.name)
+    return [lead.id for lead in leads]
+
+
+def _match_new_lead(lead: Lead, by_key: dict[str, int]) -> int | None:
+    """Находит индекс нового лида пакета по телефону или email."""
+    for key in LeadAlias.keys_for(lead.phone, lead.email):
+        if key in by_key:
+            return by_key[key]
+    return None
+
+
+async def resolve_existing_contact(
+    db: AsyncSession, contact_id: int
+) -> ContactResponse:
+    """
+    Закрывает обращение и освобождает место у его оператора.
+
+    Обращение закрывается условным UPDATE, нагрузка уменьшается в той
+    же транзакции; повторное закрытие ничего не меняет.
+
+    Raises:
+        HTTPException: 404 если обращения нет, 409 если оно уже закрыто
+    """
+    contact = await resolve_contact(db, contact_id)
+    if not contact:
+        if await get_contact_by_id(db, contact_id):
+            raise HTTPException(
+                status_code=409, detail="Contact already resolved"
+            )
+        raise HTTPException(status_code=404, detail="Contact not found")
+
+    await _release_operator_loads(db, [contact.operator_id])
+    await db.commit()
     return ContactResponse.model_validate(contact)
+
+
+async def resolve_contacts_bulk(
+    db: AsyncSession, contact_ids: list[int]
+) -> list[ContactResponse]:
+    """
+    Закрывает несколько обращений одной транзакцией.
+
+    Обращения закрываются одним условным UPDATE, нагрузка операторов
+    уменьшается одним UPDATE с суммами по операторам. Отсутствующие и
+    уже закрытые обращения пропускаются.
+
+    Returns:
+        Обращения, закрытые этим запросом
+    """
+    contacts = await resolve_contacts(db, list(set(contact_ids)))
+    await _release_operator_loads(
+        db, [contact.operator_id for contact in contacts]
+    )
+    await db.commit()
+    return validate_list(
+        ContactResponse, sorted(contacts, key=lambda contact: contact.id)
+    )
+
+
+async def _release_operator_loads(
+    db: AsyncSession, operator_ids: list[int | None]
+) -> None:
+    """Уменьшает нагрузку операторов закрытых обращений."""
+    released = Counter(
+        operator_id for operator_id in operator_ids if operator_id
+    )
+    await add_operator_loads(
+        db,
+        {operator_id: -count for operator_id, count in released.items()},
+    )
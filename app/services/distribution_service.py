@@ -1,79 +1,204 @@
-import random
+import time
+from collections import defaultdict
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.operator import Operator
-from app.repositories.operator_repo import get_operators_for_source
+from app.cache.routing import SourceRoute, build_route, routing_table
+from app.core.config import settings
+from app.core.metrics import StageTimer
+from app.core.sampler import WeightedSampler
+from app.repositories.operator_repo import (
+    get_operator_loads,
+    get_operators_for_sources,
+    reserve_operator_capacity,
+)
 
 
-async def select_operator_for_source(
-    db: AsyncSession, source_id: int, lead_id: int
-) -> Operator | None:
+async def get_source_routes(
+    db: AsyncSession, source_ids: set[int]
+) -> dict[int, SourceRoute]:
     """
-    Выбирает оператора для обращения из источника.
+    Получает маршруты источников из таблицы маршрутизации.
 
-    Алгоритм:
-    1. Получить операторов для источника с весами
-    2. Отфильтровать перегруженных и неактивных
-    3. Выбрать случайно с вероятностью пропорциональной весу
-    4. Вернуть ID оператора или None если никто не доступен
+    Отсутствующие в кэше маршруты читаются из БД одним запросом
+    и сохраняются в таблицу.
     """
-    # 1. Получаем операторов с весами
-    operators_with_weights = await get_operators_for_source(db, source_id)
-    if not operators_with_weights:
-        return None
-
-    # 2. Фильтруем доступных (активных и не перегруженных)
-    available = [
-        (operator, weight)
-        for operator, weight in operators_with_weights
-        if operator.is_active and operator.current_load < operator.max_load
-    ]
+    routes: dict[int, SourceRoute] = {}
+    missing: set[int] = set()
+
+    for source_id in source_ids:
+        route = (
+            routing_table.get(source_id)
+            if settings.routing_cache_enabled
+            else None
+        )
+        if route is None:
+            missing.add(source_id)
+        else:
+            routes[source_id] = route
+
+    if not missing:
+        return routes
+
+    generation = routing_table.generation
+    rows: dict[int, list[tuple[int, int, int, int]]] = defaultdict(list)
+    for source_id, *operator_row in await get_operators_for_sources(
+        db, missing
+    ):
+        rows[source_id].append(tuple(operator_row))
+
+    for source_id in missing:
+        routes[source_id] = (
+            routing_table.store(source_id, rows[source_id], generation)
+            if settings.routing_cache_enabled
+            else build_route(source_id, rows[source_id])
+        )
+    return routes
 
-    if not available:
-        return None
-
-    # 3. Взвешенный случайный выбор
-    return weighted_random_choice(available)
 
-
-def weighted_random_choice(
-    operators_with_weights: list[tuple[Operator, int]]
-) -> Operator:
-    """
-    Выбирает оператора взвешенным случайным методом.
-    Вероятность выбора пропорциональна весу оператора.
+async def select_operator_for_source(
+    db: AsyncSession,
+    source_id: int,
+    lead_id: int,
+    timer: StageTimer | None = None,
+) -> int | None:
     """
-    if not operators_with_weights:
-        raise ValueError("Список операторов пуст")
+    Выбирает оператора для обращения из источника и резервирует у него
+    место в текущей транзакции.
 
-    operators, weights = zip(*operators_with_weights, strict=False)
-    total_weight = sum(weights)
+    Алгоритм:
+    1. Получить маршрут источника (операторы с весами) из кэша
+    2. Если по известной нагрузке свободных нет или она читалась
+       дольше routing_load_refresh_s назад - перечитать живую нагрузку
+       (места, освобожденные другими процессами)
+    3. Выбрать оператора из взвешенной выборки маршрута за O(log n);
+       у перегруженных операторов вес в выборке нулевой, а если все
+       настроенные веса нулевые, выбор среди свободных равновероятный
+    4. Зарезервировать место условным UPDATE; если не удалось
+       (оператор заполнился конкурентно) - исключить его и повторить;
+       подсказки о нагрузке обновляются после коммита
+    5. Вернуть ID оператора или None если никто не доступен
+
+    Если передан timer, выбор и резервирование замеряются как этапы
+    operator_selection и load_update.
+    """
+    # 1. Получаем маршрут источника
+    route = (await get_source_routes(db, {source_id}))[source_id]
+    if not route.candidates:
+        return None
 
-    if total_weight == 0:
-        # Если все веса 0, выбираем случайно
-        return random.choice(operators)
+    # 2. Подсказки о нагрузке могли устареть
+    if (
+        route.sampler.total == 0
+        or time.monotonic() - route.loads_read_at
+        >= settings.routing_load_refresh_s
+    ):
+        await _refresh_loads(db, route)
+
+    # Подсказки маршрута меняются только после коммита, поэтому
+    # неудачные кандидаты исключаются из копии выборки
+    sampler = route.sampler
+    while (index := sampler.sample()) is not None:
+        # 3. Взвешенный случайный выбор
+        state, _ = route.candidates[index]
+        if timer is not None:
+            timer.lap("operator_selection")
+
+        # 4. Резервируем место, при неудаче переходим к следующему
+        current_load = await reserve_operator_capacity(db, state.operator_id)
+        if timer is not None:
+            timer.lap("load_update")
+        if current_load is not None:
+            return state.operator_id
+
+        if sampler is route.sampler:
+            sampler = sampler.copy()
+        sampler.update(index, 0)
+
+    return None
+
+
+async def _refresh_loads(db: AsyncSession, route: SourceRoute) -> None:
+    """Обновляет нагрузку кандидатов маршрута из БД."""
+    loads = await get_operator_loads(
+        db, [state.operator_id for state, _ in route.candidates]
+    )
+    for state, _ in route.candidates:
+        state.set_load(loads.get(state.operator_id, state.max_load))
+    route.loads_read_at = time.monotonic()
+
+
+def plan_batch_distribution(
+    routes: dict[int, SourceRoute],
+    source_ids: list[int],
+    locked_loads: dict[int, int] | None = None,
+) -> list[int | None]:
+    """
+    Распределяет пакет обращений по одному снимку маршрутов.
 
-    # Генерируем случайное число от 0 до total_weight
-    random_value = random.uniform(0, total_weight)
+    Выборки маршрутов копируются, нагрузка учитывается локально: когда
+    оператор заполняется, его вес обнуляется во всех копиях. Поэтому в
+    пределах пакета лимиты не превышаются, а кэш не меняется.
+    Резервирование в БД выполняет вызывающий код.
 
-    # Находим оператора соответствующего этому значению
-    cumulative = 0
-    for operator, weight in operators_with_weights:
-        cumulative += weight
-        if random_value <= cumulative:
-            return operator
+    Args:
+        routes: Маршруты источников пакета
+        source_ids: Источник каждого обращения пакета
+        locked_loads: Точная нагрузка заблокированных пакетом
+            операторов; остальные операторы исключаются из выбора
 
-    # Fallback на последнего (на случай ошибок округления)
-    return operators[-1]
+    Returns:
+        ID оператора (или None) для каждого обращения в том же порядке
+    """
+    samplers: dict[int, WeightedSampler] = {}
+    loads: dict[int, int] = {}
+    slots: dict[int, list[tuple[WeightedSampler, int]]] = defaultdict(list)
+
+    for source_id in set(source_ids):
+        route = routes[source_id]
+        sampler = samplers[source_id] = route.sampler.copy()
+        for index, (state, weight) in enumerate(route.candidates):
+            loads[state.operator_id] = state.current_load
+            slots[state.operator_id].append((sampler, index))
+            if locked_loads is None:
+                continue
+
+            if state.operator_id not in locked_loads:
+                sampler.update(index, 0)
+                continue
+            load = loads[state.operator_id] = locked_loads[state.operator_id]
+            sampler.update(
+                index,
+                route.base_weight(weight) if load < state.max_load else 0,
+            )
+
+    plan: list[int | None] = []
+    for source_id in source_ids:
+        index = samplers[source_id].sample()
+        if index is None:
+            plan.append(None)
+            continue
+
+        state, _ = routes[source_id].candidates[index]
+        loads[state.operator_id] += 1
+        if loads[state.operator_id] >= state.max_load:
+            for sampler, slot in slots[state.operator_id]:
+                sampler.update(slot, 0)
+        plan.append(state.operator_id)
+
+    return plan
 
 
 async def distribute_contact_to_operator(
-    db: AsyncSession, lead_id: int, source_id: int
+    db: AsyncSession,
+    lead_id: int,
+    source_id: int,
+    timer: StageTimer | None = None,
 ) -> int | None:
     """
     Распределяет обращение на оператора.
+
+    Нагрузка выбранного оператора уже увеличена в текущей транзакции.
     Возвращает ID выбранного оператора или None.
     """
-    operator = await select_operator_for_source(db, source_id, lead_id)
-    return operator.id if operator else None
+    return await select_operator_for_source(db, source_id, lead_id, timer)
@@ -0,0 +1,368 @@
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.metrics import count_routing_decisions
+from app.models.lead import LeadAlias
+from app.repositories.contact_repo import insert_contact_rows
+from app.repositories.lead_repo import (
+    get_lead_ids_by_identifiers,
+    insert_lead_rows,
+    link_lead_identifiers,
+)
+from app.repositories.operator_repo import (
+    add_operator_loads,
+    get_existing_operator_ids,
+    reserve_operator_capacity_bulk,
+)
+from app.repositories.source_repo import get_existing_source_ids
+from app.schemas.contact import ContactImport
+from app.services.distribution_service import (
+    get_source_routes,
+    plan_batch_distribution,
+)
+
+# Сколько ошибок разбора сохранять для отчета
+MAX_ERROR_SAMPLES = 20
+
+
+@dataclass(slots=True)
+class ImportRow:
+    """
+    Строка NDJSON с историческим обращением.
+
+    Attributes:
+        line_number: Номер строки в файле
+        source_id: ID источника
+        phone: Телефон клиента
+        email: Email клиента
+        name: Имя клиента
+        message: Текст сообщения
+        operator_id: Уже назначенный оператор (история)
+        is_resolved: Обработано ли обращение
+        created_at: Время обращения
+    """
+
+    line_number: int
+    source_id: int
+    phone: str | None
+    email: str | None
+    name: str | None
+    message: str | None
+    operator_id: int | None
+    is_resolved: bool
+    created_at: datetime | None
+
+
+@dataclass
+class ImportStats:
+    """Статистика импорта."""
+
+    rows: int = 0
+    imported: int = 0
+    errors: int = 0
+    leads_created: int = 0
+    routed: int = 0
+    error_samples: list[str] = field(default_factory=list)
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        """Время с начала импорта в секундах."""
+        return time.perf_counter() - self.started_at
+
+    @property
+    def rate(self) -> float:
+        """Скорость импорта в строках в секунду."""
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def add_error(self, line_number: int, reason: str) -> None:
+        """Учитывает ошибочную строку."""
+        self.errors += 1
+        if len(self.error_samples) < MAX_ERROR_SAMPLES:
+            self.error_samples.append(f"строка {line_number}: {reason}")
+
+
+def parse_import_row(line_number: int, line: str) -> ImportRow:
+    """
+    Разбирает строку NDJSON.
+
+    Строка проверяется схемой ContactImport: формат совпадает с телом
+    POST /contacts, дополнительно допускаются operator_id, is_resolved
+    и created_at (ISO 8601).
+
+    Raises:
+        ValueError: Если строка не разбирается или неполна
+    """
+    try:
+        data = ContactImport.model_validate_json(line)
+    except ValidationError as error:
+        first = error.errors()[0]
+        field_name = ".".join(str(part) for part in first["loc"])
+        reason = first["msg"]
+        raise ValueError(
+            f"{field_name}: {reason}" if field_name else reason
+        ) from None
+
+    if not data.lead_phone and not data.lead_email:
+        raise ValueError("нужен lead_phone или lead_email")
+
+    return ImportRow(
+        line_number=line_number,
+        source_id=data.source_id,
+        phone=data.lead_phone,
+        email=data.lead_email,
+        name=data.lead_name,
+        message=data.message,
+        operator_id=data.operator_id,
+        is_resolved=data.is_resolved,
+        created_at=data.created_at,
+    )
+
+
+async def import_contacts(
+    session_maker: async_sessionmaker[AsyncSession],
+    lines: Iterable[str],
+    chunk_size: int = 5000,
+    route: bool = True,
+    on_progress: Callable[[ImportStats], None] | None = None,
+) -> ImportStats:
+    """
+    Импортирует исторические обращения из потока строк NDJSON.
+
+    Строки читаются потоково и обрабатываются пачками по chunk_size,
+    каждая пачка - в своей транзакции, поэтому память не зависит от
+    размера файла.
+
+    Обращения с operator_id сохраняют назначение без маршрутизации,
+    открытые из них увеличивают нагрузку оператора. Открытые обращения
+    без оператора распределяются по весам, если route=True.
+
+    Args:
+        session_maker: Фабрика сессий БД
+        lines: Строки NDJSON
+        chunk_size: Размер пачки
+        route: Распределять ли открытые обращения без оператора
+        on_progress: Вызывается после каждой пачки
+
+    Returns:
+        Статистика импорта
+    """
+    stats = ImportStats()
+    known_sources: set[int] = set()
+    chunk: list[ImportRow] = []
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+
+        stats.rows += 1
+        try:
+            chunk.append(parse_import_row(line_number, line))
+        except ValueError as error:
+            stats.add_error(line_number, str(error))
+
+        if len(chunk) >= chunk_size:
+            async with session_maker() as db:
+                await _import_chunk(db, chunk, route, stats, known_sources)
+            chunk = []
+            if on_progress:
+                on_progress(stats)
+
+    if chunk:
+        async with session_maker() as db:
+            await _import_chunk(db, chunk, route, stats, known_sources)
+    if on_progress:
+        on_progress(stats)
+
+    return stats
+
+
+async def _import_chunk(
+    db: AsyncSession,
+    rows: list[ImportRow],
+    route: bool,
+    stats: ImportStats,
+    known_sources: set[int],
+) -> None:
+    """Импортирует пачку строк в одной транзакции."""
+    # Проверяем источники (найденные запоминаем между пачками)
+    known_sources |= await get_existing_source_ids(
+        db, {row.source_id for row in rows} - known_sources
+    )
+    known_operators = await get_existing_operator_ids(
+        db, {row.operator_id for row in rows if row.operator_id}
+    )
+
+    valid_rows = []
+    for row in rows:
+        if row.source_id not in known_sources:
+            stats.add_error(row.line_number, "источник не найден")
+        elif row.operator_id and row.operator_id not in known_operators:
+            stats.add_error(row.line_number, "оператор не найден")
+        else:
+            valid_rows.append(row)
+    if not valid_rows:
+        return
+
+    lead_ids = await _resolve_chunk_leads(db, valid_rows, stats)
+    operator_ids = await _assign_chunk_operators(db, valid_rows, route)
+    if route:
+        stats.routed += sum(
+            1
+            for row, operator_id in zip(valid_rows, operator_ids, strict=True)
+            if operator_id and not row.operator_id
+        )
+
+    now = datetime.now(UTC)
+    await insert_contact_rows(
+        db,
+        [
+            {
+                "lead_id": lead_id,
+                "source_id": row.source_id,
+                "operator_id": operator_id,
+                "message": row.message,
+                "is_resolved": row.is_resolved,
+                "created_at": row.created_at or now,
+                "updated_at": row.created_at or now,
+            }
+            for row, lead_id, operator_id in zip(
+                valid_rows, lead_ids, operator_ids, strict=True
+            )
+        ],
+    )
+    await db.commit()
+    stats.imported += len(valid_rows)
+
+
+async def _resolve_chunk_leads(
+    db: AsyncSession, rows: list[ImportRow], stats: ImportStats
+) -> list[int]:
+    """
+    Находит или создает лидов пачки.
+
+    Идентификаторы пачки дедуплицируются, существующие лиды находятся
+    одним чтением алиасов, новые создаются одним INSERT. Новые
+    идентификаторы найденных лидов становятся их алиасами. Не
+    фиксирует транзакцию.
+
+    Returns:
+        ID лида для каждой строки в том же порядке
+    """
+    phones = {row.phone for row in rows if row.phone}
+    emails = {row.email for row in rows if row.email}
+    known = await get_lead_ids_by_identifiers(db, phones, emails)
+
+    def lookup(row: ImportRow) -> int | None:
+        for key in LeadAlias.keys_for(row.phone, row.email):
+            if key in known:
+                return known[key]
+        return None
+
+    def remember(leads: list[tuple[int, str | None, str | None]]) -> None:
+        for lead_id, phone, email in leads:
+            for key in LeadAlias.keys_for(phone, email):
+                known[key] = lead_id
+
+    # Новые лиды, дедуплицированные по телефону и email
+    new_leads: list[dict] = []
+    pending: set[str] = set()
+    for row in rows:
+        keys = LeadAlias.keys_for(row.phone, row.email)
+        if lookup(row) is not None or pending.intersection(keys):
+            continue
+        new_leads.append(
+            {"phone": row.phone, "email": row.email, "name": row.name}
+        )
+        pending.update(keys)
+
+    created = await insert_lead_rows(db, new_leads)
+    stats.leads_created += len(created)
+    remember(created)
+
+    # Лиды, созданные конкурентно, не вернулись из INSERT - дочитываем
+    if len(created) < len(new_leads):
+        missing = [
+            lead
+            for lead in new_leads
+            if not any(
+                key in known
+                for key in LeadAlias.keys_for(lead["phone"], lead["email"])
+            )
+        ]
+        known.update(
+            await get_lead_ids_by_identifiers(
+                db,
+                phones={lead["phone"] for lead in missing if lead["phone"]},
+                emails={lead["email"] for lead in missing if lead["email"]},
+            )
+        )
+
+    lead_ids = [lookup(row) for row in rows]
+    await link_lead_identifiers(
+        db,
+        [
+            (lead_id, row.phone, row.email)
+            for row, lead_id in zip(rows, lead_ids, strict=True)
+        ],
+        known,
+    )
+    return lead_ids
+
+
+async def _assign_chunk_operators(
+    db: AsyncSession, rows: list[ImportRow], route: bool
+) -> list[int | None]:
+    """
+    Определяет операторов для строк пачки.
+
+    Назначения из истории сохраняются, открытые из них увеличивают
+    нагрузку одним UPDATE. Открытые обращения без оператора
+    распределяются по снимку маршрутов с резервом одним UPDATE;
+    если резерв не удался, обращение остается без оператора.
+
+    Returns:
+        ID оператора (или None) для каждой строки в том же порядке
+    """
+    operator_ids = [row.operator_id for row in rows]
+
+    await add_operator_loads(
+        db,
+        Counter(
+            row.operator_id
+            for row in rows
+            if row.operator_id and not row.is_resolved
+        ),
+    )
+
+    if not route:
+        return operator_ids
+
+    positions = [
+        position
+        for position, row in enumerate(rows)
+        if not row.operator_id and not row.is_resolved
+    ]
+    if not positions:
+        return operator_ids
+
+    source_ids = [rows[position].source_id for position in positions]
+    routes = await get_source_routes(db, set(source_ids))
+    plan = plan_batch_distribution(routes, source_ids)
+    claimed = await reserve_operator_capacity_bulk(
+        db, Counter(operator_id for operator_id in plan if operator_id)
+    )
+
+    for position, operator_id in zip(positions, plan, strict=True):
+        if operator_id in claimed:
+            operator_ids[position] = operator_id
+    count_routing_decisions(
+        source_ids, [operator_ids[position] for position in positions]
+    )
+    return operator_ids
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime
+from functools import partial
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache.identity import lead_identity_cache
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.union_find import DisjointSet
+from app.repositories.contact_repo import move_lead_contacts
+from app.repositories.lead_repo import (
+    get_merge_candidates,
+    get_merged_into,
+    get_merged_leads_with_contacts,
+    merge_leads,
+)
+from app.schemas.lead import LeadMergeReport, LeadMergeStatus
+
+logger = logging.getLogger(__name__)
+
+
+class LeadMergeJob:
+    """
+    Слияние лидов, оказавшихся одним клиентом.
+
+    Пары-кандидаты (телефон и email одного обращения у разных лидов)
+    объединяются в группы через union-find; каноничным становится лид
+    с наименьшим ID. Обращения дублей переносятся пачками по batch_size
+    в коротких транзакциях, затем одна транзакция дочитывает остаток,
+    переносит алиасы и помечает дублей merged_into.
+
+    Строки дублей не удаляются: обращение, записанное по устаревшему
+    ID (кэш другого процесса), не упадет на внешнем ключе, а следующий
+    проход перенесет его к каноничному лиду.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        batch_size: int = 1000,
+        interval_s: float = 300.0,
+    ) -> None:
+        self._session_maker = session_maker
+        self._batch_size = batch_size
+        self._interval = interval_s
+        self._task: asyncio.Task | None = None
+        self.runs = 0
+        self.merged_total = 0
+        self.contacts_moved_total = 0
+        self.last_report: LeadMergeReport | None = None
+
+    @property
+    def running(self) -> bool:
+        """Запущена ли фоновая задача."""
+        return self._task is not None and not self._task.done()
+
+    def status(self) -> LeadMergeStatus:
+        """Возвращает накопленные метрики слияния."""
+        return LeadMergeStatus(
+            running=self.running,
+            runs=self.runs,
+            merged_total=self.merged_total,
+            contacts_moved_total=self.contacts_moved_total,
+            last_report=self.last_report,
+        )
+
+    def start(self) -> None:
+        """Запускает периодическое слияние."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run_periodically())
+
+    async def stop(self) -> None:
+        """Останавливает периодическое слияние."""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run(self) -> LeadMergeReport:
+        """
+        Выполняет один проход слияния.
+
+        Returns:
+            Отчет прохода
+        """
+        report = LeadMergeReport(started_at=datetime.now(UTC))
+        started = time.perf_counter()
+
+        groups = DisjointSet()
+        merged_into: dict[int, int] = {}
+        async with self._session_maker() as db:
+            after = None
+            while True:
+                pairs = await get_merge_candidates(
+                    db, after=after, limit=self._batch_size
+                )
+                for pair in pairs:
+                    groups.union(*pair)
+                merged_into.update(
+                    await get_merged_into(
+                        db, {lead_id for pair in pairs for lead_id in pair}
+                    )
+                )
+                report.candidates += len(pairs)
+                if len(pairs) < self._batch_size:
+                    break
+                after = pairs[-1]
+
+            merged_into.update(
+                await get_merged_leads_with_contacts(
+                    db, limit=self._batch_size
+                )
+            )
+        for pair in merged_into.items():
+            groups.union(*pair)
+
+        for lead_id, duplicate_ids in groups.groups().items():
+            if not duplicate_ids:
+                continue
+            report.groups += 1
+            try:
+                await self._merge_group(lead_id, duplicate_ids, report)
+            except Exception:
+                report.failed += 1
+                logger.exception("Lead merge failed for lead %d", lead_id)
+                continue
+            report.merged += sum(
+                merged_into.get(duplicate_id) != lead_id
+                for duplicate_id in duplicate_ids
+            )
+            await asyncio.sleep(0)
+
+        report.duration_ms = (time.perf_counter() - started) * 1000
+        self.runs += 1
+        self.merged_total += report.merged
+        self.contacts_moved_total += report.contacts_moved
+        self.last_report = report
+
+        if report.merged:
+            logger.info(
+                "Merged %d duplicate leads, moved %d contacts",
+                report.merged,
+                report.contacts_moved,
+            )
+        return report
+
+    async def _merge_group(
+        self, lead_id: int, duplicate_ids: set[int], report: LeadMergeReport
+    ) -> None:
+        """Переносит обращения и алиасы дублей к каноничному лиду."""
+        for duplicate_id in sorted(duplicate_ids):
+            while True:
+                async with self._session_maker() as db:
+                    moved = await move_lead_contacts(
+                        db, duplicate_id, lead_id, self._batch_size
+                    )
+                    await db.commit()
+                report.contacts_moved += moved
+                if moved < self._batch_size:
+                    break
+                await asyncio.sleep(0)
+
+        async with self._session_maker() as db:
+            # Обращения, записанные к дублям во время переноса
+            for duplicate_id in sorted(duplicate_ids):
+                moved = self._batch_size
+                while moved == self._batch_size:
+                    moved = await move_lead_contacts(
+                        db, duplicate_id, lead_id, self._batch_size
+                    )
+                    report.contacts_moved += moved
+
+            keys = await merge_leads(db, lead_id, duplicate_ids)
+            lead_identity_cache.stage(
+                db, partial(lead_identity_cache.forget_keys, keys)
+            )
+            await db.commit()
+
+    async def _run_periodically(self) -> None:
+        """Запускает проходы с интервалом."""
+        while True:
+            try:
+                await self.run()
+            except Exception:
+                logger.exception("Lead merge failed")
+            await asyncio.sleep(self._interval)
+
+
+# Экземпляр приложения, запускается в lifespan при включенной настройке
+lead_merge_job = LeadMergeJob(
+    async_session_maker,
+    batch_size=settings.lead_merge_batch_size,
+    interval_s=settings.lead_merge_interval_s,
+)
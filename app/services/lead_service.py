@@ -1,10 +1,26 @@
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.repositories.contact_repo import get_contacts_by_lead
-from app.repositories.lead_repo import get_lead_by_id, update_lead
+from app.cache.identity import lead_identity_cache
+from app.core.config import settings
+from app.core.serialization import validate_list
+from app.repositories.contact_repo import (
+    get_contact_columns_by_lead,
+    get_contacts_by_lead,
+)
+from app.repositories.lead_repo import (
+    get_lead_by_id,
+    iter_lead_alias_keys,
+    update_lead,
+)
 from app.schemas.contact import ContactResponse
-from app.schemas.lead import LeadResponse, LeadUpdate
+from app.schemas.lead import (
+    LeadIdentityCacheStats,
+    LeadResponse,
+    LeadUpdate,
+)
+from app.schemas.pagination import PageParams
+from app.services.pagination import parse_fields
 
 
 async def get_lead(db: AsyncSession, lead_id: int) -> LeadResponse:
@@ -30,15 +46,67 @@ async def update_existing_lead(
 
 
 async def get_lead_contacts(
-    db: AsyncSession, lead_id: int
-) -> list[ContactResponse]:
+    db: AsyncSession, lead_id: int, page: PageParams
+) -> list[ContactResponse] | list[dict]:
     """
-    Получает все обращения лида.
+    Получает страницу обращений лида.
+
+    С параметром fields загружаются только запрошенные колонки и
+    возвращаются словари.
     """
     # Проверяем что лид существует
     lead = await get_lead_by_id(db, lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
 
-    contacts = await get_contacts_by_lead(db, lead_id)
-    return [ContactResponse.model_validate(c) for c in contacts]
+    fields = parse_fields(page.fields, ContactResponse)
+    if fields:
+        return await get_contact_columns_by_lead(
+            db, lead_id, fields, page.after_id, page.limit
+        )
+
+    contacts = await get_contacts_by_lead(
+        db, lead_id, page.after_id, page.limit
+    )
+    return validate_list(ContactResponse, contacts)
+
+
+async def warm_up_lead_identity_cache(db: AsyncSession) -> int:
+    """
+    Загружает ключи всех алиасов лидов в фильтр Блума кэша.
+
+    Пока фильтр не прогрет, его отрицательные ответы не используются.
+    При сбросе кэшей через журнал (несколько процессов) фильтр не
+    прогревается: алиасы, созданные другими процессами, в него не
+    попадают, и он не может утверждать, что идентификатор новый.
+
+    Returns:
+        Число загруженных алиасов
+    """
+    if not lead_identity_cache.enabled or settings.cache_sync_enabled:
+        return 0
+
+    count = 0
+    async for key in iter_lead_alias_keys(db):
+        lead_identity_cache.add_known_keys((key,))
+        count += 1
+    lead_identity_cache.bloom_ready = True
+    return count
+
+
+def get_lead_identity_cache_stats() -> LeadIdentityCacheStats:
+    """Возвращает метрики кэша идентификаторов лидов."""
+    cache = lead_identity_cache
+    return LeadIdentityCacheStats(
+        enabled=cache.enabled,
+        size=len(cache),
+        max_size=cache.max_size,
+        hits=cache.hits,
+        misses=cache.misses,
+        hit_rate=cache.hit_rate,
+        evictions=cache.evictions,
+        negative_hits=cache.negative_hits,
+        bloom_ready=cache.bloom_ready,
+        bloom_items=cache.bloom.count,
+        memory_bytes=cache.memory_bytes,
+    )
@@ -1,11 +1,13 @@
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.serialization import validate_list
 from app.repositories.operator_repo import (
     create_operator,
     delete_operator,
     get_all_operators,
     get_operator_by_id,
+    get_operator_columns,
     update_operator,
 )
 from app.schemas.operator import (
@@ -13,14 +15,27 @@ from app.schemas.operator import (
     OperatorResponse,
     OperatorUpdate,
 )
+from app.schemas.pagination import PageParams
+from app.services.pagination import parse_fields
 
 
 async def get_operators_list(
-    db: AsyncSession,
-) -> list[OperatorResponse]:
-    """Получает список всех операторов."""
-    operators = await get_all_operators(db)
-    return [OperatorResponse.model_validate(op) for op in operators]
+    db: AsyncSession, page: PageParams
+) -> list[OperatorResponse] | list[dict]:
+    """
+    Получает страницу операторов.
+
+    С параметром fields загружаются только запрошенные колонки и
+    возвращаются словари.
+    """
+    fields = parse_fields(page.fields, OperatorResponse)
+    if fields:
+        return await get_operator_columns(
+            db, fields, page.after_id, page.limit
+        )
+
+    operators = await get_all_operators(db, page.after_id, page.limit)
+    return validate_list(OperatorResponse, operators)
 
 
 async def get_operator(
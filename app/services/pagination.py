@@ -0,0 +1,38 @@
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+
+def parse_fields(
+    fields: str | None, schema: type[BaseModel]
+) -> list[str] | None:
+    """
+    Разбирает параметр fields= в список колонок для проекции.
+
+    ID добавляется всегда: по нему строится курсор следующей страницы.
+
+    Args:
+        fields: Поля через запятую (None - без проекции)
+        schema: Схема ответа, поля которой можно запрашивать
+
+    Returns:
+        Список полей или None
+
+    Raises:
+        HTTPException: Если запрошено неизвестное поле
+    """
+    if fields is None:
+        return None
+
+    names = ["id"]
+    for name in fields.split(","):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+
+    unknown = [name for name in names if name not in schema.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+    return names
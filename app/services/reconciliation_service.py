@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.repositories.contact_repo import (
+    get_max_contact_id,
+    get_operators_with_new_contacts,
+)
+from app.repositories.operator_repo import (
+    get_operator_load_snapshot,
+    repair_operator_loads,
+)
+from app.schemas.reconciliation import (
+    ReconciliationReport,
+    ReconciliationStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ReconciliationJob:
+    """
+    Сверка current_load операторов с числом их открытых обращений.
+
+    Полный проход идет по всем операторам страницами по batch_size.
+    Инкрементальный проверяет только операторов, получивших обращения
+    с ID выше отметки (high-water mark) предыдущего прохода. Обращения,
+    зафиксированные с ID ниже отметки уже после прохода, ловит следующий
+    полный проход.
+
+    Каждая страница читается одним запросом и исправляется условным
+    UPDATE в короткой транзакции, поэтому прием обращений не
+    блокируется, а параллельные изменения нагрузки не затираются.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        batch_size: int = 500,
+        interval_s: float = 60.0,
+        full_every: int = 60,
+    ) -> None:
+        self._session_maker = session_maker
+        self._batch_size = batch_size
+        self._interval = interval_s
+        self._full_every = full_every
+        self._task: asyncio.Task | None = None
+        self.high_water_mark: int | None = None
+        self.runs = 0
+        self.repaired_total = 0
+        self.drift_total = 0
+        self.last_report: ReconciliationReport | None = None
+
+    @property
+    def running(self) -> bool:
+        """Запущена ли фоновая задача."""
+        return self._task is not None and not self._task.done()
+
+    def status(self) -> ReconciliationStatus:
+        """Возвращает накопленные метрики сверки."""
+        return ReconciliationStatus(
+            running=self.running,
+            runs=self.runs,
+            repaired_total=self.repaired_total,
+            drift_total=self.drift_total,
+            last_report=self.last_report,
+        )
+
+    def start(self) -> None:
+        """Запускает периодическую сверку."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run_periodically())
+
+    async def stop(self) -> None:
+        """Останавливает периодическую сверку."""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run(self, full: bool = False) -> ReconciliationReport:
+        """
+        Выполняет один проход сверки.
+
+        Args:
+            full: Полный проход; без отметки проход всегда полный
+
+        Returns:
+            Отчет прохода
+        """
+        full = full or self.high_water_mark is None
+        report = ReconciliationReport(
+            mode="full" if full else "incremental",
+            started_at=datetime.now(UTC),
+        )
+        started = time.perf_counter()
+
+        if full:
+            await self._run_full(report)
+        else:
+            await self._run_incremental(report)
+
+        report.duration_ms = (time.perf_counter() - started) * 1000
+        report.high_water_mark = self.high_water_mark
+        self.runs += 1
+        self.repaired_total += report.repaired
+        self.drift_total += report.drift
+        self.last_report = report
+
+        if report.drifted:
+            logger.warning(
+                "Load drift: %d operators, total %d, repaired %d",
+                report.drifted,
+                report.drift,
+                report.repaired,
+            )
+        return report
+
+    async def _run_full(self, report: ReconciliationReport) -> None:
+        """Проверяет всех операторов страницами по ID."""
+        async with self._session_maker() as db:
+            # Отметку берем до прохода: новее нее проверит следующий
+            high_water_mark = await get_max_contact_id(db) or 0
+
+        after_id = None
+        while True:
+            async with self._session_maker() as db:
+                snapshot = await get_operator_load_snapshot(
+                    db, after_id=after_id, limit=self._batch_size
+                )
+                await self._repair(db, snapshot, report)
+            if len(snapshot) < self._batch_size:
+                break
+            after_id = snapshot[-1][0]
+            await asyncio.sleep(0)
+
+        self.high_water_mark = high_water_mark
+
+    async def _run_incremental(self, report: ReconciliationReport) -> None:
+        """Проверяет операторов с обращениями новее отметки."""
+        async with self._session_maker() as db:
+            operator_ids, high_water_mark = (
+                await get_operators_with_new_contacts(
+                    db, self.high_water_mark
+                )
+            )
+
+        pending = sorted(operator_ids)
+        for start in range(0, len(pending), self._batch_size):
+            async with self._session_maker() as db:
+                snapshot = await get_operator_load_snapshot(
+                    db,
+                    operator_ids=pending[start : start + self._batch_size],
+                )
+                await self._repair(db, snapshot, report)
+            await asyncio.sleep(0)
+
+        self.high_water_mark = high_water_mark
+
+    async def _repair(
+        self,
+        db: AsyncSession,
+        snapshot: list[tuple[int, int, int]],
+        report: ReconciliationReport,
+    ) -> None:
+        """Исправляет расхождения страницы и фиксирует транзакцию."""
+        repairs = {
+            operator_id: (current_load, open_contacts)
+            for operator_id, current_load, open_contacts in snapshot
+            if current_load != open_contacts
+        }
+        report.checked += len(snapshot)
+        report.drifted += len(repairs)
+        report.drift += sum(
+            abs(observed - actual) for observed, actual in repairs.values()
+        )
+        if not repairs:
+            return
+
+        repaired = await repair_operator_loads(db, repairs)
+        await db.commit()
+        report.repaired += len(repaired)
+        report.skipped += len(repairs) - len(repaired)
+
+    async def _run_periodically(self) -> None:
+        """Запускает проходы с интервалом, каждый N-й - полный."""
+        while True:
+            try:
+                await self.run(full=self.runs % self._full_every == 0)
+            except Exception:
+                logger.exception("Load reconciliation failed")
+            await asyncio.sleep(self._interval)
+
+
+# Экземпляр приложения, запускается в lifespan при включенной настройке
+reconciliation_job = ReconciliationJob(
+    async_session_maker,
+    batch_size=settings.reconciliation_batch_size,
+    interval_s=settings.reconciliation_interval_s,
+    full_every=settings.reconciliation_full_every,
+)
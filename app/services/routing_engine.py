@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache.routing import routing_table
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.metrics import routing_stage_seconds
+from app.schemas.contact import ContactCreate, ContactResponse
+from app.services.contact_service import process_new_contact
+
+logger = logging.getLogger(__name__)
+
+_Item = tuple[ContactCreate, asyncio.Future[ContactResponse]]
+
+
+class RoutingEngine:
+    """
+    Единственный писатель обращений с групповым коммитом.
+
+    Обработчики запросов кладут обращения в очередь и ждут подтверждения.
+    Фоновая задача забирает накопившиеся обращения (до max_batch штук или
+    flush_ms миллисекунд), маршрутизирует каждое сразу через
+    process_new_contact и фиксирует всю группу одним коммитом. Нагрузку
+    операторов между запросами держит кэш маршрутов: пока писатель один,
+    резервирование мест в БД не конфликтует.
+
+    Результат обращения возвращается только после коммита его группы.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        flush_ms: int = 2,
+        max_batch: int = 200,
+    ) -> None:
+        self._session_maker = session_maker
+        self._flush_interval = flush_ms / 1000
+        self._max_batch = max_batch
+        self._queue: asyncio.Queue[_Item | None] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        """Запущена ли фоновая задача."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Запускает фоновую задачу в текущем цикле событий."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Дожидается записи принятых обращений и останавливает задачу."""
+        if not self.running:
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, contact_data: ContactCreate) -> ContactResponse:
+        """
+        Ставит обращение в очередь и ждет коммита его группы.
+
+        Raises:
+            HTTPException: Ошибка обработки обращения (как у
+                process_new_contact)
+            RuntimeError: Если движок не запущен
+        """
+        if not self.running:
+            raise RuntimeError("Routing engine is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((contact_data, future))
+        return await future
+
+    async def _run(self) -> None:
+        """Цикл сбора и записи групп."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = loop.time() + self._flush_interval
+            while len(batch) < self._max_batch:
+                timeout = deadline - loop.time()
+                try:
+                    item = (
+                        self._queue.get_nowait()
+                        if timeout <= 0
+                        else await asyncio.wait_for(
+                            self._queue.get(), timeout
+                        )
+                    )
+                except (asyncio.QueueEmpty, TimeoutError):
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                await self._flush(batch)
+            except Exception as error:
+                logger.exception("Routing engine flush failed")
+                for _, future in batch:
+                    _reject(future, error)
+
+    async def _flush(self, batch: list[_Item]) -> None:
+        """
+        Обрабатывает группу в одной транзакции.
+
+        Ошибки проверки (HTTPException) возникают до записи и отклоняют
+        только свое обращение. Если упала сама транзакция, группа
+        откатывается и обрабатывается по одному обращению.
+        """
+        done: list[tuple[asyncio.Future, ContactResponse]] = []
+
+        async with self._session_maker() as db:
+            try:
+                for contact_data, future in batch:
+                    if future.done():
+                        continue
+                    try:
+                        contact = await process_new_contact(
+                            db, contact_data, commit=False
+                        )
+                    except HTTPException as error:
+                        _reject(future, error)
+                        continue
+                    done.append((future, contact))
+                started = time.perf_counter()
+                await db.commit()
+                routing_stage_seconds.observe(
+                    time.perf_counter() - started, "group_commit"
+                )
+            except Exception:
+                logger.exception("Group commit failed, retrying one by one")
+                await db.rollback()
+                # Нагрузка в кэше учитывает откаченные резервы
+                routing_table.clear()
+                await self._flush_one_by_one(
+                    [item for item in batch if not item[1].done()]
+                )
+                return
+
+        for future, contact in done:
+            if not future.done():
+                future.set_result(contact)
+
+    async def _flush_one_by_one(self, batch: list[_Item]) -> None:
+        """Обрабатывает обращения отдельными транзакциями."""
+        for contact_data, future in batch:
+            async with self._session_maker() as db:
+                try:
+                    contact = await process_new_contact(db, contact_data)
+                except Exception as error:
+                    await db.rollback()
+                    routing_table.clear()
+                    _reject(future, error)
+                    continue
+            if not future.done():
+                future.set_result(contact)
+
+
+def _reject(future: asyncio.Future, error: BaseException) -> None:
+    """Завершает ожидание обращения ошибкой."""
+    if not future.done():
+        future.set_exception(error)
+
+
+# Экземпляр приложения, запускается в lifespan при включенной настройке
+routing_engine = RoutingEngine(
+    async_session_maker,
+    flush_ms=settings.routing_engine_flush_ms,
+    max_batch=settings.routing_engine_max_batch,
+)
@@ -0,0 +1,158 @@
+import time
+from collections import defaultdict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache.routing import SourceRoute, routing_table, versions
+from app.core.config import settings
+from app.repositories.operator_repo import (
+    get_operator_loads,
+    get_operators_for_sources,
+)
+from app.repositories.source_repo import get_source_ids
+from app.schemas.routing import (
+    OperatorRoutingState,
+    RoutingState,
+    SourceRoutingState,
+)
+
+
+class RoutingSnapshot:
+    """
+    Снимок состояния маршрутизации для мониторинга.
+
+    Снимок строится из таблицы маршрутизации процесса. БД читается,
+    только если таблица неполна (после изменения весов, операторов или
+    источников: ID источников и недостающие маршруты - по одному
+    запросу) и не чаще refresh_s для обновления нагрузки операторов
+    одним запросом - так видны обращения, распределенные другими
+    процессами. Остальные запросы обходятся без БД.
+
+    Версия снимка имеет вид "<экземпляр>.<номер>": дифф возможен только
+    от версии этого же процесса, иначе отдается полный снимок.
+    """
+
+    # Сколько раз перечитывать маршруты, если таблицу сбросили во время
+    # чтения
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, refresh_s: float) -> None:
+        self.refresh_s = refresh_s
+        self._loads_refreshed_at = float("-inf")
+
+    async def get(
+        self, db: AsyncSession, since: str | None = None
+    ) -> RoutingState:
+        """
+        Возвращает снимок или изменения после версии since.
+
+        Args:
+            db: Сессия БД
+            since: Версия из предыдущего ответа
+
+        Returns:
+            Полный снимок, если since не задан или дифф от него
+            невозможен, иначе источники, изменившиеся после since
+        """
+        await self._sync_routes(db)
+        await self._refresh_loads(db)
+
+        base = self._parse_version(since)
+        full = base is None or base < routing_table.horizon
+        sources = [
+            self._source_state(route)
+            for route in routing_table.routes()
+            if full or self._changed_since(route, base)
+        ]
+        return RoutingState(
+            version=f"{versions.instance}.{versions.value}",
+            full=full,
+            sources=sources,
+            removed_sources=(
+                [] if full else routing_table.removed_since(base)
+            ),
+        )
+
+    def reset(self) -> None:
+        """Сбрасывает отметку обновления нагрузки."""
+        self._loads_refreshed_at = float("-inf")
+
+    async def _sync_routes(self, db: AsyncSession) -> None:
+        """Дочитывает недостающие маршруты всех источников."""
+        for _ in range(self.MAX_ATTEMPTS):
+            if routing_table.complete:
+                return
+
+            generation = routing_table.generation
+            source_ids = await get_source_ids(db)
+            missing = {
+                source_id
+                for source_id in source_ids
+                if not routing_table.has_route(source_id)
+            }
+            rows: dict[int, list[tuple[int, int, int, int]]] = (
+                defaultdict(list)
+            )
+            for source_id, *operator_row in await get_operators_for_sources(
+                db, missing
+            ):
+                rows[source_id].append(tuple(operator_row))
+
+            for source_id in missing:
+                routing_table.store(source_id, rows[source_id], generation)
+            routing_table.publish(source_ids, generation)
+
+    async def _refresh_loads(self, db: AsyncSession) -> None:
+        """Обновляет нагрузку операторов, если прошло refresh_s."""
+        if time.monotonic() - self._loads_refreshed_at < self.refresh_s:
+            return
+
+        loads = await get_operator_loads(db, routing_table.operator_ids)
+        for operator_id, current_load in loads.items():
+            routing_table.set_load(operator_id, current_load)
+        self._loads_refreshed_at = time.monotonic()
+
+    @staticmethod
+    def _parse_version(since: str | None) -> int | None:
+        """Номер версии этого процесса или None."""
+        if since is None:
+            return None
+        instance, _, number = since.partition(".")
+        if instance != versions.instance or not number.isdigit():
+            return None
+        version = int(number)
+        return version if version <= versions.value else None
+
+    @staticmethod
+    def _changed_since(route: SourceRoute, version: int) -> bool:
+        """Изменились ли маршрут или нагрузка его операторов."""
+        return route.version > version or any(
+            state.version > version for state, _ in route.candidates
+        )
+
+    @staticmethod
+    def _source_state(route: SourceRoute) -> SourceRoutingState:
+        """Состояние маршрута с вероятностями выбора операторов."""
+        total = route.sampler.total
+        return SourceRoutingState(
+            source_id=route.source_id,
+            operators=[
+                OperatorRoutingState(
+                    operator_id=state.operator_id,
+                    weight=weight,
+                    current_load=state.current_load,
+                    max_load=state.max_load,
+                    has_capacity=state.has_capacity,
+                    probability=(
+                        route.sampler.weight(index) / total if total else 0.0
+                    ),
+                )
+                for index, (state, weight) in enumerate(route.candidates)
+            ],
+        )
+
+
+# Снимок процесса
+routing_snapshot = RoutingSnapshot(
+    refresh_s=settings.routing_state_refresh_s
+)
@@ -1,15 +1,18 @@
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.serialization import validate_list
 from app.repositories.source_repo import (
     create_source,
     delete_source,
     get_all_sources,
     get_operator_weights,
     get_source_by_id,
+    get_source_columns,
     set_operator_weight,
     update_source,
 )
+from app.schemas.pagination import CursorParams, PageParams
 from app.schemas.source import (
     SourceCreate,
     SourceOperatorWeightCreate,
@@ -17,12 +20,26 @@ from app.schemas.source import (
     SourceResponse,
     SourceUpdate,
 )
+from app.services.pagination import parse_fields
 
 
-async def get_sources_list(db: AsyncSession) -> list[SourceResponse]:
-    """Получает список всех источников."""
-    sources = await get_all_sources(db)
-    return [SourceResponse.model_validate(s) for s in sources]
+async def get_sources_list(
+    db: AsyncSession, page: PageParams
+) -> list[SourceResponse] | list[dict]:
+    """
+    Получает страницу источников.
+
+    С параметром fields загружаются только запрошенные колонки и
+    возвращаются словари.
+    """
+    fields = parse_fields(page.fields, SourceResponse)
+    if fields:
+        return await get_source_columns(
+            db, fields, page.after_id, page.limit
+        )
+
+    sources = await get_all_sources(db, page.after_id, page.limit)
+    return validate_list(SourceResponse, sources)
 
 
 async def get_source(
@@ -88,16 +105,17 @@ async def set_source_operator_weight(
 
 
 async def get_source_operator_weights(
-    db: AsyncSession, source_id: int
+    db: AsyncSession, source_id: int, page: CursorParams
 ) -> list[SourceOperatorWeightResponse]:
     """
-    Получает веса операторов для источника.
+    Получает страницу весов операторов для источника.
+
+    Курсор страницы - ID оператора. Существование источника
+    проверяется отдельным запросом только для пустой страницы.
     """
-    source = await get_source_by_id(db, source_id)
-    if not source:
+    weights = await get_operator_weights(
+        db, source_id, page.after_id, page.limit
+    )
+    if not weights and not await get_source_by_id(db, source_id):
         raise HTTPException(status_code=404, detail="Source not found")
-
-    weights = await get_operator_weights(db, source_id)
-    return [
-        SourceOperatorWeightResponse.model_validate(w) for w in weights
-    ]
+    return validate_list(SourceOperatorWeightResponse, weights)
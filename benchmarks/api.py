@@ -0,0 +1,322 @@
+"""
+Бенчмарк API маршрутизации в процессе, без сервера.
+
+Запросы идут в app.main:app через ASGI-транспорт httpx, зависимости
+get_db/get_read_db подменяются сессиями новой SQLite-базы во временном
+каталоге (с профилем SQLite из настроек). Для каждого сценария
+печатаются пропускная способность и задержки p50/p95/p99; результаты
+сравниваются с сохраненной базовой линией.
+
+Запуск:
+    uv run python -m benchmarks.api --save-baseline   # записать базу
+    uv run python -m benchmarks.api                   # сравнить с ней
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache.identity import lead_identity_cache
+from app.cache.routing import routing_table
+from app.core.database import create_database_engine
+from app.core.dependencies import get_db, get_read_db
+from app.main import app
+from app.models import (
+    Base,
+    Contact,
+    Lead,
+    LeadAlias,
+    Operator,
+    Source,
+    SourceOperatorWeight,
+)
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+# Запрос сценария: получает клиента и номер запроса, возвращает ответ
+Request = Callable[[AsyncClient, int], Awaitable]
+
+
+@dataclass
+class ScenarioResult:
+    """Итог сценария."""
+
+    name: str
+    requests: int
+    concurrency: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+class Bench:
+    """Новая БД, клиент приложения и наполнение для сценариев."""
+
+    def __init__(self, directory: str) -> None:
+        self.engine = create_database_engine(
+            f"sqlite+aiosqlite:///{directory}/bench.db"
+        )
+        self.session_maker = async_sessionmaker(
+            self.engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+    async def __aenter__(self) -> "Bench":
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        async def session():
+            async with self.session_maker() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = session
+        app.dependency_overrides[get_read_db] = session
+        self.client = AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://bench"
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.client.aclose()
+        app.dependency_overrides.clear()
+        await self.engine.dispose()
+
+    async def add_source(self, name: str, operators: int) -> int:
+        """Создает источник с операторами равного веса (max_load 100)."""
+        async with self.session_maker() as db:
+            source = Source(name=name)
+            pool = [
+                Operator(name=f"{name} {i}", max_load=100)
+                for i in range(operators)
+            ]
+            db.add_all([source, *pool])
+            await db.flush()
+            db.add_all(
+                SourceOperatorWeight(
+                    source_id=source.id, operator_id=operator.id, weight=10
+                )
+                for operator in pool
+            )
+            await db.commit()
+            return source.id
+
+    async def add_lead_with_contacts(self, source_id: int, count: int) -> int:
+        """Создает лида с историей обращений."""
+        async with self.session_maker() as db:
+            lead = Lead(phone="+70000000000")
+            db.add(lead)
+            await db.flush()
+            db.add(LeadAlias(identifier=f"p:{lead.phone}", lead_id=lead.id))
+            db.add_all(
+                Contact(lead_id=lead.id, source_id=source_id, message=str(i))
+                for i in range(count)
+            )
+            await db.commit()
+            return lead.id
+
+
+async def run_scenario(
+    bench: Bench,
+    name: str,
+    request: Request,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> ScenarioResult:
+    """
+    Выполняет запросы сценария с заданной параллельностью.
+
+    Первые warmup запросов (с номерами после основных) не измеряются.
+    """
+    for index in range(requests, requests + warmup):
+        await request(bench.client, index)
+
+    latencies: list[float] = []
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        for index in counter:
+            started = time.perf_counter()
+            response = await request(bench.client, index)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                raise RuntimeError(
+                    f"{name}: {response.status_code} {response.text}"
+                )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return ScenarioResult(
+        name=name,
+        requests=requests,
+        concurrency=concurrency,
+        rps=requests / elapsed,
+        p50_ms=percentiles[49] * 1000,
+        p95_ms=percentiles[94] * 1000,
+        p99_ms=percentiles[98] * 1000,
+    )
+
+
+async def run_suite(
+    requests: int, concurrency: int, warmup: int
+) -> list[ScenarioResult]:
+    """Прогоняет все сценарии на новой БД."""
+    routing_table.clear()
+    lead_identity_cache.clear()
+
+    with tempfile.TemporaryDirectory() as directory:
+        async with Bench(directory) as bench:
+            # Емкости хватает, чтобы ingest-сценарии не упирались в лимит
+            source_id = await bench.add_source(
+                "Бот", operators=max(20, (requests + warmup) // 40)
+            )
+            pool_id = await bench.add_source("Большой пул", operators=1000)
+            lead_id = await bench.add_lead_with_contacts(source_id, 500)
+
+            def post_contact(source: int, phone: Callable[[int], str]):
+                return lambda client, i: client.post(
+                    "/api/v1/contacts",
+                    json={
+                        "source_id": source,
+                        "lead_phone": phone(i),
+                        "message": "Здравствуйте",
+                    },
+                )
+
+            def get(url: str):
+                return lambda client, i: client.get(url)
+
+            scenarios: list[tuple[str, Request]] = [
+                (
+                    "single_contact_ingest",
+                    post_contact(source_id, lambda i: f"+71{i:010d}"),
+                ),
+                (
+                    "repeat_lead_ingest",
+                    post_contact(source_id, lambda i: f"+72{i % 50:010d}"),
+                ),
+                (
+                    "large_pool_routing",
+                    post_contact(pool_id, lambda i: f"+73{i:010d}"),
+                ),
+                ("list_operators", get("/api/v1/operators?limit=100")),
+                (
+                    "list_source_weights",
+                    get(f"/api/v1/sources/{pool_id}/operators?limit=100"),
+                ),
+                (
+                    "list_lead_contacts",
+                    get(f"/api/v1/leads/{lead_id}/contacts?limit=100"),
+                ),
+            ]
+            return [
+                await run_scenario(
+                    bench, name, request, requests, concurrency, warmup
+                )
+                for name, request in scenarios
+            ]
+
+
+def compare(
+    results: list[ScenarioResult], baseline: dict, tolerance: float
+) -> list[str]:
+    """
+    Сравнивает результаты с базовой линией.
+
+    Регрессия - падение пропускной способности или рост p95 больше
+    чем на tolerance. Сценарии базы с другой параллельностью не
+    сравниваются.
+
+    Returns:
+        Описания регрессий
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None or base.get("concurrency") != result.concurrency:
+            continue
+        if result.rps < base["rps"] * (1 - tolerance):
+            regressions.append(
+                f"{result.name}: rps {result.rps:.0f} < {base['rps']:.0f}"
+            )
+        if result.p95_ms > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{result.name}: p95 {result.p95_ms:.2f} ms > "
+                f"{base['p95_ms']:.2f} ms"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Записать результаты как новую базовую линию",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Допустимое ухудшение (доля), по умолчанию 0.2",
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(
+        run_suite(args.requests, args.concurrency, args.warmup)
+    )
+    baseline = (
+        json.loads(args.baseline.read_text())
+        if args.baseline.exists()
+        else {}
+    )
+
+    print(
+        f"{'scenario':<24}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'base rps':>10}"
+    )
+    for result in results:
+        base = baseline.get(result.name)
+        base_rps = f"{base['rps']:.0f}" if base else "-"
+        print(
+            f"{result.name:<24}{result.rps:>9.0f}{result.p50_ms:>9.2f}"
+            f"{result.p95_ms:>9.2f}{result.p99_ms:>9.2f}{base_rps:>10}"
+        )
+
+    if args.save_baseline:
+        args.baseline.write_text(
+            json.dumps(
+                {result.name: asdict(result) for result in results},
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Скорость импорта истории обращений (NDJSON).
+
+Сравнивает проверку email через EmailStr с normalize_email (регулярное
+выражение для обычных ASCII-адресов), затем меряет разбор строк
+parse_import_row и импорт тех же строк в новую SQLite-базу во
+временном каталоге. Кэш normalize_email сбрасывается перед каждым
+повтором, поэтому каждый адрес проверяется заново.
+
+Запуск: uv run python -m benchmarks.import_rows [--rows N]
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import timeit
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache.identity import lead_identity_cache
+from app.cache.routing import routing_table
+from app.core.database import create_database_engine
+from app.models import Base, Operator, Source, SourceOperatorWeight
+from app.schemas.contact import _email_adapter, normalize_email
+from app.services.import_service import import_contacts, parse_import_row
+
+
+def make_lines(count: int, email_share: float) -> list[str]:
+    """Строки истории: у доли email_share строк есть email."""
+    email_every = round(1 / email_share) if email_share else 0
+    lines = []
+    for i in range(count):
+        row = {
+            "source_id": 1,
+            "lead_phone": f"+79{i:09d}",
+            "lead_name": "Иван",
+            "message": "Здравствуйте, хочу узнать про тариф",
+            "is_resolved": bool(i % 2),
+            "created_at": "2024-01-01T10:00:00+00:00",
+        }
+        if email_every and i % email_every == 0:
+            row["lead_email"] = f"User{i}@Example.com"
+        if i % 3 == 0:
+            row["operator_id"] = 1
+        lines.append(json.dumps(row, ensure_ascii=False))
+    return lines
+
+
+def check_emails_full(emails: list[str]) -> None:
+    """Проверка каждого адреса EmailStr."""
+    for email in emails:
+        _email_adapter.validate_python(email)
+
+
+def check_emails_fast(emails: list[str]) -> None:
+    """Проверка каждого адреса normalize_email с холодным кэшем."""
+    normalize_email.cache_clear()
+    for email in emails:
+        normalize_email(email)
+
+
+def parse_lines(lines: list[str]) -> None:
+    """Разбор всех строк с холодным кэшем email."""
+    normalize_email.cache_clear()
+    for line_number, line in enumerate(lines, start=1):
+        parse_import_row(line_number, line)
+
+
+async def import_lines(lines: list[str]) -> float:
+    """Импортирует строки в новую БД, возвращает строк в секунду."""
+    routing_table.clear()
+    lead_identity_cache.clear()
+    normalize_email.cache_clear()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_database_engine(
+            f"sqlite+aiosqlite:///{directory}/bench.db"
+        )
+        session_maker = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_maker() as db:
+            db.add(Operator(id=1, name="Оператор", max_load=len(lines)))
+            db.add(Source(id=1, name="Бот"))
+            db.add(SourceOperatorWeight(source_id=1, operator_id=1, weight=1))
+            await db.commit()
+
+        stats = await import_contacts(session_maker, lines)
+        await engine.dispose()
+
+    assert stats.imported == len(lines), stats.error_samples
+    return stats.rate
+
+
+def best_rate(func, items: list, repeat: int) -> float:
+    """Лучшая скорость из repeat прогонов, элементов в секунду."""
+    best = min(timeit.repeat(lambda: func(items), number=1, repeat=repeat))
+    return len(items) / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--email-share", type=float, default=0.33)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = make_lines(args.rows, args.email_share)
+    emails = [
+        json.loads(line)["lead_email"]
+        for line in lines
+        if "lead_email" in line
+    ]
+    assert [normalize_email(email) for email in emails] == [
+        _email_adapter.validate_python(email) for email in emails
+    ]
+
+    print(f"{'stage':<16}{'items/s':>10}")
+    if emails:
+        for name, func in (
+            ("email EmailStr", check_emails_full),
+            ("email fast", check_emails_fast),
+        ):
+            rate = best_rate(func, emails, args.repeat)
+            print(f"{name:<16}{rate:>10.0f}")
+    rate = best_rate(parse_lines, lines, args.repeat)
+    print(f"{'parse rows':<16}{rate:>10.0f}")
+    print(f"{'import rows':<16}{asyncio.run(import_lines(lines)):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Стоимость сериализации списков ответов на один элемент.
+
+Сравнивает прежний путь (model_validate на каждый элемент, затем
+повторная проверка и сериализация по response_model, как делает
+FastAPI) с однократной проверкой через кэшированный TypeAdapter и
+dump_json.
+
+Запуск: uv run python -m benchmarks.serialization [--items N]
+"""
+
+import argparse
+import json
+import timeit
+from datetime import UTC, datetime
+from functools import partial
+
+from pydantic import TypeAdapter
+
+from app.core.serialization import dump_list_json, validate_list
+from app.models.contact import Contact
+from app.models.operator import Operator
+from app.schemas.contact import ContactResponse
+from app.schemas.operator import OperatorResponse
+
+
+def make_operators(count: int) -> list[Operator]:
+    """ORM-объекты операторов без БД."""
+    now = datetime.now(UTC)
+    return [
+        Operator(
+            id=i,
+            name=f"Оператор {i}",
+            is_active=True,
+            max_load=50,
+            current_load=i % 50,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def make_contacts(count: int) -> list[Contact]:
+    """ORM-объекты обращений без БД."""
+    now = datetime.now(UTC)
+    return [
+        Contact(
+            id=i,
+            lead_id=i // 3,
+            source_id=1,
+            operator_id=i % 20 or None,
+            message="Здравствуйте, хочу узнать про тариф",
+            is_resolved=bool(i % 2),
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_path(schema, objects) -> bytes:
+    """model_validate в сервисе + проверка и сериализация response_model."""
+    items = [schema.model_validate(obj) for obj in objects]
+    # FastAPI строит адаптер поля ответа один раз при регистрации роута
+    response_field = legacy_path.adapters.setdefault(
+        schema, TypeAdapter(list[schema])
+    )
+    validated = response_field.validate_python(items, from_attributes=True)
+    content = response_field.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False).encode()
+
+
+legacy_path.adapters = {}
+
+
+def fast_path(schema, objects) -> bytes:
+    """Одна проверка кэшированным TypeAdapter и dump_json."""
+    return dump_list_json(schema, validate_list(schema, objects))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ("OperatorResponse", OperatorResponse, make_operators(args.items)),
+        ("ContactResponse", ContactResponse, make_contacts(args.items)),
+    ]
+    print(f"{'schema':<18}{'path':<8}{'ns/item':>10}")
+    for name, schema, objects in cases:
+        assert json.loads(legacy_path(schema, objects)) == json.loads(
+            fast_path(schema, objects)
+        )
+        results = {}
+        for path_name, path in (("legacy", legacy_path), ("fast", fast_path)):
+            best = min(
+                timeit.repeat(
+                    partial(path, schema, objects),
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+            results[path_name] = best / len(objects) * 1e9
+            print(f"{name:<18}{path_name:<8}{results[path_name]:>10.0f}")
+        print(
+            f"{name:<18}{'speedup':<8}"
+            f"{results['legacy'] / results['fast']:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+Генератор нагрузки на запущенный сервис.
+
+Через API создает операторов (с разным max_load), источники и веса,
+затем параллельно отправляет POST /contacts: повторные клиенты
+выбираются по закону Ципфа, источники - по заданной доле. Часть
+назначенных обращений закрывается, чтобы операторы не упирались в
+лимит. В конце печатает достигнутый RPS, доли ошибок и истекших
+блокировок (503), гистограмму задержек и распределение обращений по
+операторам в сравнении с весами.
+
+Запуск:
+    uv run python scripts/load_test.py --url http://localhost:8000 \\
+        --requests 20000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+import httpx
+
+# Верхние границы корзин гистограммы задержек, мс
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+@dataclass
+class Stats:
+    """Результаты запросов одного вида."""
+
+    latencies: list[float] = field(default_factory=list)
+    ok: int = 0
+    lock_timeouts: int = 0
+    server_errors: int = 0
+    client_errors: int = 0
+    transport_errors: int = 0
+
+    @property
+    def total(self) -> int:
+        return (
+            self.ok
+            + self.lock_timeouts
+            + self.server_errors
+            + self.client_errors
+            + self.transport_errors
+        )
+
+    def record(self, status: int | None, latency: float) -> None:
+        """Учитывает ответ (None - ошибка транспорта или таймаут)."""
+        self.latencies.append(latency)
+        if status is None:
+            self.transport_errors += 1
+        elif status == 503:
+            self.lock_timeouts += 1
+        elif status >= 500:
+            self.server_errors += 1
+        elif status >= 400:
+            self.client_errors += 1
+        else:
+            self.ok += 1
+
+
+@dataclass
+class Topology:
+    """Созданные источники и операторы."""
+
+    # source_id -> доля трафика
+    source_mix: dict[int, float]
+    source_names: dict[int, str]
+    # source_id -> {operator_id: weight}
+    weights: dict[int, dict[int, int]]
+    max_load: dict[int, int]
+
+
+def parse_range(value: str) -> tuple[int, int]:
+    """Разбирает диапазон вида "10-100"."""
+    low, _, high = value.partition("-")
+    low, high = int(low), int(high or low)
+    if low <= 0 or high < low:
+        raise argparse.ArgumentTypeError(f"Некорректный диапазон: {value}")
+    return low, high
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Разбирает долю источников вида "telegram=6,whatsapp=3,site=1"."""
+    mix = {}
+    for part in value.split(","):
+        name, _, share = part.partition("=")
+        mix[name.strip()] = float(share or 1)
+    if not mix or any(share <= 0 for share in mix.values()):
+        raise argparse.ArgumentTypeError(f"Некорректная доля: {value}")
+    return mix
+
+
+def zipf_cum_weights(size: int, exponent: float) -> list[float]:
+    """Накопленные веса рангов 1..size по закону Ципфа."""
+    return list(
+        itertools.accumulate(1 / rank**exponent for rank in range(1, size + 1))
+    )
+
+
+async def post(client: httpx.AsyncClient, url: str, payload: dict) -> dict:
+    """POST с проверкой статуса (для наполнения)."""
+    response = await client.post(url, json=payload)
+    response.raise_for_status()
+    return response.json()
+
+
+async def seed(
+    client: httpx.AsyncClient, args: argparse.Namespace, rng: random.Random
+) -> Topology:
+    """Создает операторов, источники и веса через API."""
+    run = int(time.time())
+    low, high = args.max_load
+    operators = await asyncio.gather(
+        *(
+            post(
+                client,
+                "/api/v1/operators",
+                {
+                    "name": f"load-{run}-{i}",
+                    "is_active": True,
+                    "max_load": rng.randint(low, high),
+                },
+            )
+            for i in range(args.operators)
+        )
+    )
+    sources = await asyncio.gather(
+        *(
+            post(
+                client,
+                "/api/v1/sources",
+                {"name": f"load-{run}-{name}", "description": "load test"},
+            )
+            for name in args.sources
+        )
+    )
+
+    weights: dict[int, dict[int, int]] = {}
+    per_source = args.operators_per_source or len(operators)
+    weight_low, weight_high = args.weights
+    for source in sources:
+        pool = rng.sample(operators, min(per_source, len(operators)))
+        weights[source["id"]] = {
+            operator["id"]: rng.randint(weight_low, weight_high)
+            for operator in pool
+        }
+    await asyncio.gather(
+        *(
+            post(
+                client,
+                f"/api/v1/sources/{source_id}/operators",
+                {"operator_id": operator_id, "weight": weight},
+            )
+            for source_id, pool in weights.items()
+            for operator_id, weight in pool.items()
+        )
+    )
+
+    return Topology(
+        source_mix={
+            source["id"]: share
+            for source, share in zip(
+                sources, args.sources.values(), strict=True
+            )
+        },
+        source_names={source["id"]: source["name"] for source in sources},
+        weights=weights,
+        max_load={
+            operator["id"]: operator["max_load"] for operator in operators
+        },
+    )
+
+
+async def fire(
+    client: httpx.AsyncClient,
+    args: argparse.Namespace,
+    topology: Topology,
+    rng: random.Random,
+) -> tuple[Stats, Stats, dict[int, Counter], float]:
+    """
+    Отправляет обращения параллельно.
+
+    Returns:
+        Статистика POST /contacts, статистика закрытий,
+        распределение (source_id -> Counter операторов) и время, с
+    """
+    run = int(time.time())
+    lead_weights = zipf_cum_weights(args.leads, args.zipf)
+    source_ids = list(topology.source_mix)
+    source_weights = list(
+        itertools.accumulate(topology.source_mix.values())
+    )
+    traffic = [
+        (
+            rng.choices(source_ids, cum_weights=source_weights)[0],
+            rng.choices(range(args.leads), cum_weights=lead_weights)[0],
+        )
+        for _ in range(args.requests)
+    ]
+
+    contacts, resolves = Stats(), Stats()
+    distribution: dict[int, Counter] = defaultdict(Counter)
+    queue = iter(traffic)
+
+    async def request(method: str, url: str, stats: Stats, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            stats.record(None, time.perf_counter() - started)
+            return None
+        stats.record(response.status_code, time.perf_counter() - started)
+        return response
+
+    async def worker() -> None:
+        for source_id, lead in queue:
+            response = await request(
+                "POST",
+                "/api/v1/contacts",
+                contacts,
+                json={
+                    "source_id": source_id,
+                    "lead_phone": f"+79{run % 10**4:04d}{lead:06d}",
+                    "message": "load test",
+                },
+            )
+            if response is None or response.status_code != 201:
+                continue
+            contact = response.json()
+            distribution[source_id][contact["operator_id"]] += 1
+            if contact["operator_id"] and rng.random() < args.resolve_share:
+                await request(
+                    "POST",
+                    f"/api/v1/contacts/{contact['id']}/resolve",
+                    resolves,
+                )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return contacts, resolves, distribution, time.perf_counter() - started
+
+
+def print_stats(name: str, stats: Stats, elapsed: float) -> None:
+    """Печатает RPS, ошибки, перцентили и гистограмму задержек."""
+    if not stats.total:
+        return
+    total = stats.total
+    print(f"\n== {name}: {total} requests, {total / elapsed:.0f} rps")
+    for label, count in (
+        ("ok", stats.ok),
+        ("lock timeouts (503)", stats.lock_timeouts),
+        ("server errors (5xx)", stats.server_errors),
+        ("client errors (4xx)", stats.client_errors),
+        ("transport errors/timeouts", stats.transport_errors),
+    ):
+        print(f"  {label:<28}{count:>8}  {count / total:>7.2%}")
+
+    latencies_ms = [latency * 1000 for latency in stats.latencies]
+    if len(latencies_ms) > 1:
+        percentiles = statistics.quantiles(
+            latencies_ms, n=100, method="inclusive"
+        )
+        print(
+            f"  latency p50 {percentiles[49]:.1f} ms, "
+            f"p95 {percentiles[94]:.1f} ms, p99 {percentiles[98]:.1f} ms, "
+            f"max {max(latencies_ms):.1f} ms"
+        )
+
+    histogram = Counter(
+        bisect.bisect_left(BUCKETS_MS, latency) for latency in latencies_ms
+    )
+    peak = max(histogram.values())
+    for index, bound in enumerate([*BUCKETS_MS, None]):
+        count = histogram.get(index, 0)
+        label = f"<= {bound} ms" if bound else f"> {BUCKETS_MS[-1]} ms"
+        bar = "#" * round(40 * count / peak)
+        print(f"  {label:>12} {count:>8} {bar}")
+
+
+def print_distribution(
+    topology: Topology, distribution: dict[int, Counter]
+) -> None:
+    """Сравнивает доли операторов с долями их весов."""
+    for source_id, pool in topology.weights.items():
+        assigned = distribution[source_id]
+        unassigned = assigned.pop(None, 0)
+        total = sum(assigned.values())
+        print(
+            f"\n== {topology.source_names[source_id]}: "
+            f"{total} assigned, {unassigned} without operator"
+        )
+        if not total:
+            continue
+
+        weight_sum = sum(pool.values())
+        rows = sorted(
+            (
+                (
+                    assigned[operator_id] / total - weight / weight_sum,
+                    operator_id,
+                    weight,
+                )
+                for operator_id, weight in pool.items()
+            ),
+            key=lambda row: abs(row[0]),
+            reverse=True,
+        )
+        # Полная вариация: половина суммы модулей отклонений долей
+        variation = sum(abs(deviation) for deviation, _, _ in rows) / 2
+        print(f"  total variation distance: {variation:.3f}")
+        print(
+            f"  {'operator':>10}{'weight':>8}{'max_load':>10}"
+            f"{'expected':>10}{'actual':>9}"
+        )
+        for deviation, operator_id, weight in rows[:10]:
+            expected = weight / weight_sum
+            print(
+                f"  {operator_id:>10}{weight:>8}"
+                f"{topology.max_load[operator_id]:>10}"
+                f"{expected:>10.2%}{expected + deviation:>9.2%}"
+            )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(
+        max_connections=args.concurrency,
+        max_keepalive_connections=args.concurrency,
+    )
+    async with httpx.AsyncClient(
+        base_url=args.url, timeout=args.timeout, limits=limits
+    ) as client:
+        topology = await seed(client, args, rng)
+        print(
+            f"Seeded {len(topology.max_load)} operators, "
+            f"{len(topology.weights)} sources"
+        )
+        contacts, resolves, distribution, elapsed = await fire(
+            client, args, topology, rng
+        )
+
+    print_stats("POST /contacts", contacts, elapsed)
+    print_stats("POST /contacts/{id}/resolve", resolves, elapsed)
+    print_distribution(topology, distribution)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument(
+        "--leads", type=int, default=5_000, help="Число разных клиентов"
+    )
+    parser.add_argument(
+        "--zipf", type=float, default=1.1, help="Показатель закона Ципфа"
+    )
+    parser.add_argument(
+        "--sources",
+        type=parse_mix,
+        default=parse_mix("telegram=6,whatsapp=3,site=1"),
+        help="Источники и доли трафика: name=share,...",
+    )
+    parser.add_argument("--operators", type=int, default=20)
+    parser.add_argument(
+        "--operators-per-source",
+        type=int,
+        default=0,
+        help="Операторов на источник (0 - все)",
+    )
+    parser.add_argument(
+        "--max-load",
+        type=parse_range,
+        default=(10, 100),
+        help="Например 10-100",
+    )
+    parser.add_argument(
+        "--weights", type=parse_range, default=(1, 50), help="Например 1-50"
+    )
+    parser.add_argument(
+        "--resolve-share",
+        type=float,
+        default=0.9,
+        help="Доля назначенных обращений, которые сразу закрываются",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
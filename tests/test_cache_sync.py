@@ -0,0 +1,132 @@
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache.entities import entity_cache
+from app.cache.identity import lead_identity_cache
+from app.cache.routing import routing_table
+from app.core.config import settings
+from app.models.cache_invalidation import CacheInvalidation
+from app.models.operator import Operator
+from app.models.source import Source, SourceOperatorWeight
+from app.repositories.cache_invalidation_repo import log_invalidation
+from app.repositories.source_repo import set_operator_weight
+from app.services.cache_sync_service import CacheSyncJob
+from app.services.distribution_service import get_source_routes
+from app.services.lead_service import warm_up_lead_identity_cache
+
+
+@pytest.fixture
+async def job(db_session, monkeypatch):
+    """Опрос журнала поверх тестовой БД, первый проход уже выполнен."""
+    monkeypatch.setattr(settings, "cache_sync_enabled", True)
+    sync = CacheSyncJob(
+        async_sessionmaker(db_session.bind, class_=AsyncSession)
+    )
+    await sync.run()
+    return sync
+
+
+@pytest.fixture
+async def routed_source(db_session):
+    """Источник с одним оператором и закэшированным маршрутом."""
+    operator = Operator(name="Анна", max_load=10)
+    source = Source(name="Test Bot")
+    db_session.add_all([operator, source])
+    await db_session.commit()
+    db_session.add(
+        SourceOperatorWeight(
+            source_id=source.id, operator_id=operator.id, weight=10
+        )
+    )
+    await db_session.commit()
+    await get_source_routes(db_session, {source.id})
+    return source, operator
+
+
+@pytest.mark.asyncio
+async def test_change_logged_in_transaction(db_session, job, routed_source):
+    """Изменение веса пишет запись журнала вместе с собой."""
+    source, operator = routed_source
+    await set_operator_weight(db_session, source.id, operator.id, 50)
+
+    result = await db_session.execute(
+        select(CacheInvalidation.kind, CacheInvalidation.key)
+    )
+    assert result.all() == [("source", str(source.id))]
+
+
+@pytest.mark.asyncio
+async def test_poll_invalidates_listed_entries(
+    db_session, job, routed_source
+):
+    """Опрос сбрасывает только перечисленные записи, и только раз."""
+    source, operator = routed_source
+    for kind, entity_id in (("operator", operator.id), ("source", source.id)):
+        version = entity_cache.version(kind, entity_id)
+        entity_cache.put(kind, entity_id, b"{}", version)
+    lead_identity_cache.put(1, "+71", None, None)
+
+    log_invalidation(db_session, "operator", operator.id)
+    log_invalidation(db_session, "lead_alias", "p:+71")
+    await db_session.commit()
+
+    assert await job.run() == 2
+    assert not routing_table.has_route(source.id)
+    assert entity_cache.get("operator", operator.id) is None
+    assert entity_cache.get("source", source.id) is not None
+    assert lead_identity_cache.find("+71", None) is None
+    assert await job.run() == 0
+
+
+@pytest.mark.asyncio
+async def test_late_commit_within_gap_window(db_session, job):
+    """Запись с меньшим ID, зафиксированная позже, не теряется."""
+    db_session.add(CacheInvalidation(id=5, kind="source", key="1"))
+    await db_session.commit()
+    assert await job.run() == 1
+
+    db_session.add(CacheInvalidation(id=3, kind="source", key="2"))
+    await db_session.commit()
+    assert await job.run() == 1
+    assert job.applied_total == 2
+
+
+@pytest.mark.asyncio
+async def test_operator_reactivated_by_other_worker(
+    db_session, job, routed_source
+):
+    """Оператор, активированный другим процессом, попадает в маршрут."""
+    source, _ = routed_source
+    inactive = Operator(name="Борис", max_load=10, is_active=False)
+    db_session.add(inactive)
+    await db_session.commit()
+    db_session.add(
+        SourceOperatorWeight(
+            source_id=source.id, operator_id=inactive.id, weight=10
+        )
+    )
+    await db_session.commit()
+    routing_table.invalidate_source(source.id)
+    route = (await get_source_routes(db_session, {source.id}))[source.id]
+    assert inactive.id not in {s.operator_id for s, _ in route.candidates}
+
+    # Другой процесс: изменение и запись журнала без локального сброса
+    await db_session.execute(
+        update(Operator)
+        .where(Operator.id == inactive.id)
+        .values(is_active=True)
+    )
+    log_invalidation(db_session, "operator", inactive.id)
+    await db_session.commit()
+
+    assert await job.run() == 1
+    route = (await get_source_routes(db_session, {source.id}))[source.id]
+    assert inactive.id in {s.operator_id for s, _ in route.candidates}
+
+
+@pytest.mark.asyncio
+async def test_bloom_skip_disabled(db_session, job):
+    """С журналом фильтр Блума не прогревается и не пропускает поиск."""
+    assert await warm_up_lead_identity_cache(db_session) == 0
+    assert lead_identity_cache.may_exist("+79990000000", None)
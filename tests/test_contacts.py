@@ -0,0 +1,185 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select
+
+from app.models.lead import Lead
+from app.models.operator import Operator
+from app.models.source import Source, SourceOperatorWeight
+from app.schemas.contact import ContactCreate
+from app.services.contact_service import (
+    process_contacts_batch,
+    process_new_contact,
+    resolve_contacts_bulk,
+    resolve_existing_contact,
+)
+
+
+@pytest.fixture
+async def routed_source(db_session):
+    """Источник с одним оператором."""
+    operator = Operator(
+        name="Анна", is_active=True, max_load=10, current_load=0
+    )
+    source = Source(name="Test Bot")
+    db_session.add_all([operator, source])
+    await db_session.commit()
+
+    db_session.add(
+        SourceOperatorWeight(
+            source_id=source.id, operator_id=operator.id, weight=10
+        )
+    )
+    await db_session.commit()
+    return source, operator
+
+
+@pytest.mark.asyncio
+async def test_process_new_contact_single_commit(db_session, routed_source):
+    """Обращение обрабатывается одним коммитом."""
+    source, operator = routed_source
+    commits = []
+    event.listen(
+        db_session.sync_session,
+        "after_commit",
+        lambda session: commits.append(session),
+    )
+
+    contact = await process_new_contact(
+        db_session,
+        ContactCreate(
+            source_id=source.id, lead_phone="+79991234567", message="Hi"
+        ),
+    )
+
+    assert len(commits) == 1
+    assert contact.operator_id == operator.id
+    assert contact.created_at is not None
+
+    await db_session.refresh(operator)
+    assert operator.current_load == 1
+
+
+@pytest.mark.asyncio
+async def test_process_new_contact_reuses_lead(db_session, routed_source):
+    """Повторное обращение привязывается к тому же лиду."""
+    source, _ = routed_source
+    first = await process_new_contact(
+        db_session,
+        ContactCreate(source_id=source.id, lead_phone="+79991234567"),
+    )
+    second = await process_new_contact(
+        db_session,
+        ContactCreate(
+            source_id=source.id,
+            lead_phone="+79991234567",
+            lead_name="Иван",
+        ),
+    )
+
+    assert first.lead_id == second.lead_id
+    lead = await db_session.scalar(
+        select(Lead).where(Lead.id == first.lead_id)
+    )
+    assert lead.name == "Иван"
+
+
+@pytest.mark.asyncio
+async def test_process_contacts_batch(db_session, routed_source):
+    """Пакет обрабатывается целиком, ошибки возвращаются по позициям."""
+    source, operator = routed_source
+
+    results = await process_contacts_batch(
+        db_session,
+        [
+            ContactCreate(source_id=source.id, lead_phone="+79990000001"),
+            ContactCreate(source_id=999, lead_phone="+79990000002"),
+            ContactCreate(source_id=source.id),
+            ContactCreate(
+                source_id=source.id,
+                lead_phone="+79990000001",
+                lead_email="lead@example.com",
+            ),
+        ],
+    )
+
+    assert [r.error for r in results] == [
+        None,
+        "Source not found",
+        "Either lead_phone or lead_email must be provided",
+        None,
+    ]
+    assert results[0].contact.lead_id == results[3].contact.lead_id
+    assert results[0].contact.operator_id == operator.id
+
+    await db_session.refresh(operator)
+    assert operator.current_load == 2
+
+
+@pytest.mark.asyncio
+async def test_process_contacts_batch_respects_limits(db_session):
+    """Пакет не превышает лимит оператора."""
+    operator = Operator(
+        name="Анна", is_active=True, max_load=3, current_load=0
+    )
+    source = Source(name="Test Bot")
+    db_session.add_all([operator, source])
+    await db_session.commit()
+    db_session.add(
+        SourceOperatorWeight(
+            source_id=source.id, operator_id=operator.id, weight=10
+        )
+    )
+    await db_session.commit()
+
+    results = await process_contacts_batch(
+        db_session,
+        [
+            ContactCreate(source_id=source.id, lead_phone=f"+7999000000{i}")
+            for i in range(5)
+        ],
+    )
+
+    assigned = [r.contact.operator_id for r in results]
+    assert assigned.count(operator.id) == 3
+    assert assigned.count(None) == 2
+
+
+@pytest.mark.asyncio
+async def test_resolve_contact_releases_load_once(db_session, routed_source):
+    """Закрытие освобождает место у оператора ровно один раз."""
+    source, operator = routed_source
+    contact = await process_new_contact(
+        db_session, ContactCreate(source_id=source.id, lead_phone="+7999")
+    )
+
+    resolved = await resolve_existing_contact(db_session, contact.id)
+    assert resolved.is_resolved
+
+    with pytest.raises(HTTPException) as error:
+        await resolve_existing_contact(db_session, contact.id)
+    assert error.value.status_code == 409
+
+    await db_session.refresh(operator)
+    assert operator.current_load == 0
+
+
+@pytest.mark.asyncio
+async def test_resolve_contacts_bulk(db_session, routed_source):
+    """Пакетное закрытие пропускает закрытые и несуществующие."""
+    source, operator = routed_source
+    contacts = [
+        await process_new_contact(
+            db_session,
+            ContactCreate(source_id=source.id, lead_phone=f"+7999{i}"),
+        )
+        for i in range(3)
+    ]
+    await resolve_existing_contact(db_session, contacts[0].id)
+
+    resolved = await resolve_contacts_bulk(
+        db_session, [c.id for c in contacts] + [contacts[1].id, 999]
+    )
+
+    assert [c.id for c in resolved] == [contacts[1].id, contacts[2].id]
+    await db_session.refresh(operator)
+    assert operator.current_load == 0
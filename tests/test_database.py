@@ -0,0 +1,108 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.database import (
+    create_database_engine,
+    create_read_engine,
+    is_lock_timeout,
+)
+from app.core.metrics import db_pool_checkout_seconds
+
+
+@pytest.mark.asyncio
+async def test_sqlite_profile_applied_on_connect(tmp_path):
+    """Профиль SQLite применяется к каждому подключению."""
+    engine = create_database_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'profile.db'}"
+    )
+
+    async with engine.connect() as connection:
+        journal_mode = await connection.scalar(text("PRAGMA journal_mode"))
+        synchronous = await connection.scalar(text("PRAGMA synchronous"))
+        busy_timeout = await connection.scalar(text("PRAGMA busy_timeout"))
+
+    await engine.dispose()
+
+    assert journal_mode == "wal"
+    assert synchronous == 1  # NORMAL
+    assert busy_timeout == 5000
+
+
+@pytest.mark.asyncio
+async def test_read_only_engine_rejects_writes(tmp_path):
+    """Подключения пула чтения не могут писать."""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'read_only.db'}"
+    engine = create_database_engine(url)
+    read_engine = create_database_engine(url, read_only=True)
+
+    async with engine.begin() as connection:
+        await connection.execute(text("CREATE TABLE t (id INTEGER)"))
+
+    async with read_engine.connect() as connection:
+        assert await connection.scalar(text("SELECT count(*) FROM t")) == 0
+        with pytest.raises(OperationalError):
+            await connection.execute(text("INSERT INTO t VALUES (1)"))
+
+    await read_engine.dispose()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_read_engine_for_memory_database(tmp_path, monkeypatch):
+    """SQLite в памяти читается через основной пул."""
+    monkeypatch.setattr(settings, "sqlite_read_pool_enabled", True)
+    memory_engine = create_database_engine("sqlite+aiosqlite:///:memory:")
+    file_url = f"sqlite+aiosqlite:///{tmp_path / 'read.db'}"
+    file_engine = create_database_engine(file_url)
+
+    file_read_engine = create_read_engine(file_url, file_engine)
+
+    assert create_read_engine(
+        "sqlite+aiosqlite:///:memory:", memory_engine
+    ) is memory_engine
+    assert file_read_engine is not file_engine
+    await file_read_engine.dispose()
+    await file_engine.dispose()
+    await memory_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_checkout_timed(tmp_path):
+    """Каждое получение подключения из пула попадает в метрику."""
+    engine = create_database_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}"
+    )
+    before = db_pool_checkout_seconds.labels().count
+
+    for _ in range(3):
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    await engine.dispose()
+
+    assert db_pool_checkout_seconds.labels().count == before + 3
+
+
+@pytest.mark.asyncio
+async def test_lock_timeout_detected(tmp_path):
+    """Истекшее ожидание блокировки SQLite распознается."""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'locked.db'}"
+    engine = create_database_engine(url)
+    other_engine = create_database_engine(url)
+
+    async with engine.connect() as connection:
+        await connection.execute(text("CREATE TABLE t (id INTEGER)"))
+        await connection.commit()
+        await connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+        async with other_engine.connect() as other:
+            await other.execute(text("PRAGMA busy_timeout = 0"))
+            with pytest.raises(OperationalError) as error:
+                await other.execute(text("INSERT INTO t VALUES (1)"))
+        await connection.rollback()
+
+    await engine.dispose()
+    await other_engine.dispose()
+
+    assert is_lock_timeout(error.value)
@@ -1,38 +1,58 @@
 from collections import Counter
 
 import pytest
+from sqlalchemy import text
 
+from app.cache.routing import build_route
+from app.core.config import settings
 from app.models.operator import Operator
 from app.models.source import Source, SourceOperatorWeight
 from app.repositories.lead_repo import create_lead
+from app.repositories.operator_repo import update_operator
+from app.repositories.source_repo import set_operator_weight
 from app.schemas.lead import LeadCreate
+from app.schemas.operator import OperatorUpdate
 from app.services.distribution_service import (
     distribute_contact_to_operator,
-    weighted_random_choice,
+    get_source_routes,
+    plan_batch_distribution,
 )
 
 
 @pytest.mark.asyncio
-async def test_weighted_random_choice():
-    """Проверяет базовую логику взвешенного выбора."""
-    op1 = Operator(
-        id=1, name="Op1", is_active=True, max_load=100, current_load=0
-    )
-    op2 = Operator(
-        id=2, name="Op2", is_active=True, max_load=100, current_load=0
+async def test_zero_weights_pick_uniformly(db_session):
+    """Если все веса нулевые, выбираем среди свободных равновероятно."""
+    free = [
+        Operator(name=f"Op{i}", is_active=True, max_load=100, current_load=0)
+        for i in range(2)
+    ]
+    full = Operator(name="Full", is_active=True, max_load=1, current_load=1)
+    source = Source(name="Test Bot")
+    db_session.add_all([*free, full, source])
+    await db_session.commit()
+    db_session.add_all(
+        SourceOperatorWeight(
+            source_id=source.id, operator_id=operator.id, weight=0
+        )
+        for operator in [*free, full]
     )
+    await db_session.commit()
 
-    operators_with_weights = [(op1, 10), (op2, 30)]
-
-    # Делаем 1000 выборов
-    results = [
-        weighted_random_choice(operators_with_weights) for _ in range(1000)
-    ]
-    counter = Counter(op.id for op in results)
+    assignments = []
+    for i in range(40):
+        lead = await create_lead(
+            db_session, LeadCreate(phone=f"+7999123456{i:03d}")
+        )
+        assignments.append(
+            await distribute_contact_to_operator(
+                db_session, lead.id, source.id
+            )
+        )
+        await db_session.commit()
 
-    # Проверяем что пропорция близка к 1:3
-    ratio = counter[1] / counter[2]
-    assert 0.25 < ratio < 0.40  # ~0.33 с погрешностью
+    counter = Counter(assignments)
+    assert set(counter) == {free[0].id, free[1].id}
+    assert min(counter.values()) >= 5
 
 
 @pytest.mark.asyncio
@@ -79,13 +99,8 @@ async def test_weighted_distribution_proportions(db_session):
         )
         assignments.append(operator_id)
 
-        # Увеличиваем нагрузку оператора
-        if operator_id:
-            if operator_id == op1.id:
-                op1.current_load += 1
-            elif operator_id == op2.id:
-                op2.current_load += 1
-            await db_session.commit()
+        # Нагрузка уже зарезервирована при распределении
+        await db_session.commit()
 
     # Assert - проверяем пропорции
     counter = Counter(assignments)
@@ -128,10 +143,8 @@ async def test_respects_operator_limits(db_session):
         )
         results.append(result)
 
-        # Увеличиваем нагрузку вручную для теста
-        if result == operator.id:
-            operator.current_load += 1
-            await db_session.commit()
+        # Нагрузка уже зарезервирована при распределении
+        await db_session.commit()
 
     # Assert
     assigned = [r for r in results if r == operator.id]
@@ -140,6 +153,9 @@ async def test_respects_operator_limits(db_session):
     assert len(assigned) == 5  # Только 5 назначений
     assert len(not_assigned) == 5  # Остальные без оператора
 
+    await db_session.refresh(operator)
+    assert operator.current_load == 5
+
 
 @pytest.mark.asyncio
 async def test_no_operators_available(db_session):
@@ -155,3 +171,174 @@ async def test_no_operators_available(db_session):
     )
 
     assert result is None
+
+
+@pytest.mark.asyncio
+async def test_reservation_falls_through_to_next_operator(db_session):
+    """
+    Если место у выбранного оператора уже занято конкурентно,
+    обращение уходит следующему кандидату.
+    """
+    full = Operator(name="Занят", is_active=True, max_load=1, current_load=0)
+    free = Operator(
+        name="Свободен", is_active=True, max_load=10, current_load=0
+    )
+    source = Source(name="Test Bot")
+    db_session.add_all([full, free, source])
+    await db_session.commit()
+
+    db_session.add_all(
+        [
+            SourceOperatorWeight(
+                source_id=source.id, operator_id=full.id, weight=1000
+            ),
+            SourceOperatorWeight(
+                source_id=source.id, operator_id=free.id, weight=1
+            ),
+        ]
+    )
+    await db_session.commit()
+
+    # Кэшируем маршрут, затем "другой запрос" занимает последнее место
+    await get_source_routes(db_session, {source.id})
+    await db_session.execute(
+        text("UPDATE operators SET current_load = 1 WHERE id = :id"),
+        {"id": full.id},
+    )
+
+    lead = await create_lead(db_session, LeadCreate(phone="+79991234567"))
+    result = await distribute_contact_to_operator(
+        db_session, lead.id, source.id
+    )
+
+    assert result == free.id
+
+
+@pytest.mark.asyncio
+async def test_routing_table_invalidated_by_weight_change(db_session):
+    """Маршрут кэшируется и сбрасывается при изменении весов."""
+    op1 = Operator(name="Анна", is_active=True, max_load=10, current_load=0)
+    op2 = Operator(name="Борис", is_active=True, max_load=10, current_load=0)
+    source = Source(name="Test Bot")
+    db_session.add_all([op1, op2, source])
+    await db_session.commit()
+    await set_operator_weight(db_session, source.id, op1.id, 10)
+
+    route = (await get_source_routes(db_session, {source.id}))[source.id]
+    cached = (await get_source_routes(db_session, {source.id}))[source.id]
+    assert cached is route
+    assert [s.operator_id for s, _ in route.candidates] == [op1.id]
+
+    await set_operator_weight(db_session, source.id, op2.id, 30)
+
+    route = (await get_source_routes(db_session, {source.id}))[source.id]
+    assert {s.operator_id: w for s, w in route.candidates} == {
+        op1.id: 10,
+        op2.id: 30,
+    }
+
+
+@pytest.mark.asyncio
+async def test_reactivated_operator_returns_to_routes(db_session):
+    """После активации оператор снова попадает в закэшированный маршрут."""
+    op1 = Operator(name="Анна", is_active=True, max_load=10, current_load=0)
+    op2 = Operator(name="Борис", is_active=True, max_load=1, current_load=0)
+    source = Source(name="Test Bot")
+    db_session.add_all([op1, op2, source])
+    await db_session.commit()
+    await set_operator_weight(db_session, source.id, op1.id, 10)
+    await set_operator_weight(db_session, source.id, op2.id, 10)
+    lead = await create_lead(db_session, LeadCreate(phone="+79990000000"))
+
+    await update_operator(db_session, op1.id, OperatorUpdate(is_active=False))
+    assert await distribute_contact_to_operator(
+        db_session, lead.id, source.id
+    ) == op2.id
+    await db_session.commit()
+
+    # Борис заполнен: обращение может получить только Анна
+    await update_operator(db_session, op1.id, OperatorUpdate(is_active=True))
+    assert await distribute_contact_to_operator(
+        db_session, lead.id, source.id
+    ) == op1.id
+
+
+@pytest.mark.asyncio
+async def test_load_hints_updated_after_commit(db_session):
+    """Подсказка о нагрузке меняется только после коммита резерва."""
+    operator = Operator(
+        name="Анна", is_active=True, max_load=1, current_load=0
+    )
+    source = Source(name="Test Bot")
+    db_session.add_all([operator, source])
+    await db_session.commit()
+    await set_operator_weight(db_session, source.id, operator.id, 10)
+    lead = await create_lead(db_session, LeadCreate(phone="+79990000000"))
+    await db_session.commit()
+    operator_id, source_id, lead_id = operator.id, source.id, lead.id
+    route = (await get_source_routes(db_session, {source_id}))[source_id]
+    state, _ = route.candidates[0]
+
+    assert await distribute_contact_to_operator(
+        db_session, lead_id, source_id
+    ) == operator_id
+    assert state.current_load == 0
+    await db_session.rollback()
+    assert state.current_load == 0
+
+    assert await distribute_contact_to_operator(
+        db_session, lead_id, source_id
+    ) == operator_id
+    await db_session.commit()
+    assert state.current_load == 1
+    assert route.sampler.total == 0
+
+
+@pytest.mark.asyncio
+async def test_loads_refreshed_after_ttl(db_session):
+    """Место, освобожденное другим процессом, видно после TTL нагрузки."""
+    busy = Operator(name="Анна", is_active=True, max_load=1, current_load=1)
+    free = Operator(name="Борис", is_active=True, max_load=10, current_load=0)
+    source = Source(name="Test Bot")
+    db_session.add_all([busy, free, source])
+    await db_session.commit()
+    db_session.add_all(
+        [
+            SourceOperatorWeight(
+                source_id=source.id, operator_id=busy.id, weight=1000
+            ),
+            SourceOperatorWeight(
+                source_id=source.id, operator_id=free.id, weight=1
+            ),
+        ]
+    )
+    await db_session.commit()
+    route = (await get_source_routes(db_session, {source.id}))[source.id]
+
+    # Другой процесс закрыл обращение Анны
+    await db_session.execute(
+        text("UPDATE operators SET current_load = 0 WHERE id = :id"),
+        {"id": busy.id},
+    )
+    route.loads_read_at -= settings.routing_load_refresh_s
+
+    lead = await create_lead(db_session, LeadCreate(phone="+79991234567"))
+    result = await distribute_contact_to_operator(
+        db_session, lead.id, source.id
+    )
+
+    assert result == busy.id
+
+
+def test_plan_batch_distribution_uses_locked_loads():
+    """Пакет распределяется только по заблокированным им операторам."""
+    route = build_route(1, [(1, 10, 0, 10), (2, 10, 0, 10), (3, 2, 0, 10)])
+
+    plan = plan_batch_distribution(
+        {1: route}, [1] * 6, locked_loads={2: 7, 3: 0}
+    )
+
+    assert 1 not in plan
+    assert plan.count(3) == 2
+    assert plan.count(2) == 3
+    assert plan.count(None) == 1
@@ -0,0 +1,100 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.cache.entities import EntityCache
+from app.core.dependencies import get_db, get_read_db
+from app.main import app
+from app.models.operator import Operator
+from app.models.source import Source, SourceOperatorWeight
+
+
+@pytest.fixture
+async def client(db_session):
+    """HTTP-клиент приложения поверх тестовой сессии."""
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_read_db] = lambda: db_session
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as http_client:
+        yield http_client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def routed_source(db_session):
+    """Источник с одним оператором."""
+    operator = Operator(name="Анна", max_load=10)
+    source = Source(name="Test Bot")
+    db_session.add_all([operator, source])
+    await db_session.commit()
+    db_session.add(
+        SourceOperatorWeight(
+            source_id=source.id, operator_id=operator.id, weight=10
+        )
+    )
+    await db_session.commit()
+    return source, operator
+
+
+def test_put_skipped_after_invalidation():
+    """Ответ, прочитанный до сброса, не попадает в кэш."""
+    cache = EntityCache(max_size=10, ttl_s=60)
+    version = cache.version("operator", 1)
+    cache.invalidate("operator", 1)
+
+    entry = cache.put("operator", 1, b"{}", version)
+
+    assert entry.etag.startswith('"')
+    assert cache.get("operator", 1) is None
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_without_db(
+    client, routed_source, query_budget
+):
+    """Повторный GET и 304 по If-None-Match обходятся без БД."""
+    _, operator = routed_source
+    url = f"/api/v1/operators/{operator.id}"
+    first = await client.get(url)
+    etag = first.headers["ETag"]
+
+    with query_budget(statements=0):
+        cached = await client.get(url)
+        not_modified = await client.get(
+            url, headers={"If-None-Match": etag}
+        )
+
+    assert cached.json() == first.json()
+    assert cached.headers["ETag"] == etag
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+
+@pytest.mark.asyncio
+async def test_changes_invalidate_entry(client, routed_source):
+    """Изменение и резерв места сбрасывают закэшированного оператора."""
+    source, operator = routed_source
+    url = f"/api/v1/operators/{operator.id}"
+    etag = (await client.get(url)).headers["ETag"]
+
+    await client.patch(url, json={"name": "Мария"})
+    renamed = await client.get(url, headers={"If-None-Match": etag})
+    assert renamed.status_code == 200
+    assert renamed.json()["name"] == "Мария"
+
+    await client.post(
+        "/api/v1/contacts",
+        json={"source_id": source.id, "lead_phone": "+71"},
+    )
+    loaded = await client.get(
+        url, headers={"If-None-Match": renamed.headers["ETag"]}
+    )
+    assert loaded.status_code == 200
+    assert loaded.json()["current_load"] == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_entity_not_cached(client):
+    """404 не кэшируется."""
+    assert (await client.get("/api/v1/sources/999")).status_code == 404
+    assert (await client.get("/api/v1/leads/999")).status_code == 404
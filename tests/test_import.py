@@ -0,0 +1,129 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models.contact import Contact
+from app.models.lead import Lead
+from app.models.operator import Operator
+from app.models.source import Source, SourceOperatorWeight
+from app.schemas.contact import _email_adapter, normalize_email
+from app.services.import_service import import_contacts
+
+
+@pytest.mark.asyncio
+async def test_import_contacts(db_session, tmp_path):
+    """Импорт дедуплицирует лидов, учитывает историю и распределяет."""
+    operator = Operator(
+        name="Анна", is_active=True, max_load=3, current_load=0
+    )
+    source = Source(name="Test Bot")
+    db_session.add_all([operator, source])
+    await db_session.commit()
+    db_session.add(
+        SourceOperatorWeight(
+            source_id=source.id, operator_id=operator.id, weight=10
+        )
+    )
+    await db_session.commit()
+
+    rows = [
+        # История: назначенное открытое и закрытое обращения
+        {
+            "source_id": source.id,
+            "lead_phone": "+70000000001",
+            "operator_id": operator.id,
+            "created_at": "2024-01-01T10:00:00+00:00",
+        },
+        {
+            "source_id": source.id,
+            "lead_phone": "+70000000001",
+            "operator_id": operator.id,
+            "is_resolved": True,
+        },
+        # Открытые без оператора: два распределятся, третье не влезет
+        {"source_id": source.id, "lead_email": "a@example.com"},
+        {"source_id": source.id, "lead_email": "a@example.com"},
+        {"source_id": source.id, "lead_phone": "+70000000002"},
+        # Ошибки
+        {"source_id": 999, "lead_phone": "+70000000003"},
+        {"source_id": source.id},
+    ]
+    path = tmp_path / "contacts.ndjson"
+    path.write_text(
+        "\n".join(json.dumps(row) for row in rows) + "\nnot json\n"
+    )
+
+    session_maker = async_sessionmaker(
+        db_session.bind, expire_on_commit=False
+    )
+    with path.open() as lines:
+        stats = await import_contacts(session_maker, lines, chunk_size=3)
+
+    assert stats.rows == 8
+    assert stats.imported == 5
+    assert stats.errors == 3
+    assert stats.leads_created == 3
+    assert stats.routed == 2
+
+    await db_session.refresh(operator)
+    assert operator.current_load == 3
+
+    assert await db_session.scalar(select(func.count(Lead.id))) == 3
+    assert await db_session.scalar(select(func.count(Contact.id))) == 5
+    unassigned = await db_session.scalar(
+        select(func.count(Contact.id)).where(Contact.operator_id.is_(None))
+    )
+    assert unassigned == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_rows_rejected(db_session):
+    """Строки, не прошедшие проверки ContactCreate, идут в ошибки."""
+    source = Source(name="Test Bot")
+    db_session.add(source)
+    await db_session.commit()
+
+    rows = [
+        {"source_id": source.id, "lead_phone": "+71", "lead_email": ""},
+        {"source_id": source.id, "lead_phone": "+72", "created_at": 1700},
+        {"source_id": source.id, "lead_phone": "+7" + "0" * 30},
+        {"source_id": source.id, "lead_email": "not-an-email"},
+    ]
+    session_maker = async_sessionmaker(
+        db_session.bind, expire_on_commit=False
+    )
+    stats = await import_contacts(
+        session_maker, [json.dumps(row) for row in rows]
+    )
+
+    assert (stats.imported, stats.errors) == (1, 3)
+    assert stats.error_samples[0].startswith("строка 2: created_at")
+
+
+def test_normalize_email_matches_email_str():
+    """Быстрая проверка email дает тот же результат, что EmailStr."""
+    emails = [
+        "Ivan.Petrov@Example.COM",
+        "a+tag@mail-server.co.uk",
+        "a@x.c",
+        "a@x.123",
+        "a..b@example.com",
+        "a@-example.com",
+        "a@example.test",
+        "a@xn--80ak6aa92e.com",
+        "x" * 65 + "@example.com",
+        "ivan@пример.рф",
+    ]
+    for email in emails:
+        try:
+            expected = _email_adapter.validate_python(email)
+        except ValidationError:
+            expected = None
+        try:
+            result = normalize_email(email)
+        except ValueError:
+            result = None
+        assert result == expected, email
@@ -0,0 +1,105 @@
+import pytest
+from sqlalchemy import event, func, select
+
+from app.cache.identity import LeadIdentityCache, lead_identity_cache
+from app.core.bloom import BloomFilter
+from app.models.lead import Lead
+from app.repositories.lead_repo import (
+    find_or_create_lead,
+    find_or_create_lead_id,
+    update_lead,
+)
+from app.schemas.lead import LeadUpdate
+from app.services.lead_service import warm_up_lead_identity_cache
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Добавленные значения всегда находятся, ошибка в пределах."""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"p:+7999{i:07d}")
+
+    assert all(f"p:+7999{i:07d}" in bloom for i in range(1000))
+    false_positives = sum(f"e:{i}@example.com" in bloom for i in range(1000))
+    assert false_positives < 50
+
+
+def test_identity_cache_lru_eviction():
+    """Кэш ограничен по размеру и вытесняет давно неиспользуемые."""
+    cache = LeadIdentityCache(max_size=2, bloom_capacity=100)
+    cache.put(1, "+71", None, None)
+    cache.put(2, "+72", None, None)
+    assert cache.find(phone="+71").lead_id == 1
+    cache.put(3, "+73", None, None)
+
+    assert cache.find(phone="+72") is None
+    assert cache.find(phone="+71").lead_id == 1
+    assert cache.evictions == 1
+    assert cache.hits == 2
+    assert cache.misses == 1
+    assert cache.memory_bytes > cache.bloom.size_bytes
+
+
+@pytest.mark.asyncio
+async def test_repeat_lead_served_from_cache(db_session):
+    """Повторный клиент находится без запросов к leads."""
+    await warm_up_lead_identity_cache(db_session)
+
+    lead_id = await find_or_create_lead_id(db_session, phone="+79991234567")
+    await db_session.commit()
+    assert lead_identity_cache.negative_hits == 1
+
+    statements = []
+    event.listen(
+        db_session.bind.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    again = await find_or_create_lead_id(db_session, phone="+79991234567")
+
+    assert again == lead_id
+    assert statements == []
+    assert lead_identity_cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_ignores_rolled_back_leads(db_session):
+    """Лид из откаченной транзакции не попадает в кэш."""
+    await find_or_create_lead_id(db_session, phone="+79991234567")
+    await db_session.rollback()
+
+    assert lead_identity_cache.find(phone="+79991234567") is None
+
+
+@pytest.mark.asyncio
+async def test_update_lead_refreshes_cache(db_session):
+    """Смена телефона лида убирает старый ключ из кэша."""
+    lead_id = await find_or_create_lead_id(db_session, phone="+79991234567")
+    await db_session.commit()
+
+    await update_lead(db_session, lead_id, LeadUpdate(phone="+79990000000"))
+
+    assert lead_identity_cache.find(phone="+79991234567") is None
+    assert lead_identity_cache.find(phone="+79990000000").lead_id == lead_id
+    assert (await db_session.get(Lead, lead_id)).phone == "+79990000000"
+
+
+@pytest.mark.asyncio
+async def test_alias_email_with_stale_bloom_filter(db_session):
+    """Email-алиас, которого нет в фильтре Блума, не создает дубль."""
+    phone, email = "+79991234567", "ivan@example.com"
+    lead_id = await find_or_create_lead_id(db_session, phone=phone)
+    await db_session.commit()
+    # Email становится только алиасом: leads.email остается пустым
+    assert await find_or_create_lead_id(db_session, phone, email) == lead_id
+    await db_session.commit()
+
+    # Процесс, прогретый до появления алиаса
+    lead_identity_cache.clear()
+    lead_identity_cache.add_known_keys([f"p:{phone}"])
+    lead_identity_cache.bloom_ready = True
+
+    assert await find_or_create_lead_id(db_session, email=email) == lead_id
+    await db_session.commit()
+    assert (await find_or_create_lead(db_session, email=email)).id == lead_id
+    assert await db_session.scalar(select(func.count(Lead.id))) == 1
@@ -0,0 +1,129 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.cache.identity import lead_identity_cache
+from app.core.union_find import DisjointSet
+from app.models.contact import Contact
+from app.models.lead import Lead, LeadMergeCandidate
+from app.models.source import Source
+from app.schemas.contact import ContactCreate
+from app.services.contact_service import (
+    process_contacts_batch,
+    process_new_contact,
+)
+from app.services.lead_merge_service import LeadMergeJob
+
+
+@pytest.fixture
+async def source(db_session):
+    """Источник без операторов."""
+    source = Source(name="Test Bot")
+    db_session.add(source)
+    await db_session.commit()
+    return source
+
+
+def test_disjoint_set_groups_by_smallest_id():
+    """Корнем группы становится наименьший ID."""
+    groups = DisjointSet()
+    groups.union(5, 3)
+    groups.union(7, 5)
+    groups.union(10, 9)
+
+    assert groups.groups() == {3: {5, 7}, 9: {10}}
+
+
+@pytest.mark.asyncio
+async def test_new_identifier_becomes_alias(db_session, source):
+    """Новый email найденного по телефону лида ведет к тому же лиду."""
+    first = await process_new_contact(
+        db_session, ContactCreate(source_id=source.id, lead_phone="+71")
+    )
+    second = await process_new_contact(
+        db_session,
+        ContactCreate(
+            source_id=source.id, lead_phone="+71", lead_email="a@example.com"
+        ),
+    )
+    lead_identity_cache.clear()
+    third = await process_new_contact(
+        db_session,
+        ContactCreate(source_id=source.id, lead_email="a@example.com"),
+    )
+
+    assert first.lead_id == second.lead_id == third.lead_id
+    assert await db_session.scalar(select(func.count(Lead.id))) == 1
+
+
+@pytest.mark.asyncio
+async def test_merge_job_merges_duplicates(db_session, source):
+    """Телефон и email разных лидов объединяют их и обращения."""
+    by_phone = await process_new_contact(
+        db_session, ContactCreate(source_id=source.id, lead_phone="+71")
+    )
+    by_email = await process_new_contact(
+        db_session,
+        ContactCreate(source_id=source.id, lead_email="a@example.com"),
+    )
+    by_other = await process_new_contact(
+        db_session,
+        ContactCreate(source_id=source.id, lead_email="b@example.com"),
+    )
+    # Обращение связывает первого лида со вторым, пакет - второго с третьим
+    both = await process_new_contact(
+        db_session,
+        ContactCreate(
+            source_id=source.id, lead_phone="+71", lead_email="a@example.com"
+        ),
+    )
+    await process_contacts_batch(
+        db_session,
+        [
+            ContactCreate(
+                source_id=source.id,
+                lead_phone="+72",
+                lead_email="b@example.com",
+            ),
+            ContactCreate(
+                source_id=source.id,
+                lead_phone="+72",
+                lead_email="a@example.com",
+            ),
+        ],
+    )
+    assert both.lead_id == by_phone.lead_id
+    assert await db_session.scalar(
+        select(func.count()).select_from(LeadMergeCandidate)
+    ) == 2
+
+    job = LeadMergeJob(
+        async_sessionmaker(db_session.bind, expire_on_commit=False),
+        batch_size=1,
+    )
+    report = await job.run()
+
+    assert report.groups == 1
+    assert report.merged == 2
+    assert report.contacts_moved == 4
+    lead_ids = await db_session.scalars(select(Contact.lead_id).distinct())
+    assert set(lead_ids) == {by_phone.lead_id}
+    assert await db_session.scalar(
+        select(func.count()).select_from(LeadMergeCandidate)
+    ) == 0
+
+    duplicate = await db_session.get(Lead, by_other.lead_id)
+    await db_session.refresh(duplicate)
+    assert duplicate.merged_into == by_phone.lead_id
+
+    # Email дубля теперь ведет к каноничному лиду
+    lead_identity_cache.clear()
+    contact = await process_new_contact(
+        db_session,
+        ContactCreate(source_id=source.id, lead_email="b@example.com"),
+    )
+    assert contact.lead_id == by_phone.lead_id
+    assert by_email.lead_id != by_phone.lead_id
+
+    report = await job.run()
+    assert report.groups == 0
@@ -0,0 +1,44 @@
+import pytest
+
+from app.repositories.lead_repo import create_lead, find_or_create_lead
+from app.schemas.lead import LeadCreate
+
+
+@pytest.mark.asyncio
+async def test_find_or_create_lead_upserts_by_phone(db_session):
+    """Повторный вызов возвращает того же лида и обновляет имя."""
+    first = await find_or_create_lead(db_session, phone="+79991234567")
+    second = await find_or_create_lead(
+        db_session, phone="+79991234567", name="Иван"
+    )
+    third = await find_or_create_lead(db_session, phone="+79991234567")
+
+    assert first.id == second.id == third.id
+    assert third.name == "Иван"
+
+
+@pytest.mark.asyncio
+async def test_find_or_create_lead_prefers_phone_match(db_session):
+    """Телефон и email разных лидов не приводят к ошибке."""
+    by_phone = await create_lead(db_session, LeadCreate(phone="+79990000001"))
+    await create_lead(db_session, LeadCreate(email="lead@example.com"))
+
+    lead = await find_or_create_lead(
+        db_session, phone="+79990000001", email="lead@example.com"
+    )
+
+    assert lead.id == by_phone.id
+
+
+@pytest.mark.asyncio
+async def test_find_or_create_lead_by_email_of_existing(db_session):
+    """Новый телефон с известным email привязывается к лиду по email."""
+    by_email = await create_lead(
+        db_session, LeadCreate(email="lead@example.com")
+    )
+
+    lead = await find_or_create_lead(
+        db_session, phone="+79990000002", email="lead@example.com"
+    )
+
+    assert lead.id == by_email.id
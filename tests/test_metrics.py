@@ -0,0 +1,95 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.metrics import (
+    Histogram,
+    MetricsRegistry,
+    contacts_unassigned_total,
+    routing_decisions_total,
+    routing_stage_seconds,
+)
+from app.main import app
+from app.models.operator import Operator
+from app.models.source import Source, SourceOperatorWeight
+from app.schemas.contact import ContactCreate
+from app.services.contact_service import process_new_contact
+
+
+def test_histogram_text_format():
+    """Корзины в выводе накопленные, последняя - +Inf."""
+    registry = MetricsRegistry()
+    histogram = Histogram(
+        "stage_seconds",
+        "Stage duration",
+        labelnames=("stage",),
+        buckets=(0.01, 0.1),
+        registry=registry,
+    )
+    histogram.observe(0.005, "lookup")
+    histogram.observe(0.05, "lookup")
+    histogram.observe(1.5, "lookup")
+
+    assert registry.render().splitlines() == [
+        "# HELP stage_seconds Stage duration",
+        "# TYPE stage_seconds histogram",
+        'stage_seconds_bucket{stage="lookup",le="0.01"} 1',
+        'stage_seconds_bucket{stage="lookup",le="0.1"} 2',
+        'stage_seconds_bucket{stage="lookup",le="+Inf"} 3',
+        'stage_seconds_sum{stage="lookup"} 1.555',
+        'stage_seconds_count{stage="lookup"} 3',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_contact_stages_and_decisions(db_session):
+    """Обращение пишет все этапы и решение маршрутизации."""
+    routing_stage_seconds.clear()
+    routing_decisions_total.clear()
+    contacts_unassigned_total.clear()
+
+    operator = Operator(name="Анна", max_load=10)
+    source = Source(name="Test Bot")
+    empty = Source(name="Empty Bot")
+    db_session.add_all([operator, source, empty])
+    await db_session.commit()
+    db_session.add(
+        SourceOperatorWeight(
+            source_id=source.id, operator_id=operator.id, weight=10
+        )
+    )
+    await db_session.commit()
+
+    await process_new_contact(
+        db_session, ContactCreate(source_id=source.id, lead_phone="+71")
+    )
+    await process_new_contact(
+        db_session, ContactCreate(source_id=empty.id, lead_phone="+72")
+    )
+
+    for stage in (
+        "source_lookup",
+        "lead_upsert",
+        "operator_selection",
+        "load_update",
+        "contact_insert",
+        "commit",
+    ):
+        assert routing_stage_seconds.labels(stage).count >= 1
+    assert routing_stage_seconds.labels("load_update").count == 1
+    assert routing_decisions_total.value(str(operator.id)) == 1
+    assert contacts_unassigned_total.value(str(empty.id)) == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    """/metrics отдает текстовый формат Prometheus."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE routing_stage_seconds histogram" in response.text
+    assert 'cache_hit_ratio{cache="lead_identity"}' in response.text
+    assert 'cache_hit_ratio{cache="routing"}' in response.text
@@ -0,0 +1,86 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.dependencies import get_read_db
+from app.core.serialization import list_adapter
+from app.main import app
+from app.models.contact import Contact
+from app.models.lead import Lead
+from app.models.operator import Operator
+from app.models.source import Source
+from app.schemas.operator import OperatorResponse
+
+
+@pytest.fixture
+async def client(db_session):
+    """HTTP-клиент приложения поверх тестовой сессии."""
+    app.dependency_overrides[get_read_db] = lambda: db_session
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as http_client:
+        yield http_client
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_lead_contacts_keyset_pagination(db_session, client):
+    """Страницы идут по курсору без пропусков и повторов."""
+    lead = Lead(phone="+79991234567")
+    source = Source(name="Test Bot")
+    db_session.add_all([lead, source])
+    await db_session.commit()
+    db_session.add_all(
+        Contact(lead_id=lead.id, source_id=source.id, message=str(i))
+        for i in range(5)
+    )
+    await db_session.commit()
+
+    url = f"/api/v1/leads/{lead.id}/contacts"
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = await client.get(url, params=params)
+        assert response.status_code == 200
+        seen.extend(contact["id"] for contact in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["after_id"] = cursor
+
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+
+
+@pytest.mark.asyncio
+async def test_list_fields_projection(db_session, client):
+    """fields= возвращает только запрошенные колонки и id."""
+    db_session.add_all([Source(name="A"), Source(name="B")])
+    await db_session.commit()
+
+    response = await client.get(
+        "/api/v1/sources", params={"fields": "name", "limit": 1}
+    )
+    assert response.status_code == 200
+    assert response.json() == [{"id": 1, "name": "A"}]
+    assert response.headers["X-Next-Cursor"] == "1"
+
+    response = await client.get(
+        "/api/v1/sources", params={"fields": "name,secret"}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_list_serialized_by_cached_adapter(db_session, client):
+    """Список отдается JSON из кэшированного адаптера в формате схемы."""
+    operator = Operator(name="Анна", max_load=10)
+    db_session.add(operator)
+    await db_session.commit()
+
+    response = await client.get("/api/v1/operators")
+
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [
+        OperatorResponse.model_validate(operator).model_dump(mode="json")
+    ]
+    assert list_adapter(OperatorResponse) is list_adapter(OperatorResponse)
@@ -0,0 +1,40 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.middleware import ProfilingMiddleware
+from app.core.profiling import sign_profile_token, verify_profile_token
+from app.main import app
+
+
+def test_profile_token_verification():
+    """Токен действителен до срока и только с тем же секретом."""
+    token = sign_profile_token("secret", expires_at=2_000)
+
+    assert verify_profile_token("secret", token, now=1_000)
+    assert not verify_profile_token("secret", token, now=3_000)
+    assert not verify_profile_token("other", token, now=1_000)
+    assert not verify_profile_token("", token, now=1_000)
+    assert not verify_profile_token("secret", "garbage", now=1_000)
+
+
+@pytest.mark.asyncio
+async def test_signed_request_is_profiled(tmp_path):
+    """Запрос с токеном профилируется, без токена - нет."""
+    middleware = ProfilingMiddleware(
+        app, directory=str(tmp_path), secret="secret"
+    )
+    token = sign_profile_token("secret", expires_at=2**40)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=middleware), base_url="http://test"
+    ) as client:
+        plain = await client.get("/health")
+        profiled = await client.get(
+            "/health", headers={"X-Profile-Token": token}
+        )
+
+    assert "X-Profile-Id" not in plain.headers
+    profile_id = profiled.headers["X-Profile-Id"]
+    [pstats_file] = tmp_path.glob(f"{profile_id}_GET_health_*ms.pstats")
+    summary = pstats_file.with_suffix(".txt").read_text()
+    assert summary.startswith("GET /health ")
@@ -0,0 +1,88 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.middleware import QueryStatsMiddleware
+from app.core.dependencies import get_db, get_read_db
+from app.core.query_stats import track_queries
+from app.main import app
+from app.models.operator import Operator
+from app.models.source import Source, SourceOperatorWeight
+
+
+@pytest.fixture
+async def client(db_session):
+    """HTTP-клиент приложения поверх тестовой сессии."""
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_read_db] = lambda: db_session
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as http_client:
+        yield http_client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def source(db_session):
+    """Источник с одним оператором."""
+    operator = Operator(name="Анна", max_load=10)
+    source = Source(name="Test Bot")
+    db_session.add_all([operator, source])
+    await db_session.commit()
+    db_session.add(
+        SourceOperatorWeight(
+            source_id=source.id, operator_id=operator.id, weight=10
+        )
+    )
+    await db_session.commit()
+    return source
+
+
+@pytest.mark.asyncio
+async def test_repeat_contact_budget(client, source, query_budget):
+    """Повторное обращение: источник, резерв, вставка и один коммит."""
+    payload = {"source_id": source.id, "lead_phone": "+71", "message": "1"}
+    response = await client.post("/api/v1/contacts", json=payload)
+    assert response.status_code == 201
+
+    with query_budget(statements=3, commits=1):
+        response = await client.post("/api/v1/contacts", json=payload)
+    assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_weights_page_budget(client, source, query_budget):
+    """Страница весов - один запрос, 404 - только для пустой страницы."""
+    with query_budget(statements=1, commits=0):
+        response = await client.get(f"/api/v1/sources/{source.id}/operators")
+    assert len(response.json()) == 1
+
+    response = await client.get("/api/v1/sources/999/operators")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_update_without_refresh(client, source, query_budget):
+    """Изменение - чтение и UPDATE ... RETURNING, без refresh."""
+    with query_budget(statements=2, commits=1):
+        response = await client.patch(
+            f"/api/v1/sources/{source.id}", json={"description": "new"}
+        )
+    assert response.status_code == 200
+    assert response.json()["updated_at"]
+
+
+@pytest.mark.asyncio
+async def test_debug_headers(db_session, client, source):
+    """С headers=True счетчики запроса уходят в заголовки ответа."""
+    async with AsyncClient(
+        transport=ASGITransport(app=QueryStatsMiddleware(app, headers=True)),
+        base_url="http://test",
+    ) as debug_client:
+        with track_queries() as stats:
+            response = await debug_client.get(f"/api/v1/sources/{source.id}")
+
+    assert response.headers["X-DB-Statements"] == "1"
+    assert response.headers["X-DB-Commits"] == "0"
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
+    # Запросы блока middleware учтены и во внешнем
+    assert stats.statements == 1
@@ -0,0 +1,116 @@
+import re
+
+import pytest
+from sqlalchemy import event
+
+from app.models.operator import Operator
+from app.models.source import Source, SourceOperatorWeight
+from app.repositories import (
+    contact_repo,
+    lead_repo,
+    operator_repo,
+    source_repo,
+)
+from app.schemas.contact import ContactCreate
+from app.services.contact_service import (
+    process_contacts_batch,
+    process_new_contact,
+    resolve_contacts_bulk,
+)
+from tests.conftest import TEST_DATABASE_URL
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL.startswith("sqlite"),
+    reason="EXPLAIN QUERY PLAN есть только в SQLite",
+)
+
+# Большие таблицы: полный проход по ним (в том числе по индексу)
+# недопустим
+LARGE_TABLES = ("contacts", "leads", "source_operator_weights")
+FULL_SCAN = re.compile(rf"\bSCAN ({'|'.join(LARGE_TABLES)})\b")
+
+
+@pytest.mark.asyncio
+async def test_repository_queries_use_indexes(db_session):
+    """Запросы репозиториев к большим таблицам идут по индексам."""
+    operator = Operator(name="Анна", max_load=10)
+    source = Source(name="Test Bot")
+    db_session.add_all([operator, source])
+    await db_session.commit()
+    db_session.add(
+        SourceOperatorWeight(
+            source_id=source.id, operator_id=operator.id, weight=10
+        )
+    )
+    await db_session.commit()
+
+    statements: list[tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(
+            ("SELECT", "UPDATE", "DELETE", "WITH")
+        ):
+            statements.append((statement, parameters))
+
+    sync_engine = db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        contact = await process_new_contact(
+            db_session,
+            ContactCreate(
+                source_id=source.id,
+                lead_phone="+79991234567",
+                lead_email="client@example.com",
+            ),
+        )
+        await process_contacts_batch(
+            db_session,
+            [
+                ContactCreate(source_id=source.id, lead_phone="+79990000001"),
+                ContactCreate(source_id=source.id, lead_email="a@example.com"),
+            ],
+        )
+        await resolve_contacts_bulk(db_session, [contact.id])
+
+        await contact_repo.get_contact_with_details(db_session, contact.id)
+        await contact_repo.get_contacts_by_lead(
+            db_session, contact.lead_id, after_id=0, limit=10
+        )
+        await contact_repo.get_contact_columns_by_lead(
+            db_session, contact.lead_id, ["id", "message"], limit=10
+        )
+        await contact_repo.get_contacts_by_operator(
+            db_session, operator.id, resolved=False
+        )
+        await contact_repo.get_operators_with_new_contacts(db_session, 0)
+        await contact_repo.get_max_contact_id(db_session)
+        await lead_repo.find_lead_by_identifier(
+            db_session, phone="+79991234567", email="client@example.com"
+        )
+        await lead_repo.get_lead_ids_by_identifiers(
+            db_session, {"+79991234567"}, {"client@example.com"}
+        )
+        await lead_repo.get_merged_leads_with_contacts(db_session, limit=10)
+        await contact_repo.move_lead_contacts(
+            db_session, contact.lead_id, contact.lead_id, limit=10
+        )
+        await operator_repo.get_operators_for_source(db_session, source.id)
+        await operator_repo.get_operators_for_sources(
+            db_session, {source.id}
+        )
+        await operator_repo.get_operator_load_snapshot(db_session, limit=10)
+        await source_repo.get_operator_weights(
+            db_session, source.id, after_id=0, limit=10
+        )
+        await db_session.commit()
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    assert statements
+    async with db_session.bind.connect() as conn:
+        for statement, parameters in statements:
+            plan = await conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            )
+            details = "\n".join(row[-1] for row in plan)
+            assert not FULL_SCAN.search(details), (statement, details)
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models.contact import Contact
+from app.models.lead import Lead
+from app.models.operator import Operator
+from app.models.source import Source
+from app.services.reconciliation_service import ReconciliationJob
+
+
+@pytest.mark.asyncio
+async def test_reconciliation_repairs_drift(db_session):
+    """Полный и инкрементальный проходы исправляют нагрузку."""
+    operators = [
+        Operator(name=f"Оператор {i}", max_load=10, current_load=load)
+        for i, load in enumerate([5, 0, 1])
+    ]
+    lead = Lead(phone="+79991234567")
+    source = Source(name="Test Bot")
+    db_session.add_all([*operators, lead, source])
+    await db_session.commit()
+    db_session.add_all(
+        Contact(
+            lead_id=lead.id,
+            source_id=source.id,
+            operator_id=operators[index].id,
+            is_resolved=is_resolved,
+        )
+        for index, is_resolved in [(0, False), (0, True), (2, False)]
+    )
+    await db_session.commit()
+
+    job = ReconciliationJob(
+        async_sessionmaker(db_session.bind, expire_on_commit=False),
+        batch_size=2,
+    )
+    report = await job.run()
+
+    assert report.mode == "full"
+    assert report.checked == 3
+    assert report.drifted == 1
+    assert report.drift == 4
+    assert report.repaired == 1
+
+    # Новое обращение без увеличения нагрузки
+    db_session.add(
+        Contact(
+            lead_id=lead.id, source_id=source.id, operator_id=operators[1].id
+        )
+    )
+    await db_session.commit()
+
+    report = await job.run()
+    assert report.mode == "incremental"
+    assert report.checked == 1
+    assert report.repaired == 1
+
+    for operator in operators:
+        await db_session.refresh(operator)
+    assert [op.current_load for op in operators] == [1, 1, 1]
+    assert job.status().repaired_total == 2
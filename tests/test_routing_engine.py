@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models.contact import Contact
+from app.models.operator import Operator
+from app.models.source import Source, SourceOperatorWeight
+from app.schemas.contact import ContactCreate
+from app.services.routing_engine import RoutingEngine
+
+
+@pytest.mark.asyncio
+async def test_routing_engine_group_commit(db_session):
+    """Одновременные обращения фиксируются общим коммитом."""
+    operator = Operator(
+        name="Анна", is_active=True, max_load=3, current_load=0
+    )
+    source = Source(name="Test Bot")
+    db_session.add_all([operator, source])
+    await db_session.commit()
+    db_session.add(
+        SourceOperatorWeight(
+            source_id=source.id, operator_id=operator.id, weight=10
+        )
+    )
+    await db_session.commit()
+
+    commits = []
+    event.listen(
+        db_session.bind.sync_engine,
+        "commit",
+        lambda connection: commits.append(connection),
+    )
+
+    engine = RoutingEngine(
+        async_sessionmaker(db_session.bind, expire_on_commit=False),
+        flush_ms=50,
+    )
+    engine.start()
+    results = await asyncio.gather(
+        *(
+            engine.submit(
+                ContactCreate(
+                    source_id=source.id, lead_phone=f"+7999000000{i}"
+                )
+            )
+            for i in range(5)
+        ),
+        engine.submit(ContactCreate(source_id=999, lead_phone="+1")),
+        return_exceptions=True,
+    )
+    await engine.stop()
+
+    assert len(commits) == 1
+    contacts, error = results[:5], results[5]
+    assert isinstance(error, HTTPException)
+    assert error.status_code == 404
+    assert sum(c.operator_id == operator.id for c in contacts) == 3
+
+    await db_session.refresh(operator)
+    assert operator.current_load == 3
+    assert await db_session.scalar(select(func.count(Contact.id))) == 5
@@ -0,0 +1,99 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.dependencies import get_db, get_read_db
+from app.main import app
+from app.models.operator import Operator
+from app.models.source import Source, SourceOperatorWeight
+from app.services.routing_state_service import routing_snapshot
+
+URL = "/api/v1/routing/state"
+
+
+@pytest.fixture
+async def client(db_session):
+    """HTTP-клиент приложения поверх тестовой сессии."""
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_read_db] = lambda: db_session
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as http_client:
+        yield http_client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def sources(db_session, monkeypatch):
+    """Два источника: у первого занятой и свободный операторы."""
+    monkeypatch.setattr(routing_snapshot, "refresh_s", 3600.0)
+    busy = Operator(name="Анна", max_load=1, current_load=1)
+    free = Operator(name="Мария", max_load=10)
+    first = Source(name="Telegram")
+    second = Source(name="Site")
+    db_session.add_all([busy, free, first, second])
+    await db_session.commit()
+    db_session.add_all(
+        [
+            SourceOperatorWeight(
+                source_id=first.id, operator_id=busy.id, weight=30
+            ),
+            SourceOperatorWeight(
+                source_id=first.id, operator_id=free.id, weight=10
+            ),
+            SourceOperatorWeight(
+                source_id=second.id, operator_id=free.id, weight=5
+            ),
+        ]
+    )
+    await db_session.commit()
+    return first, second
+
+
+@pytest.mark.asyncio
+async def test_snapshot_served_from_memory(client, sources, query_budget):
+    """Снимок содержит все источники, повтор обходится без БД."""
+    first, second = sources
+    snapshot = (await client.get(URL)).json()
+
+    assert snapshot["full"] is True
+    assert [s["source_id"] for s in snapshot["sources"]] == [
+        first.id,
+        second.id,
+    ]
+    busy, free = snapshot["sources"][0]["operators"]
+    assert (busy["has_capacity"], busy["probability"]) == (False, 0.0)
+    assert (free["weight"], free["probability"]) == (10, 1.0)
+
+    with query_budget(statements=0):
+        again = (await client.get(URL)).json()
+    assert again == snapshot
+
+
+@pytest.mark.asyncio
+async def test_diff_since_version(client, sources):
+    """Дифф содержит только изменившиеся и удаленные источники."""
+    first, second = sources
+    version = (await client.get(URL)).json()["version"]
+
+    await client.post(
+        "/api/v1/contacts",
+        json={"source_id": second.id, "lead_phone": "+71"},
+    )
+    await client.delete(f"/api/v1/sources/{first.id}")
+    diff = (await client.get(URL, params={"since": version})).json()
+
+    assert diff["full"] is False
+    [changed] = diff["sources"]
+    assert changed["source_id"] == second.id
+    assert changed["operators"][0]["current_load"] == 1
+    assert diff["removed_sources"] == [first.id]
+
+    unchanged = await client.get(URL, params={"since": diff["version"]})
+    assert unchanged.json()["sources"] == []
+
+    foreign = await client.get(URL, params={"since": "00000000.1"})
+    assert foreign.json()["full"] is True
+
+    for malformed in ("abc", "other.1", f"{version}x"):
+        response = await client.get(URL, params={"since": malformed})
+        assert response.status_code == 422
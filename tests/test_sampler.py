@@ -0,0 +1,31 @@
+import random
+from collections import Counter
+
+from app.core.sampler import WeightedSampler
+
+
+def test_sampler_proportions():
+    """Частота выбора пропорциональна весам."""
+    sampler = WeightedSampler([10, 30, 0, 60])
+    rng = random.Random(42)
+
+    counter = Counter(sampler.sample(rng) for _ in range(20000))
+
+    assert counter[2] == 0
+    assert 0.08 < counter[0] / 20000 < 0.12
+    assert 0.27 < counter[1] / 20000 < 0.33
+    assert 0.57 < counter[3] / 20000 < 0.63
+
+
+def test_sampler_update_excludes_index():
+    """Обнуленный вес исключает индекс из выборки."""
+    sampler = WeightedSampler([5, 5, 5])
+    sampler.update(1, 0)
+    rng = random.Random(1)
+
+    assert sampler.total == 10
+    assert 1 not in {sampler.sample(rng) for _ in range(1000)}
+
+    sampler.update(0, 0)
+    sampler.update(2, 0)
+    assert sampler.sample(rng) is None